@@ -1,18 +1,28 @@
+import base64
 import os
 import secrets
 import hashlib
+import hmac
 import datetime
 import logging
 import json
 import calendar
 import re
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from datetime import date, timedelta
 from functools import wraps
+from urllib.parse import urlencode
 
 import jwt
+import requests as http_requests
+from authlib.jose import JsonWebKey, jwt as authlib_jwt
+from authlib.jose.errors import BadSignatureError
 from flask import (
     Flask,
+    current_app,
     request,
     jsonify,
     send_from_directory,
@@ -21,14 +31,47 @@ from flask import (
     redirect,
 )
 from werkzeug.utils import safe_join
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
-from sqlalchemy import func, extract, desc, or_
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    any_,
+    func,
+    extract,
+    desc,
+    or_,
+    case,
+    lambda_stmt,
+    literal_column,
+)
+from sqlalchemy.dialects.postgresql import distinct_on, insert as pg_insert
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
 from sqlalchemy.exc import IntegrityError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from webauthn import (
+    generate_authentication_options,
+    generate_registration_options,
+    verify_authentication_response,
+    verify_registration_response,
+)
+from webauthn.helpers import options_to_json_dict
+from webauthn.helpers.structs import (
+    AuthenticationCredential,
+    AuthenticatorAssertionResponse,
+    AuthenticatorAttestationResponse,
+    AuthenticatorSelectionCriteria,
+    AuthenticatorTransport,
+    PublicKeyCredentialDescriptor,
+    RegistrationCredential,
+    ResidentKeyRequirement,
+    UserVerificationRequirement,
+)
 
 from models import (
     db,
@@ -50,6 +93,7 @@ from models import (
     ClientMutation,
     TelemetrySettings,
     user_database_access,
+    normalize_email,
 )
 from migration import migrate_sqlite_to_pg
 from db_migrations import run_pending_migrations
@@ -70,6 +114,7 @@ from services.stripe_service import (
 )
 from services.telemetry import telemetry
 from services.scheduler import scheduler
+from services.json_provider import install_json_provider
 from services.logging_config import (
     setup_logging,
     get_logger,
@@ -94,6 +139,10 @@ from config import (
     get_enabled_oauth_providers,
     get_oauth_redirect_uris,
     OAUTH_AUTO_REGISTER,
+    OAUTH_OIDC_EMAIL_CLAIM,
+    OAUTH_OIDC_USERNAME_CLAIM,
+    OAUTH_OIDC_NAME_CLAIM,
+    OAUTH_OIDC_SKIP_EMAIL_VERIFICATION,
     ENABLE_2FA,
     ENABLE_PASSKEYS,
     WEBAUTHN_RP_ID,
@@ -143,6 +192,22 @@ if not _jwt_secret:
         "No JWT_SECRET_KEY set - using ephemeral key. Tokens will be invalid after restart."
     )
 JWT_SECRET_KEY = _jwt_secret
+# HS256 is HMAC-SHA256 through hashlib/OpenSSL; encode the secret once so
+# PyJWT does not re-encode it on every sign and verify.
+JWT_ALGORITHM = "HS256"
+_jwt_signing_key = JWT_SECRET_KEY.encode()
+# Key for the HMAC over server-issued 2FA codes (email OTPs, recovery codes).
+# Derived from the JWT secret unless TWOFA_CODE_PEPPER is set; set it so that
+# rotating the JWT secret does not invalidate users' stored recovery codes.
+_twofa_code_pepper = os.environ.get("TWOFA_CODE_PEPPER", "").encode()
+if not _twofa_code_pepper:
+    _twofa_code_pepper = hmac.new(
+        _jwt_signing_key, b"billmanager-2fa-codes", hashlib.sha256
+    ).digest()
+    logger.warning(
+        "No TWOFA_CODE_PEPPER set - deriving it from the JWT secret. Rotating "
+        "the JWT secret will invalidate stored recovery codes and pending 2FA codes."
+    )
 JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
 JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
 CHANGE_TOKEN_EXPIRES = timedelta(minutes=15)
@@ -157,9 +222,12 @@ spa_bp = Blueprint("spa", __name__)
 # Set RATE_LIMIT_ENABLED=false to disable rate limiting (for testing)
 RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() != "false"
 
+# Counters live in process memory with a fixed-window strategy: one dict
+# increment per limited request, no storage round trip.
 limiter = Limiter(
     key_func=get_remote_address,
     storage_uri="memory://",
+    strategy="fixed-window",
     enabled=RATE_LIMIT_ENABLED,
 )
 
@@ -208,25 +276,39 @@ def _get_refresh_token_from_request():
 # --- JWT Helper Functions ---
 
 
-def create_access_token(user_id, role):
+def create_access_token(user_id, role, now=None):
     """Create a short-lived access token."""
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
     payload = {
         "user_id": user_id,
         "role": role,
         "type": "access",
-        "exp": datetime.datetime.now(datetime.timezone.utc) + JWT_ACCESS_TOKEN_EXPIRES,
-        "iat": datetime.datetime.now(datetime.timezone.utc),
+        "exp": now + JWT_ACCESS_TOKEN_EXPIRES,
+        "iat": now,
     }
-    return jwt.encode(payload, JWT_SECRET_KEY, algorithm="HS256")
+    return jwt.encode(payload, _jwt_signing_key, algorithm=JWT_ALGORITHM)
+
+
+def _hash_token(token):
+    """SHA-256 hex digest of an opaque token, as stored in *token_hash columns."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _b64url_decode(value):
+    """Decode unpadded base64url (as used by WebAuthn); empty input gives b""."""
+    if not value:
+        return b""
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
 
 
-def create_refresh_token(user_id, device_info=None):
+def create_refresh_token(user_id, device_info=None, now=None):
     """Create a long-lived refresh token and store hash in database."""
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
     token = secrets.token_urlsafe(32)
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    expires_at = (
-        datetime.datetime.now(datetime.timezone.utc) + JWT_REFRESH_TOKEN_EXPIRES
-    )
+    token_hash = _hash_token(token)
+    expires_at = now + JWT_REFRESH_TOKEN_EXPIRES
 
     refresh = RefreshToken(
         user_id=user_id,
@@ -245,10 +327,23 @@ def create_refresh_token(user_id, device_info=None):
     return token
 
 
+def _issue_token_pair(user_id, role, device_info=None):
+    """Create the access token and stored refresh token for a sign-in.
+
+    Both tokens share one clock read; the refresh token's commit also
+    commits whatever the caller has pending.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return (
+        create_access_token(user_id, role, now=now),
+        create_refresh_token(user_id, device_info, now=now),
+    )
+
+
 def verify_access_token(token):
     """Verify and decode an access token."""
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
+        payload = jwt.decode(token, _jwt_signing_key, algorithms=[JWT_ALGORITHM])
         if payload.get("type") != "access":
             return None
         return payload
@@ -260,7 +355,7 @@ def verify_access_token(token):
 
 def verify_refresh_token(token):
     """Verify a refresh token against stored hash."""
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    token_hash = _hash_token(token)
     refresh = RefreshToken.query.filter_by(token_hash=token_hash, revoked=False).first()
     if not refresh:
         return None
@@ -277,6 +372,23 @@ def verify_refresh_token(token):
     return refresh
 
 
+def get_accessible_db_ids():
+    """Return the current JWT user's accessible database IDs as a frozenset.
+
+    Access grants are read from the association table once per request instead
+    of loading the User and its ``accessible_databases`` relationship. They are
+    deliberately not trusted from token claims, which outlive grant changes.
+    """
+    if "jwt_accessible_db_ids" not in g:
+        rows = db.session.execute(
+            db.select(user_database_access.c.database_id).where(
+                user_database_access.c.user_id == g.jwt_user_id
+            )
+        )
+        g.jwt_accessible_db_ids = frozenset(rows.scalars())
+    return g.jwt_accessible_db_ids
+
+
 def check_bill_access(bill):
     """Check if the current JWT user can access a bill's database.
 
@@ -287,17 +399,40 @@ def check_bill_access(bill):
         True if access is granted, or a (response, status_code) tuple on failure.
     """
     if g.jwt_db_name == "_all_":
-        user = db.session.get(User, g.jwt_user_id)
-        bill_db = db.session.get(Database, bill.database_id)
-        if not bill_db or bill_db not in user.accessible_databases:
+        if bill.database_id not in get_accessible_db_ids():
             return jsonify({"success": False, "error": "Access denied"}), 403
     else:
-        target_db = Database.query.filter_by(name=g.jwt_db_name).first()
-        if not target_db or bill.database_id != target_db.id:
+        db_name = g.jwt_db_name
+        target_db_id = db.session.execute(
+            lambda_stmt(
+                lambda: db.select(Database.id).where(Database.name == db_name)
+            )
+        ).scalar()
+        if target_db_id is None or bill.database_id != target_db_id:
             return jsonify({"success": False, "error": "Access denied"}), 403
     return True
 
 
+def get_accepted_share(bill_id):
+    """Return the current JWT user's accepted share of a bill, if any.
+
+    Built as a lambda statement so the compiled SQL is cached across the
+    endpoints that fall back to share-based access.
+    """
+    user_id = g.jwt_user_id
+    return db.session.execute(
+        lambda_stmt(
+            lambda: db.select(BillShare)
+            .where(
+                BillShare.bill_id == bill_id,
+                BillShare.shared_with_user_id == user_id,
+                BillShare.status == "accepted",
+            )
+            .limit(1)
+        )
+    ).scalar()
+
+
 def _error_response(code, message, status_code, details=None):
     """Build the additive common API error shape without breaking legacy fields."""
     payload = {"success": False, "error": message, "code": code}
@@ -358,8 +493,11 @@ def _parse_sync_timestamp(value):
     if not isinstance(value, str) or not _RFC3339_TIMESTAMP.fullmatch(value):
         return None, "invalid_base_updated_at"
     try:
-        normalized_value = value[:-1] + "+00:00" if value[-1] in "Zz" else value
-        parsed = datetime.datetime.fromisoformat(normalized_value)
+        # fromisoformat reads "Z" itself (Python 3.11+); only the lowercase
+        # suffix RFC 3339 also allows needs rewriting.
+        if value[-1] == "z":
+            value = value[:-1] + "Z"
+        parsed = datetime.datetime.fromisoformat(value)
         return _normalize_utc_naive(parsed), None
     except (ValueError, OverflowError):
         return None, "invalid_base_updated_at"
@@ -369,6 +507,15 @@ def _is_positive_integer_id(value):
     return isinstance(value, int) and not isinstance(value, bool) and value > 0
 
 
+def _looks_like_email(value):
+    """Cheap shape check: a local part, an '@', and a dot in the domain.
+
+    Uses rfind instead of split so no list is built.
+    """
+    at = value.rfind("@")
+    return len(value) <= 254 and at > 0 and "." in value[at + 1 :]
+
+
 def _duplicate_sync_entity_ids(changes, deletions):
     """Find existing entity IDs referenced more than once in one batch."""
     counts = {}
@@ -392,6 +539,58 @@ def _duplicate_sync_entity_ids(changes, deletions):
     return {entity_id for entity_id, count in counts.items() if count > 1}
 
 
+def _sync_entity_ids(*collections, key="id"):
+    """Collect the valid positive-integer IDs referenced by sync entries."""
+    entity_ids = set()
+    for entries in collections:
+        for entry in entries:
+            if isinstance(entry, dict) and _is_positive_integer_id(entry.get(key)):
+                entity_ids.add(entry[key])
+    return entity_ids
+
+
+def _lock_sync_bills(bill_ids, database_id):
+    """Lock every bill a sync batch updates or deletes in one query.
+
+    Returns the bills keyed by id; bills outside ``database_id`` are left out
+    so callers treat them as missing. Rows are locked in id order, so two
+    pushes touching the same bills queue up instead of deadlocking. Lazy
+    loads raise, so a relationship access cannot turn into a query per bill.
+    """
+
+    if not bill_ids:
+        return {}
+    bills = (
+        Bill.query.filter(Bill.id.in_(bill_ids), Bill.database_id == database_id)
+        .options(raiseload("*"))
+        .order_by(Bill.id)
+        .with_for_update()
+        .all()
+    )
+    return {bill.id: bill for bill in bills}
+
+
+def _lock_sync_payments(payment_ids):
+    """Lock every payment a sync batch updates or deletes in one query.
+
+    Returns ``{payment_id: (payment, database_id)}`` with the owning bill's
+    database joined in for the scope check; only payment rows are locked.
+    Lazy loads raise, as in _lock_sync_bills.
+    """
+
+    if not payment_ids:
+        return {}
+    rows = db.session.execute(
+        db.select(Payment, Bill.database_id)
+        .options(raiseload("*"))
+        .join(Bill, Payment.bill_id == Bill.id)
+        .where(Payment.id.in_(payment_ids))
+        .order_by(Payment.id)
+        .with_for_update(of=Payment)
+    ).all()
+    return {payment.id: (payment, database_id) for payment, database_id in rows}
+
+
 def _sync_timestamp_conflicts(client_time, server_time):
     """Treat the normalized timestamp as an exact server version token."""
     normalized_client = _normalize_utc_naive(client_time)
@@ -491,7 +690,11 @@ def _client_mutation_request_hash(data):
 
 
 def _replay_client_mutation(record):
-    response = jsonify(json.loads(record.response_body))
+    # The stored body is already serialized JSON; send it without a
+    # parse/re-encode round trip.
+    response = current_app.response_class(
+        record.response_body + "\n", mimetype=current_app.json.mimetype
+    )
     response.status_code = record.response_status
     response.headers["Idempotency-Replayed"] = "true"
     return response
@@ -628,7 +831,8 @@ def _commit_with_client_mutation(mutation, response_payload, status_code=200):
             ClientMutation(
                 **mutation,
                 response_status=status_code,
-                response_body=json.dumps(response_payload, sort_keys=True),
+                # Serialized by the app's JSON provider (orjson when installed)
+                response_body=current_app.json.dumps(response_payload),
             )
         )
     try:
@@ -664,8 +868,18 @@ def _get_payment_for_mutation(payment_id, *, required=True):
 
 
 def _get_share_for_mutation(share_id):
-    """Lock a share row so a timestamp check and write are atomic."""
-    return BillShare.query.filter_by(id=share_id).with_for_update().first_or_404()
+    """Lock a share row so a timestamp check and write are atomic.
+
+    The bill is joined in for the mutation scope check; only the share row
+    is locked.
+    """
+
+    return (
+        BillShare.query.filter_by(id=share_id)
+        .options(joinedload(BillShare.bill))
+        .with_for_update(of=BillShare)
+        .first_or_404()
+    )
 
 
 def resolve_accessible_db_ids():
@@ -677,8 +891,11 @@ def resolve_accessible_db_ids():
     Returns:
         (accessible_db_ids, db_name_lookup) on success, or a (response, status_code) tuple on failure.
     """
+    if "jwt_accessible_dbs" in g:
+        return g.jwt_accessible_dbs
+
     if g.jwt_db_name == "_all_":
-        user = db.session.get(User, g.jwt_user_id)
+        user = _current_user()
         accessible_dbs = user.accessible_databases
         accessible_db_ids = [d.id for d in accessible_dbs]
         db_name_lookup = {d.id: d.display_name for d in accessible_dbs}
@@ -688,7 +905,18 @@ def resolve_accessible_db_ids():
             return jsonify({"success": False, "error": "Database not found"}), 404
         accessible_db_ids = [target_db.id]
         db_name_lookup = {target_db.id: target_db.display_name}
-    return accessible_db_ids, db_name_lookup
+    g.jwt_accessible_dbs = (accessible_db_ids, db_name_lookup)
+    return g.jwt_accessible_dbs
+
+
+def in_database_ids(column, accessible_db_ids):
+    """Filter ``column`` to the given database IDs as ``= ANY(:ids)``.
+
+    The IDs are bound as one array parameter, so the statement text is the
+    same however many databases the user can access and PostgreSQL can reuse
+    one prepared plan, where ``IN (...)`` renders a parameter per ID.
+    """
+    return column == any_(db.literal(list(accessible_db_ids), ARRAY(Integer)))
 
 
 def normalize_category(value):
@@ -777,7 +1005,7 @@ def serialize_settlement_share(share, direction, currency, db_name_lookup=None):
 
 def resolve_budget_target_database(data):
     """Resolve a target database for budget writes from X-Database or database_id."""
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
 
     if data.get("database_id") is not None:
         target_db = db.session.get(Database, data["database_id"])
@@ -879,30 +1107,84 @@ def serialize_reminder_days(value):
     return ",".join(str(day) for day in parse_reminder_days(value))
 
 
-def jwt_required(f):
-    """Decorator for JWT-protected endpoints. Sets g.jwt_user_id and g.jwt_role."""
+@api_v2_bp.before_request
+def _decode_bearer_token():
+    """Decode the bearer token once per request for the JWT decorators."""
+    # Request-scoped memos; g outlives a request when an app context is
+    # already pushed (CLI commands, tests).
+    for key in ("jwt_user", "jwt_accessible_db_ids", "jwt_accessible_dbs"):
+        g.pop(key, None)
 
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify(
+    auth_header = request.headers.get("Authorization")
+    g.jwt_token_present = bool(auth_header and auth_header.startswith("Bearer "))
+    g.jwt_payload = (
+        verify_access_token(auth_header.split(" ")[1])
+        if g.jwt_token_present
+        else None
+    )
+
+
+def _authenticate_jwt_request():
+    """Resolve the user for the pre-decoded bearer token.
+
+    Returns:
+        (user, None) on success, or (None, (response, status_code)) on failure.
+    """
+    if "jwt_user" in g:
+        return g.jwt_user, None
+
+    if not g.get("jwt_token_present"):
+        return None, (
+            jsonify(
                 {"success": False, "error": "Missing or invalid Authorization header"}
-            ), 401
+            ),
+            401,
+        )
 
-        token = auth_header.split(" ")[1]
-        payload = verify_access_token(token)
-        if not payload:
-            return jsonify({"success": False, "error": "Invalid or expired token"}), 401
+    payload = g.get("jwt_payload")
+    if not payload:
+        return None, (
+            jsonify({"success": False, "error": "Invalid or expired token"}),
+            401,
+        )
 
-        user = db.session.get(User, payload["user_id"])
-        if not user:
-            return jsonify(
-                {"success": False, "error": "User no longer exists"}
-            ), 401
+    options = []
+    if is_saas():
+        # Tier checks read the subscription; fetch it in the same SELECT.
+        options.append(joinedload(User.subscription))
+    user = db.session.get(User, payload["user_id"], options=options)
+    if not user:
+        return None, (
+            jsonify({"success": False, "error": "User no longer exists"}),
+            401,
+        )
+
+    g.jwt_user = user
+    g.jwt_user_id = user.id
+    g.jwt_role = user.role
+    return user, None
+
+
+def _current_user():
+    """Return the authenticated user for this request.
+
+    Reuses the row the JWT decorators already loaded, so handlers don't look
+    the user up again.
+    """
+    user = g.get("jwt_user")
+    if user is None:
+        user = db.session.get(User, g.jwt_user_id)
+    return user
 
-        g.jwt_user_id = user.id
-        g.jwt_role = user.role
+
+def jwt_required(f):
+    """Decorator for JWT-protected endpoints. Sets g.jwt_user_id and g.jwt_role."""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user, error = _authenticate_jwt_request()
+        if error:
+            return error
 
         # Get database from X-Database header for mobile clients
         db_name = request.headers.get("X-Database")
@@ -931,33 +1213,38 @@ def jwt_admin_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify(
-                {"success": False, "error": "Missing or invalid Authorization header"}
-            ), 401
-
-        token = auth_header.split(" ")[1]
-        payload = verify_access_token(token)
-        if not payload:
-            return jsonify({"success": False, "error": "Invalid or expired token"}), 401
-
-        user = db.session.get(User, payload["user_id"])
-        if not user:
-            return jsonify(
-                {"success": False, "error": "User no longer exists"}
-            ), 401
+        user, error = _authenticate_jwt_request()
+        if error:
+            return error
 
         if user.role != "admin":
             return jsonify({"success": False, "error": "Admin access required"}), 403
 
-        g.jwt_user_id = user.id
-        g.jwt_role = user.role
         return f(*args, **kwargs)
 
     return decorated_function
 
 
+def no_expire_on_commit(f):
+    """Decorator that keeps loaded rows fresh across commits in a handler.
+
+    For multi-step flows that commit and then keep reading the rows they just
+    wrote, so each attribute access after a commit doesn't re-SELECT the row.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        session = db.session()
+        previous = session.expire_on_commit
+        session.expire_on_commit = False
+        try:
+            return f(*args, **kwargs)
+        finally:
+            session.expire_on_commit = previous
+
+    return decorated_function
+
+
 # --- Subscription & Tier Helpers ---
 
 
@@ -1036,17 +1323,21 @@ def check_tier_limit(user, feature: str) -> tuple[bool, dict]:
         # Count users who have access to databases owned by this user
         # This includes the owner themselves plus any invited users
         if is_saas():
-            # Get all databases owned by this user
-            owned_dbs = Database.query.filter_by(owner_id=user.id).all()
-            if owned_dbs:
-                # Get unique user IDs that have access to these databases
-                user_ids = set()
-                for owned_db in owned_dbs:
-                    for u in owned_db.users:
-                        user_ids.add(u.id)
-                used = len(user_ids)
-            else:
-                used = 1  # Just the owner
+            # Count owned databases and the distinct users with access to
+            # any of them in one query
+            owned_count, member_count = db.session.execute(
+                db.select(
+                    func.count(func.distinct(Database.id)),
+                    func.count(func.distinct(user_database_access.c.user_id)),
+                )
+                .select_from(Database)
+                .outerjoin(
+                    user_database_access,
+                    user_database_access.c.database_id == Database.id,
+                )
+                .where(Database.owner_id == user.id)
+            ).one()
+            used = member_count if owned_count else 1  # Just the owner
 
             # Also count pending invitations for databases owned by this user
             pending_invites = (
@@ -1091,7 +1382,7 @@ def subscription_required(feature: str = None, min_tier: str = None):
             if not is_saas():
                 return f(*args, **kwargs)
 
-            user = db.session.get(User, g.jwt_user_id)
+            user = _current_user()
             if not user:
                 return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -1286,9 +1577,17 @@ def _record_login_if_due(user, now=None):
     return True
 
 
+def _database_summaries(databases):
+    """Serialize databases to the id/name/display_name shape auth responses use."""
+    return [
+        {"id": d.id, "name": d.name, "display_name": d.display_name}
+        for d in databases
+    ]
+
+
 def _current_user_currency():
     """Return the authenticated user's persisted currency preference."""
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     return user.currency if user and user.currency else DEFAULT_USER_CURRENCY
 
 
@@ -1345,7 +1644,7 @@ def jwt_login():
     # Check if 2FA is enabled for this user
     if user.twofa_config and user.twofa_config.is_enabled:
         session_token = secrets.token_urlsafe(32)
-        session_hash = hashlib.sha256(session_token.encode()).hexdigest()
+        session_hash = _hash_token(session_token)
 
         challenge = TwoFAChallenge(
             user_id=user.id,
@@ -1372,18 +1671,22 @@ def jwt_login():
             }
         ), 403
 
+    # Read the response fields before the commits below expire the user
+    user_data = {
+        "id": user.id,
+        "username": user.username,
+        "role": user.role,
+        "currency": user.currency,
+    }
+    databases = _database_summaries(user.accessible_databases)
+
     if _record_login_if_due(user):
         db.session.commit()
 
     # Create tokens
-    access_token = create_access_token(user.id, user.role)
-    refresh_token = create_refresh_token(user.id, device_info)
-
-    # Get accessible databases
-    databases = [
-        {"id": d.id, "name": d.name, "display_name": d.display_name}
-        for d in user.accessible_databases
-    ]
+    access_token, refresh_token = _issue_token_pair(
+        user_data["id"], user_data["role"], device_info
+    )
 
     response = jsonify(
         {
@@ -1393,12 +1696,7 @@ def jwt_login():
                 "refresh_token": refresh_token,
                 "expires_in": int(JWT_ACCESS_TOKEN_EXPIRES.total_seconds()),
                 "token_type": "Bearer",  # nosec B105
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "role": user.role,
-                    "currency": user.currency,
-                },
+                "user": user_data,
                 "databases": databases,
             },
         }
@@ -1426,8 +1724,9 @@ def jwt_refresh():
 
     # Rotate refresh token on every refresh to limit replay window.
     stored_token.revoked = True
-    access_token = create_access_token(user.id, user.role)
-    new_refresh_token = create_refresh_token(user.id, stored_token.device_info)
+    access_token, new_refresh_token = _issue_token_pair(
+        user.id, user.role, stored_token.device_info
+    )
 
     response = jsonify(
         {
@@ -1449,7 +1748,7 @@ def jwt_logout():
     refresh_token = _get_refresh_token_from_request()
 
     if refresh_token:
-        token_hash = hashlib.sha256(refresh_token.encode()).hexdigest()
+        token_hash = _hash_token(refresh_token)
         stored_token = RefreshToken.query.filter_by(token_hash=token_hash).first()
         if stored_token:
             stored_token.revoked = True
@@ -1771,7 +2070,7 @@ def billing_usage():
     """Get current usage against tier limits."""
     from config import is_saas, get_tier_limits
 
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -1810,7 +2109,7 @@ def billing_usage():
 @jwt_required
 def create_checkout():
     """Create a Stripe Checkout session for subscription."""
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -1875,7 +2174,7 @@ def create_checkout():
 @jwt_required
 def billing_portal():
     """Create a Stripe Customer Portal session for subscription management."""
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -1896,7 +2195,7 @@ def change_plan():
     """Change subscription plan (upgrade or downgrade)."""
     from config import get_stripe_price_id
 
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -1968,7 +2267,7 @@ def billing_status():
     """Get current subscription status."""
     from config import get_tier_limits
 
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -2202,7 +2501,7 @@ def stripe_webhook():
 @jwt_required
 def jwt_me():
     """Get or update the current user's account preferences."""
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if request.method == "PATCH":
         data = request.get_json(force=True, silent=True)
         if not isinstance(data, dict):
@@ -2219,10 +2518,7 @@ def jwt_me():
         user.currency = currency.strip().upper()
         db.session.commit()
 
-    databases = [
-        {"id": d.id, "name": d.name, "display_name": d.display_name}
-        for d in user.accessible_databases
-    ]
+    databases = _database_summaries(user.accessible_databases)
     return jsonify(
         {
             "success": True,
@@ -2249,7 +2545,7 @@ def jwt_me():
 @jwt_required
 def jwt_delete_account():
     """Delete the current account owner and all account data."""
-    current_user = db.session.get(User, g.jwt_user_id)
+    current_user = _current_user()
     if not current_user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -2351,6 +2647,9 @@ def jwt_delete_account():
                     }
                 ), 502
 
+    # Find the recipients of the account's shared bills before the shares go
+    recipient_ids = _shared_bill_recipient_ids(bill_ids)
+
     if account_user_ids:
         db.session.execute(
             user_database_access.delete().where(
@@ -2430,6 +2729,7 @@ def jwt_delete_account():
         db.session.delete(user)
 
     db.session.commit()
+    _invalidate_shared_bills_cache(*recipient_ids)
 
     return jsonify({"success": True, "data": {"message": "Account deleted"}})
 
@@ -2455,7 +2755,7 @@ def jwt_get_bills():
     accessible_db_ids, db_name_lookup = result
 
     # Get owned bills from accessible database(s)
-    query = Bill.query.filter(Bill.database_id.in_(accessible_db_ids))
+    query = Bill.query.filter(in_database_ids(Bill.database_id, accessible_db_ids))
     if not include_archived:
         query = query.filter_by(archived=False)
     if bill_type:
@@ -2620,7 +2920,7 @@ def jwt_create_bill():
     if not data:
         return jsonify({"success": False, "error": "Invalid JSON body"}), 400
 
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
 
     # Determine target database: explicit database_id takes precedence over X-Database header
     if "database_id" in data:
@@ -2741,9 +3041,7 @@ def jwt_get_bill(bill_id):
     has_access = check_bill_access(bill) is True
     share = None
     if not has_access:
-        share = BillShare.query.filter_by(
-            bill_id=bill_id, shared_with_user_id=g.jwt_user_id, status="accepted"
-        ).first()
+        share = get_accepted_share(bill_id)
         has_access = share is not None
 
     if not has_access:
@@ -2829,11 +3127,10 @@ def jwt_update_bill(bill_id):
     if replay:
         return replay
 
-    user = db.session.get(User, g.jwt_user_id)
+    accessible_db_ids = get_accessible_db_ids()
 
     # Validate user has access to the bill's current database
-    current_bill_db = db.session.get(Database, bill.database_id)
-    if current_bill_db not in user.accessible_databases:
+    if bill.database_id not in accessible_db_ids:
         return jsonify({"success": False, "error": "Access denied"}), 403
 
     # For non-_all_ mode, also verify X-Database header matches bill's database
@@ -2849,7 +3146,7 @@ def jwt_update_bill(bill_id):
             return jsonify(
                 {"success": False, "error": "Target database not found"}
             ), 404
-        if destination_db not in user.accessible_databases:
+        if destination_db.id not in accessible_db_ids:
             return jsonify(
                 {"success": False, "error": "Access denied to target database"}
             ), 403
@@ -2939,6 +3236,7 @@ def jwt_update_bill(bill_id):
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(*_shared_bill_recipient_ids([bill_id]))
     return jsonify(response_payload)
 
 
@@ -3083,6 +3381,8 @@ def jwt_delete_bill_permanent(bill_id):
     # relationship, but the audit log doesn't, so it needs explicit cleanup.
     ShareAuditLog.query.filter_by(bill_id=bill.id).delete(synchronize_session=False)
 
+    # The shares are deleted with the bill, so find the recipients first
+    recipient_ids = _shared_bill_recipient_ids([bill.id])
     db.session.delete(bill)
     response_payload = {
         "success": True,
@@ -3091,6 +3391,7 @@ def jwt_delete_bill_permanent(bill_id):
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(*recipient_ids)
     return jsonify(response_payload)
 
 
@@ -3103,7 +3404,6 @@ def jwt_pay_bill(bill_id):
         return jsonify({"success": False, "error": "X-Database header required"}), 400
 
     bill = _get_bill_for_mutation(bill_id)
-    user = db.session.get(User, g.jwt_user_id)
 
     access = check_bill_access(bill)
     if access is not True:
@@ -3166,6 +3466,7 @@ def jwt_pay_bill(bill_id):
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(*_shared_bill_recipient_ids([bill_id]))
     return jsonify(response_payload)
 
 
@@ -3183,19 +3484,25 @@ def jwt_get_bill_payments(bill_id):
     has_access = check_bill_access(bill) is True
     if not has_access:
         # Check if user has an accepted share for this bill
-        share = BillShare.query.filter_by(
-            bill_id=bill_id, shared_with_user_id=g.jwt_user_id, status="accepted"
-        ).first()
+        share = get_accepted_share(bill_id)
         has_access = share is not None
 
     if not has_access:
         return jsonify({"success": False, "error": "Access denied"}), 403
 
-    payments = (
-        Payment.query.filter_by(bill_id=bill_id)
+    # Column rows skip ORM identity-map bookkeeping and instance hydration
+    payments = db.session.execute(
+        db.select(
+            Payment.id,
+            Payment.amount,
+            Payment.payment_date,
+            Payment.notes,
+            Payment.share_id,
+            Payment.updated_at,
+        )
+        .where(Payment.bill_id == bill_id)
         .order_by(desc(Payment.payment_date))
-        .all()
-    )
+    ).all()
     result = [
         {
             "id": p.id,
@@ -3225,9 +3532,7 @@ def jwt_get_bill_monthly_payments(bill_id):
     # bill payment-history endpoint above.
     has_access = check_bill_access(bill) is True
     if not has_access:
-        share = BillShare.query.filter_by(
-            bill_id=bill_id, shared_with_user_id=g.jwt_user_id, status="accepted"
-        ).first()
+        share = get_accepted_share(bill_id)
         has_access = share is not None
 
     if not has_access:
@@ -3273,24 +3578,40 @@ def jwt_get_all_payments():
         return result  # Error response
     accessible_db_ids, db_name_lookup = result
 
-    # Get payments for bills owned by user in accessible database(s)
-    owned_payments = (
-        db.session.query(Payment)
-        .join(Bill)
-        .filter(Bill.database_id.in_(accessible_db_ids))
-        .all()
+    payment_columns = (
+        Payment.id,
+        Payment.amount,
+        Payment.payment_date,
+        Payment.notes,
+        Payment.bill_id,
+        Payment.share_id,
+        Payment.updated_at,
+        Bill.name.label("bill_name"),
+        Bill.icon.label("bill_icon"),
+        Bill.type.label("bill_type"),
+        Bill.category,
+        Bill.database_id,
     )
 
-    # Get payments for shared bills where current user is the share recipient
-    shared_payments = (
-        db.session.query(Payment)
+    # Get payments for bills owned by user in accessible database(s)
+    owned_payments = db.session.execute(
+        db.select(*payment_columns)
+        .join(Bill, Payment.bill_id == Bill.id)
+        .where(in_database_ids(Bill.database_id, accessible_db_ids))
+    ).all()
+
+    # Get payments for shared bills where current user is the share recipient,
+    # with the bill's database name (may not be in user's accessible databases)
+    shared_payments = db.session.execute(
+        db.select(*payment_columns, Database.display_name.label("database_name"))
         .join(BillShare, Payment.share_id == BillShare.id)
-        .filter(
+        .join(Bill, Payment.bill_id == Bill.id)
+        .outerjoin(Database, Bill.database_id == Database.id)
+        .where(
             BillShare.shared_with_user_id == g.jwt_user_id,
             BillShare.status == "accepted",
         )
-        .all()
-    )
+    ).all()
 
     # Build result with proper categorization
     result = []
@@ -3311,7 +3632,7 @@ def jwt_get_all_payments():
             effective_type = "deposit"
         else:
             # Owner's own payment - use bill type (treat 'bill' as 'expense')
-            effective_type = "deposit" if p.bill.type == "deposit" else "expense"
+            effective_type = "deposit" if p.bill_type == "deposit" else "expense"
 
         result.append(
             {
@@ -3320,15 +3641,15 @@ def jwt_get_all_payments():
                 "payment_date": p.payment_date,
                 "notes": p.notes,
                 "bill_id": p.bill_id,
-                "bill_name": p.bill.name,
-                "bill_icon": p.bill.icon,
+                "bill_name": p.bill_name,
+                "bill_icon": p.bill_icon,
                 "bill_type": effective_type,  # Use effective type for proper categorization
-                "original_bill_type": p.bill.type,  # Keep original for reference
-                "category": p.bill.category,
+                "original_bill_type": p.bill_type,  # Keep original for reference
+                "category": p.category,
                 "is_share_payment": is_received_from_sharee,
                 "is_received_payment": is_received_from_sharee,  # True = money received from sharee
-                "database_id": p.bill.database_id,
-                "database_name": db_name_lookup.get(p.bill.database_id, "Unknown"),
+                "database_id": p.database_id,
+                "database_name": db_name_lookup.get(p.database_id, "Unknown"),
                 "updated_at": _isoformat_utc(p.updated_at),
             }
         )
@@ -3340,11 +3661,7 @@ def jwt_get_all_payments():
         seen_ids.add(p.id)
 
         # For sharee: their share payments are expenses (money they paid out)
-        effective_type = "deposit" if p.bill.type == "deposit" else "expense"
-
-        # Get database name for shared bill (may not be in user's accessible databases)
-        shared_bill_db = db.session.get(Database, p.bill.database_id)
-        shared_db_name = shared_bill_db.display_name if shared_bill_db else "Unknown"
+        effective_type = "deposit" if p.bill_type == "deposit" else "expense"
 
         result.append(
             {
@@ -3353,15 +3670,15 @@ def jwt_get_all_payments():
                 "payment_date": p.payment_date,
                 "notes": p.notes,
                 "bill_id": p.bill_id,
-                "bill_name": p.bill.name,
-                "bill_icon": p.bill.icon,
+                "bill_name": p.bill_name,
+                "bill_icon": p.bill_icon,
                 "bill_type": effective_type,
-                "original_bill_type": p.bill.type,
-                "category": p.bill.category,
+                "original_bill_type": p.bill_type,
+                "category": p.category,
                 "is_share_payment": True,
                 "is_received_payment": False,  # False = money paid out by sharee
-                "database_id": p.bill.database_id,
-                "database_name": shared_db_name,
+                "database_id": p.database_id,
+                "database_name": p.database_name or "Unknown",
                 "updated_at": _isoformat_utc(p.updated_at),
             }
         )
@@ -3428,6 +3745,7 @@ def jwt_update_payment(payment_id):
         payment.notes = data["notes"]
 
     db.session.flush()
+    bill_id = payment.bill_id
     response_payload = {
         "success": True,
         "data": {
@@ -3439,6 +3757,7 @@ def jwt_update_payment(payment_id):
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(*_shared_bill_recipient_ids([bill_id]))
     return jsonify(response_payload)
 
 
@@ -3498,6 +3817,7 @@ def jwt_delete_payment(payment_id):
     if payment.share_id:
         # Also clear the recipient_paid_date on the share since we're deleting the payment.
         share.recipient_paid_date = None
+    bill_id = payment.bill_id
     db.session.delete(payment)
     response_payload = {
         "success": True,
@@ -3506,6 +3826,7 @@ def jwt_delete_payment(payment_id):
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(*_shared_bill_recipient_ids([bill_id]))
     return jsonify(response_payload)
 
 
@@ -3577,14 +3898,27 @@ def jwt_share_bill(bill_id):
             if not is_valid:
                 return jsonify({"success": False, "error": error}), 400
 
-    # Check for existing active share
-    existing = (
-        BillShare.query.filter_by(bill_id=bill_id, shared_with_identifier=identifier)
-        .filter(BillShare.status.in_(["pending", "accepted"]))
-        .first()
-    )
+    # Deployment mode is fixed for the process; read it once per request
+    saas_mode = is_saas()
 
-    if existing:
+    # Check for an existing active share and resolve the recipient in one query
+    # (email lookups are case-insensitive)
+    if "@" in identifier:
+        recipient_match = User.email_normalized == normalize_email(identifier)
+    else:
+        recipient_match = User.username == identifier
+    already_shared, target_user_id = db.session.execute(
+        db.select(
+            db.exists().where(
+                BillShare.bill_id == bill_id,
+                BillShare.shared_with_identifier == identifier,
+                BillShare.status.in_(["pending", "accepted"]),
+            ),
+            db.select(User.id).where(recipient_match).limit(1).scalar_subquery(),
+        )
+    ).one()
+
+    if already_shared:
         return jsonify(
             {"success": False, "error": "Bill already shared with this user"}
         ), 400
@@ -3594,33 +3928,24 @@ def jwt_share_bill(bill_id):
         # Email-based sharing (works in both SaaS and self-hosted modes)
         identifier_type = "email"
         invite_token = None
-        expires_at = (
-            datetime.datetime.now(datetime.timezone.utc) + timedelta(days=7)
-            if is_saas()
-            else None
-        )
-
-        # Case-insensitive email lookup
-        from sqlalchemy import func
+        expires_at = func.now() + timedelta(days=7) if saas_mode else None
 
-        target_user = User.query.filter(func.lower(User.email) == identifier).first()
-        shared_with_user_id = target_user.id if target_user else None
+        shared_with_user_id = target_user_id
         status = "pending"  # Email shares require acceptance
         accepted_at = None
     else:
         # Username-based sharing (requires acceptance)
         identifier_type = "username"
-        target_user = User.query.filter_by(username=identifier).first()
 
-        if not target_user:
+        if not target_user_id:
             return jsonify({"success": False, "error": "User not found"}), 404
 
-        if target_user.id == g.jwt_user_id:
+        if target_user_id == g.jwt_user_id:
             return jsonify(
                 {"success": False, "error": "Cannot share with yourself"}
             ), 400
 
-        shared_with_user_id = target_user.id
+        shared_with_user_id = target_user_id
         invite_token = None
         expires_at = None
         status = "pending"  # Username shares also require acceptance
@@ -3639,7 +3964,7 @@ def jwt_share_bill(bill_id):
         accepted_at=accepted_at,
         expires_at=expires_at,
     )
-    if identifier_type == "email" and is_saas():
+    if identifier_type == "email" and saas_mode:
         invite_token = share.set_invite_token()
 
     try:
@@ -3690,16 +4015,20 @@ def jwt_share_bill(bill_id):
         return jsonify({"success": False, "error": "Failed to create share"}), 500
 
     # Send email invitation if SaaS and pending
-    if is_saas() and status == "pending" and EMAIL_ENABLED:
+    if saas_mode and status == "pending" and EMAIL_ENABLED:
         try:
-            from services.email import send_bill_share_email
-
-            current_user = db.session.get(User, g.jwt_user_id)
-            send_bill_share_email(
-                identifier, invite_token, bill.name, current_user.username
+            from services.email import send_bill_share_email, send_in_background
+
+            current_user = _current_user()
+            send_in_background(
+                send_bill_share_email,
+                identifier,
+                invite_token,
+                bill.name,
+                current_user.username,
             )
         except Exception as e:
-            logger.warning(f"Failed to send share invitation email: {e}")
+            logger.warning(f"Failed to queue share invitation email: {e}")
 
     return jsonify(response_payload), 201
 
@@ -3722,14 +4051,32 @@ def jwt_get_bill_shares(bill_id):
     # never set in self-hosted mode, so this check only applies to SaaS -
     # otherwise it rejected every request unconditionally (owner_id is
     # always None there, so `None != current_user_id` was always true).
-    database = db.session.get(Database, bill.database_id)
-    if is_saas() and (not database or database.owner_id != g.jwt_user_id):
-        return jsonify({"success": False, "error": "Access denied"}), 403
-
-    shares = BillShare.query.filter_by(bill_id=bill_id).all()
+    if is_saas():
+        database_owner_id = db.session.execute(
+            db.select(Database.owner_id).where(Database.id == bill.database_id)
+        ).scalar()
+        if database_owner_id != g.jwt_user_id:
+            return jsonify({"success": False, "error": "Access denied"}), 403
 
-    # Security: Only return shares owned by the current user
-    filtered_shares = [s for s in shares if s.owner_user_id == g.jwt_user_id]
+    # Plain rows; the listing never needs ORM instances
+    shares = db.session.execute(
+        db.select(
+            BillShare.id,
+            BillShare.shared_with_identifier,
+            BillShare.identifier_type,
+            BillShare.status,
+            BillShare.split_type,
+            BillShare.split_value,
+            BillShare.created_at,
+            BillShare.accepted_at,
+            BillShare.updated_at,
+            BillShare.recipient_paid_date,
+        ).where(
+            BillShare.bill_id == bill_id,
+            # Security: Only return shares owned by the current user
+            BillShare.owner_user_id == g.jwt_user_id,
+        )
+    ).all()
 
     result = [
         {
@@ -3746,7 +4093,7 @@ def jwt_get_bill_shares(bill_id):
             if s.recipient_paid_date
             else None,
         }
-        for s in filtered_shares
+        for s in shares
     ]
 
     return jsonify({"success": True, "data": result})
@@ -3789,9 +4136,11 @@ def jwt_revoke_share(share_id):
             "updated_at": _isoformat_utc(share.updated_at),
         },
     }
+    recipient_id = share.shared_with_user_id
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(recipient_id)
     return jsonify(response_payload)
 
 
@@ -3803,8 +4152,6 @@ def jwt_get_settlements():
     if not g.jwt_db_name:
         return jsonify({"success": False, "error": "X-Database header required"}), 400
 
-    from sqlalchemy.orm import joinedload
-
     resolved = resolve_accessible_db_ids()
     if not isinstance(resolved[0], list):
         return resolved
@@ -3815,7 +4162,7 @@ def jwt_get_settlements():
         .filter(
             BillShare.owner_user_id == g.jwt_user_id,
             BillShare.status == "accepted",
-            Bill.database_id.in_(accessible_db_ids),
+            in_database_ids(Bill.database_id, accessible_db_ids),
             Bill.archived == False,
         )
         .options(
@@ -3935,25 +4282,100 @@ def jwt_get_settlements():
     )
 
 
+# Short-lived cache of GET /shared-bills payloads, which clients poll
+# (user_id -> (currency, data, cached_at)). Share state changes and owner
+# edits to shared bills and their payments drop the affected recipients'
+# entries. Each worker process keeps its own copy and only drops its own
+# entries, so another worker may serve a payload up to the TTL old.
+_shared_bills_cache = {}
+_SHARED_BILLS_CACHE_TTL = 30  # seconds
+
+
+def _invalidate_shared_bills_cache(*user_ids):
+    """Drop share recipients' cached shared-bills payloads."""
+    for user_id in user_ids:
+        _shared_bills_cache.pop(user_id, None)
+
+
+def _shared_bill_recipient_ids(bill_ids):
+    """Return the accepted recipients of ``bill_ids``.
+
+    Skips the query when nothing is cached, since there is nothing to drop.
+    """
+    if not _shared_bills_cache or not bill_ids:
+        return set()
+    return set(
+        db.session.scalars(
+            db.select(BillShare.shared_with_user_id).where(
+                BillShare.bill_id.in_(bill_ids),
+                BillShare.status == "accepted",
+                BillShare.shared_with_user_id.is_not(None),
+            )
+        )
+    )
+
+
 @api_v2_bp.route("/shared-bills", methods=["GET"])
 @limiter.limit("60 per minute")
 @jwt_required
 def jwt_get_shared_bills():
     """Get bills shared with the current user."""
-    # Find shares where current user is the recipient
-    shares = BillShare.query.filter_by(
-        shared_with_user_id=g.jwt_user_id, status="accepted"
-    ).all()
+
+    currency = _current_user_currency()
+    cached = _shared_bills_cache.get(g.jwt_user_id)
+    if (
+        cached
+        and cached[0] == currency
+        and (time.monotonic() - cached[2]) < _SHARED_BILLS_CACHE_TTL
+    ):
+        return jsonify({"success": True, "data": cached[1]})
+
+    # Find shares where current user is the recipient, loading only the
+    # columns the response uses
+    shares = (
+        BillShare.query.filter_by(shared_with_user_id=g.jwt_user_id, status="accepted")
+        .options(
+            load_only(
+                BillShare.bill_id,
+                BillShare.owner_user_id,
+                BillShare.split_type,
+                BillShare.split_value,
+                BillShare.created_at,
+                BillShare.updated_at,
+            ),
+            joinedload(BillShare.bill).load_only(
+                Bill.name,
+                Bill.amount,
+                Bill.due_date,
+                Bill.icon,
+                Bill.type,
+                Bill.frequency,
+                Bill.is_variable,
+                Bill.auto_pay,
+            ),
+            joinedload(BillShare.owner).load_only(User.username),
+        )
+        .all()
+    )
+
+    # Latest payment per shared bill in one query instead of one per share
+    bill_ids = {share.bill_id for share in shares}
+    latest_payments = {}
+    if bill_ids:
+        latest_payments = {
+            payment.bill_id: payment
+            for payment in db.session.scalars(
+                db.select(Payment)
+                .where(Payment.bill_id.in_(bill_ids))
+                .order_by(Payment.bill_id, desc(Payment.payment_date))
+                .ext(distinct_on(Payment.bill_id))
+            )
+        }
 
     result = []
     for share in shares:
         bill = share.bill
-        # Get latest payment for this bill
-        latest_payment = (
-            Payment.query.filter_by(bill_id=bill.id)
-            .order_by(desc(Payment.payment_date))
-            .first()
-        )
+        latest_payment = latest_payments.get(bill.id)
 
         result.append(
             {
@@ -3973,7 +4395,7 @@ def jwt_get_shared_bills():
                 "owner_id": share.owner_user_id,
                 "split_type": share.split_type,
                 "split_value": share.split_value,
-                "my_portion": share.calculate_portion(_current_user_currency()),
+                "my_portion": share.calculate_portion(currency),
                 "last_payment": {
                     "id": latest_payment.id,
                     "amount": latest_payment.amount,
@@ -3989,6 +4411,13 @@ def jwt_get_shared_bills():
             }
         )
 
+    # Drop lapsed entries so the cache stays bounded by active users
+    now = time.monotonic()
+    for user_id, entry in list(_shared_bills_cache.items()):
+        if now - entry[2] >= _SHARED_BILLS_CACHE_TTL:
+            _shared_bills_cache.pop(user_id, None)
+    _shared_bills_cache[g.jwt_user_id] = (currency, result, now)
+
     return jsonify({"success": True, "data": result})
 
 
@@ -3997,12 +4426,11 @@ def jwt_get_shared_bills():
 @jwt_required
 def jwt_get_pending_shares():
     """Get pending share invitations for the current user."""
-    current_user = db.session.get(User, g.jwt_user_id)
+    current_user = _current_user()
     if not current_user:
         return jsonify({"success": True, "data": []})
 
     # Optimize: Filter out expired shares at database level instead of in Python loop
-    from sqlalchemy import or_
 
     shares = (
         BillShare.query.filter(
@@ -4012,9 +4440,21 @@ def jwt_get_pending_shares():
         .filter(
             or_(
                 BillShare.expires_at.is_(None),
-                BillShare.expires_at > datetime.datetime.now(datetime.timezone.utc),
+                BillShare.expires_at > func.now(),
             )
         )
+        .options(
+            load_only(
+                BillShare.bill_id,
+                BillShare.owner_user_id,
+                BillShare.split_type,
+                BillShare.split_value,
+                BillShare.expires_at,
+                BillShare.updated_at,
+            ),
+            joinedload(BillShare.bill).load_only(Bill.name, Bill.amount),
+            joinedload(BillShare.owner).load_only(User.username),
+        )
         .all()
     )
 
@@ -4049,7 +4489,7 @@ def jwt_accept_share(share_id):
     share = _get_share_for_mutation(share_id)
 
     # Verify the current user can accept this share
-    current_user = db.session.get(User, g.jwt_user_id)
+    current_user = _current_user()
 
     # Strict verification based on identifier type
     if share.identifier_type == "username":
@@ -4090,7 +4530,7 @@ def jwt_accept_share(share_id):
     # Accept the share
     share.status = "accepted"
     share.shared_with_user_id = g.jwt_user_id
-    share.accepted_at = datetime.datetime.now(datetime.timezone.utc)
+    share.accepted_at = func.now()
     db.session.flush()
 
     ShareAuditLog.log_action(
@@ -4115,6 +4555,7 @@ def jwt_accept_share(share_id):
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(g.jwt_user_id)
     return jsonify(response_payload)
 
 
@@ -4127,7 +4568,7 @@ def jwt_decline_share(share_id):
     share = _get_share_for_mutation(share_id)
 
     # Verify the current user can decline this share
-    current_user = db.session.get(User, g.jwt_user_id)
+    current_user = _current_user()
 
     # Strict verification based on identifier type
     if share.identifier_type == "username":
@@ -4257,7 +4698,7 @@ def jwt_accept_share_by_token():
     share = _get_share_for_mutation(share.id)
 
     # Verify the current user matches the invitation
-    current_user = db.session.get(User, g.jwt_user_id)
+    current_user = _current_user()
 
     # For email-based shares, verify email match
     if share.identifier_type == "email":
@@ -4303,7 +4744,7 @@ def jwt_accept_share_by_token():
     # Accept the share
     share.status = "accepted"
     share.shared_with_user_id = g.jwt_user_id
-    share.accepted_at = datetime.datetime.now(datetime.timezone.utc)
+    share.accepted_at = func.now()
     db.session.flush()
 
     response_payload = {
@@ -4317,6 +4758,7 @@ def jwt_accept_share_by_token():
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(g.jwt_user_id)
     return jsonify(response_payload)
 
 
@@ -4404,9 +4846,11 @@ def jwt_update_share(share_id):
             "updated_at": _isoformat_utc(share.updated_at),
         },
     }
+    recipient_id = share.shared_with_user_id
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(recipient_id)
     return jsonify(response_payload)
 
 
@@ -4464,6 +4908,7 @@ def jwt_leave_share(share_id):
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(g.jwt_user_id)
     return jsonify(response_payload)
 
 
@@ -4502,9 +4947,8 @@ def jwt_mark_share_paid(share_id):
     # Toggle paid status
     if share.recipient_paid_date:
         # Already marked as paid, so unmark it - delete the associated payment
-        existing_payment = Payment.query.filter_by(share_id=share.id).first()
-        if existing_payment:
-            db.session.delete(existing_payment)
+        # (only this toggle creates share payments, one per paid period)
+        db.session.execute(db.delete(Payment).where(Payment.share_id == share.id))
         share.recipient_paid_date = None
         message = "Marked as unpaid"
     else:
@@ -4514,7 +4958,7 @@ def jwt_mark_share_paid(share_id):
             portion_amount = share.bill.amount or 0
 
         # Get recipient's username for the note
-        recipient = db.session.get(User, g.jwt_user_id)
+        recipient = _current_user()
         recipient_name = recipient.username if recipient else "Unknown"
 
         portion_amount = quantize_currency_amount(portion_amount, _current_user_currency())
@@ -4524,18 +4968,20 @@ def jwt_mark_share_paid(share_id):
         if not is_valid:
             return jsonify({"success": False, "error": error}), 400
 
-        payment = Payment(
-            bill_id=share.bill_id,
-            amount=portion_amount,
-            payment_date=datetime.date.today().isoformat(),
-            notes=f"Share payment by {recipient_name}",
-            share_id=share.id,
-        )
-        db.session.add(payment)
+        # INSERT ... RETURNING hands back the id without an extra flush
+        payment_id = db.session.execute(
+            db.insert(Payment)
+            .values(
+                bill_id=share.bill_id,
+                amount=portion_amount,
+                payment_date=datetime.date.today().isoformat(),
+                notes=f"Share payment by {recipient_name}",
+                share_id=share.id,
+            )
+            .returning(Payment.id)
+        ).scalar_one()
         share.recipient_paid_date = datetime.datetime.now(datetime.timezone.utc)
         message = "Marked as paid"
-        db.session.flush()  # Get the payment ID
-        payment_id = payment.id
 
     db.session.flush()
     response_payload = {
@@ -4551,6 +4997,7 @@ def jwt_mark_share_paid(share_id):
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(g.jwt_user_id)
     return jsonify(response_payload)
 
 
@@ -4618,7 +5065,7 @@ def jwt_get_categories():
     bill_categories = (
         db.session.query(Bill.category)
         .filter(
-            Bill.database_id.in_(accessible_db_ids),
+            in_database_ids(Bill.database_id, accessible_db_ids),
             Bill.category != None,
             Bill.category != "",
         )
@@ -4643,7 +5090,9 @@ def jwt_get_budgets():
     accessible_db_ids, db_name_lookup = result
 
     budgets = (
-        CategoryBudget.query.filter(CategoryBudget.database_id.in_(accessible_db_ids))
+        CategoryBudget.query.filter(
+            in_database_ids(CategoryBudget.database_id, accessible_db_ids)
+        )
         .order_by(CategoryBudget.category)
         .all()
     )
@@ -4804,7 +5253,7 @@ def jwt_get_budget_summary():
         )
         .join(Payment)
         .filter(
-            Bill.database_id.in_(accessible_db_ids),
+            in_database_ids(Bill.database_id, accessible_db_ids),
             Payment.share_id == None,
             Bill.type != "deposit",
             Payment.payment_date >= start_date,
@@ -4818,7 +5267,9 @@ def jwt_get_budget_summary():
     }
 
     budgets = (
-        CategoryBudget.query.filter(CategoryBudget.database_id.in_(accessible_db_ids))
+        CategoryBudget.query.filter(
+            in_database_ids(CategoryBudget.database_id, accessible_db_ids)
+        )
         .order_by(CategoryBudget.category)
         .all()
     )
@@ -4893,7 +5344,10 @@ def jwt_get_stats_by_category():
     rows = (
         db.session.query(category_expr.label("category"), func.sum(Payment.amount), Bill.type)
         .join(Payment)
-        .filter(Bill.database_id.in_(accessible_db_ids), Payment.share_id == None)
+        .filter(
+            in_database_ids(Bill.database_id, accessible_db_ids),
+            Payment.share_id == None,
+        )
         .group_by(category_expr, Bill.type)
         .all()
     )
@@ -4904,9 +5358,9 @@ def jwt_get_stats_by_category():
         if category not in by_category:
             by_category[category] = {"expenses": 0, "deposits": 0, "total": 0}
         if row[2] == "deposit":
-            by_category[category]["deposits"] += float(row[1])
+            by_category[category]["deposits"] += row[1]
         else:
-            by_category[category]["expenses"] += float(row[1])
+            by_category[category]["expenses"] += row[1]
         by_category[category]["total"] = (
             by_category[category]["expenses"] - by_category[category]["deposits"]
         )
@@ -4952,7 +5406,7 @@ def jwt_get_cash_flow_forecast():
 
     owned_bills = (
         Bill.query.filter(
-            Bill.database_id.in_(accessible_db_ids),
+            in_database_ids(Bill.database_id, accessible_db_ids),
             Bill.archived == False,
         )
         .order_by(Bill.due_date, Bill.name)
@@ -5111,108 +5565,88 @@ def jwt_get_cash_flow_forecast():
     )
 
 
-@api_v2_bp.route("/stats/monthly", methods=["GET"])
-@jwt_required
-def jwt_get_monthly_stats():
-    """Get monthly payment totals (JWT version), including shared bill payments."""
-    if not g.jwt_db_name:
-        return jsonify({"success": False, "error": "X-Database header required"}), 400
+def _split_by_bill_type(amount, is_deposit=None):
+    """CASE columns splitting ``amount`` into expenses and deposits.
 
-    # Handle "all databases" mode
-    result = resolve_accessible_db_ids()
+    Bill types 'expense' and 'bill' (and legacy NULLs) are both expenses.
+    ``is_deposit`` overrides the default ``Bill.type == 'deposit'`` test.
+    """
+    if is_deposit is None:
+        is_deposit = Bill.type == "deposit"
+    return (
+        case((is_deposit, 0), else_=amount).label("expenses"),
+        case((is_deposit, amount), else_=0).label("deposits"),
+    )
+
+
+def _sum_by_bill_type(amount):
+    """SUM() columns splitting ``amount`` into expenses and deposits."""
+    expenses, deposits = _split_by_bill_type(amount)
+    return (
+        func.sum(expenses.element).label("expenses"),
+        func.sum(deposits.element).label("deposits"),
+    )
+
+
+@api_v2_bp.route("/stats/monthly", methods=["GET"])
+@jwt_required
+def jwt_get_monthly_stats():
+    """Get monthly payment totals (JWT version), including shared bill payments."""
+    if not g.jwt_db_name:
+        return jsonify({"success": False, "error": "X-Database header required"}), 400
+
+    # Handle "all databases" mode
+    result = resolve_accessible_db_ids()
     if not isinstance(result[0], list):
         return result  # Error response
     accessible_db_ids, _ = result
 
-    # Get owner's own payments on their bills (share_id IS NULL = owner paid it themselves)
-    owner_payments = (
-        db.session.query(
-            func.to_char(
-                func.to_date(Payment.payment_date, "YYYY-MM-DD"), "YYYY-MM"
-            ).label("month"),
-            func.sum(Payment.amount),
-            Bill.type,
-        )
-        .join(Bill)
-        .filter(
-            Bill.database_id.in_(accessible_db_ids),
-            Payment.share_id == None,  # Owner's own payments
-        )
-        .group_by("month", Bill.type)
-        .all()
-    )
-
-    # Get payments received FROM sharees on owner's bills (share_id IS NOT NULL = sharee paid)
-    # These count as deposits/income for the owner
-    received_from_sharees = (
-        db.session.query(
-            func.to_char(
-                func.to_date(Payment.payment_date, "YYYY-MM-DD"), "YYYY-MM"
-            ).label("month"),
-            func.sum(Payment.amount),
+    month = func.to_char(
+        func.to_date(Payment.payment_date, "YYYY-MM-DD"), "YYYY-MM"
+    ).label("month")
+
+    # Payments on the owner's bills, in one pass: the owner's own payments
+    # (share_id IS NULL) split by bill type, while payments made by sharees
+    # (share_id IS NOT NULL) count as deposits/income for the owner
+    owner_bill_payments = (
+        db.select(
+            month,
+            *_split_by_bill_type(
+                Payment.amount,
+                or_(Bill.type == "deposit", Payment.share_id != None),
+            ),
         )
         .join(Bill)
-        .filter(
-            Bill.database_id.in_(accessible_db_ids),
-            Payment.share_id != None,  # Payments made by sharees
-        )
-        .group_by("month")
-        .all()
+        .where(in_database_ids(Bill.database_id, accessible_db_ids))
     )
 
-    # Get payments for shared bills where current user is the share recipient
+    # Payments for shared bills where current user is the share recipient
     # These are expenses the sharee paid on bills shared with them
     sharee_payments = (
-        db.session.query(
-            func.to_char(
-                func.to_date(Payment.payment_date, "YYYY-MM-DD"), "YYYY-MM"
-            ).label("month"),
-            func.sum(Payment.amount),
-            Bill.type,
-        )
+        db.select(month, *_split_by_bill_type(Payment.amount))
         .join(Bill)
         .join(BillShare, Payment.share_id == BillShare.id)
-        .filter(
+        .where(
             BillShare.shared_with_user_id == g.jwt_user_id,
             BillShare.status == "accepted",
         )
-        .group_by("month", Bill.type)
-        .all()
+    )
+
+    # One round-trip: both sources are totalled together per month
+    payments = db.union_all(owner_bill_payments, sharee_payments).subquery()
+    rows = db.session.execute(
+        db.select(
+            payments.c.month,
+            func.sum(payments.c.expenses),
+            func.sum(payments.c.deposits),
+        ).group_by(payments.c.month)
     )
 
     # Organize by month with expense/deposit breakdown
-    monthly = {}
-
-    # Process owner's own payments (categorize by bill type)
-    # Note: bill types can be 'expense', 'bill', or 'deposit'
-    # 'bill' type should be treated as an expense (something you pay)
-    for r in owner_payments:
-        month = r[0]
-        if month not in monthly:
-            monthly[month] = {"expenses": 0, "deposits": 0}
-        if r[2] == "deposit":
-            monthly[month]["deposits"] += float(r[1])
-        else:
-            # 'expense' and 'bill' types are both expenses
-            monthly[month]["expenses"] += float(r[1])
-
-    # Add payments received from sharees as deposits (income for the owner)
-    for r in received_from_sharees:
-        month = r[0]
-        if month not in monthly:
-            monthly[month] = {"expenses": 0, "deposits": 0}
-        monthly[month]["deposits"] += float(r[1])
-
-    # Add sharee's own share payments as expenses (money they paid out)
-    for r in sharee_payments:
-        month = r[0]
-        if month not in monthly:
-            monthly[month] = {"expenses": 0, "deposits": 0}
-        if r[2] == "deposit":
-            monthly[month]["deposits"] += float(r[1])
-        else:
-            # 'expense' and 'bill' types are both expenses
-            monthly[month]["expenses"] += float(r[1])
+    monthly = {
+        month: {"expenses": expenses, "deposits": deposits}
+        for month, expenses, deposits in rows
+    }
 
     return jsonify({"success": True, "data": monthly})
 
@@ -5233,37 +5667,27 @@ def jwt_get_stats_by_account():
 
     # Get payments grouped by account
     results = (
-        db.session.query(Bill.account, func.sum(Payment.amount), Bill.type)
+        db.session.query(Bill.account, *_sum_by_bill_type(Payment.amount))
         .join(Payment)
         .filter(
-            Bill.database_id.in_(accessible_db_ids),
+            in_database_ids(Bill.database_id, accessible_db_ids),
             Bill.account != None,
             Bill.account != "",
         )
-        .group_by(Bill.account, Bill.type)
+        .group_by(Bill.account)
+        .order_by(desc("expenses"), Bill.account)
         .all()
     )
 
-    # Organize by account
-    by_account = {}
-    for r in results:
-        account = r[0] or "Uncategorized"
-        if account not in by_account:
-            by_account[account] = {"expenses": 0, "deposits": 0, "total": 0}
-        if r[2] == "deposit":
-            by_account[account]["deposits"] += float(r[1])
-        else:
-            by_account[account]["expenses"] += float(r[1])
-        by_account[account]["total"] = (
-            by_account[account]["expenses"] - by_account[account]["deposits"]
-        )
-
-    # Convert to sorted list
+    # Rows arrive one per account, highest expenses first
     result = [
-        {"account": k, **v}
-        for k, v in sorted(
-            by_account.items(), key=lambda x: x[1]["expenses"], reverse=True
-        )
+        {
+            "account": account,
+            "expenses": expenses,
+            "deposits": deposits,
+            "total": expenses - deposits,
+        }
+        for account, expenses, deposits in results
     ]
 
     return jsonify({"success": True, "data": result})
@@ -5289,25 +5713,19 @@ def jwt_get_stats_yearly():
             func.to_char(
                 func.to_date(Payment.payment_date, "YYYY-MM-DD"), "YYYY"
             ).label("year"),
-            func.sum(Payment.amount),
-            Bill.type,
+            *_sum_by_bill_type(Payment.amount),
         )
         .join(Bill)
-        .filter(Bill.database_id.in_(accessible_db_ids))
-        .group_by("year", Bill.type)
+        .filter(in_database_ids(Bill.database_id, accessible_db_ids))
+        .group_by("year")
         .all()
     )
 
     # Organize by year
-    by_year = {}
-    for r in results:
-        year = r[0]
-        if year not in by_year:
-            by_year[year] = {"expenses": 0, "deposits": 0}
-        if r[2] == "deposit":
-            by_year[year]["deposits"] += float(r[1])
-        else:
-            by_year[year]["expenses"] += float(r[1])
+    by_year = {
+        year: {"expenses": expenses, "deposits": deposits}
+        for year, expenses, deposits in results
+    }
 
     return jsonify({"success": True, "data": by_year})
 
@@ -5329,56 +5747,41 @@ def jwt_get_monthly_comparison():
     current_year = datetime.date.today().year
     last_year = current_year - 1
 
-    # Get payments for current year and last year, grouped by month
-    results = (
-        db.session.query(
-            func.to_char(
-                func.to_date(Payment.payment_date, "YYYY-MM-DD"), "YYYY"
-            ).label("year"),
-            func.to_char(func.to_date(Payment.payment_date, "YYYY-MM-DD"), "MM").label(
-                "month"
-            ),
-            func.sum(Payment.amount),
-            Bill.type,
+    year = func.to_char(func.to_date(Payment.payment_date, "YYYY-MM-DD"), "YYYY")
+    month = func.to_char(func.to_date(Payment.payment_date, "YYYY-MM-DD"), "MM")
+    is_deposit = Bill.type == "deposit"
+
+    def year_total(year_value, deposits):
+        """SUM of one year's deposits or expenses ('expense'/'bill' types)."""
+        return func.sum(
+            case(
+                (year != year_value, 0),
+                (is_deposit, Payment.amount if deposits else 0),
+                else_=0 if deposits else Payment.amount,
+            )
+        )
+
+    # Get payments for current year and last year, pivoted to one row per month
+    rows = db.session.execute(
+        db.select(
+            month.label("month"),
+            year_total(str(current_year), False).label("current_year_expenses"),
+            year_total(str(current_year), True).label("current_year_deposits"),
+            year_total(str(last_year), False).label("last_year_expenses"),
+            year_total(str(last_year), True).label("last_year_deposits"),
         )
         .join(Bill)
-        .filter(
-            Bill.database_id.in_(accessible_db_ids),
-            func.to_char(func.to_date(Payment.payment_date, "YYYY-MM-DD"), "YYYY").in_(
-                [str(current_year), str(last_year)]
-            ),
+        .where(
+            in_database_ids(Bill.database_id, accessible_db_ids),
+            # Range on the stored ISO text so the filter is sargable; years are
+            # always four digits, so this also holds for unpadded legacy dates
+            Payment.payment_date >= f"{last_year}-01-01",
+            Payment.payment_date < f"{current_year + 1}-01-01",
         )
-        .group_by("year", "month", Bill.type)
-        .all()
+        .group_by(month)
+        .order_by(month)
     )
-
-    # Organize by month with year comparison
-    monthly = {}
-    for r in results:
-        year = r[0]
-        month = r[1]
-        if month not in monthly:
-            monthly[month] = {
-                "month": month,
-                "current_year_expenses": 0,
-                "current_year_deposits": 0,
-                "last_year_expenses": 0,
-                "last_year_deposits": 0,
-            }
-        is_current = year == str(current_year)
-        if r[3] == "deposit":
-            if is_current:
-                monthly[month]["current_year_deposits"] += float(r[2])
-            else:
-                monthly[month]["last_year_deposits"] += float(r[2])
-        else:
-            if is_current:
-                monthly[month]["current_year_expenses"] += float(r[2])
-            else:
-                monthly[month]["last_year_expenses"] += float(r[2])
-
-    # Convert to sorted list (by month)
-    result = sorted(monthly.values(), key=lambda x: x["month"])
+    result = [row._asdict() for row in rows]
 
     return jsonify(
         {
@@ -5400,7 +5803,6 @@ def jwt_process_auto_payments():
         return jsonify({"success": False, "error": "X-Database header required"}), 400
 
     today = datetime.date.today().isoformat()
-    user = db.session.get(User, g.jwt_user_id)
 
     # Handle all-buckets mode - process auto-payments across all accessible databases
     result = resolve_accessible_db_ids()
@@ -5408,32 +5810,73 @@ def jwt_process_auto_payments():
         return result  # Error response
     accessible_db_ids, _ = result
 
-    auto_bills = Bill.query.filter(
-        Bill.database_id.in_(accessible_db_ids),
-        Bill.auto_pay == True,
-        Bill.archived == False,
-        Bill.due_date <= today,
+    auto_bills = db.session.execute(
+        db.select(
+            Bill.id,
+            Bill.name,
+            Bill.amount,
+            Bill.frequency,
+            Bill.frequency_type,
+            Bill.frequency_config,
+            Bill.due_date,
+        ).where(
+            in_database_ids(Bill.database_id, accessible_db_ids),
+            Bill.auto_pay == True,
+            Bill.archived == False,
+            Bill.due_date <= today,
+        )
     ).all()
+    if not auto_bills:
+        return jsonify(
+            {"success": True, "data": {"processed_count": 0, "bills": []}}
+        )
+
+    bill_ids = [bill.id for bill in auto_bills]
+    db.session.execute(
+        db.insert(Payment).from_select(
+            ["bill_id", "amount", "payment_date"],
+            db.select(Bill.id, func.coalesce(Bill.amount, 0), db.literal(today)).where(
+                Bill.id.in_(bill_ids)
+            ),
+        )
+    )
 
-    processed = []
+    once_ids = [bill.id for bill in auto_bills if bill.frequency == "once"]
+    if once_ids:
+        db.session.execute(
+            db.update(Bill)
+            .where(Bill.id.in_(once_ids))
+            .values(archived=True)
+        )
+
+    # Next due dates depend on calculate_next_due_date's calendar rules, so
+    # they are computed here and written back in one executemany UPDATE.
+    # Most bills share a handful of configs, so each distinct one is parsed once.
+    parsed_configs = {}
+    advanced = []
     for bill in auto_bills:
-        payment = Payment(bill_id=bill.id, amount=bill.amount or 0, payment_date=today)
-        db.session.add(payment)
         if bill.frequency == "once":
-            bill.archived = True
-        else:
-            next_due = calculate_next_due_date(
-                bill.due_date,
-                bill.frequency,
-                bill.frequency_type,
-                json.loads(bill.frequency_config),
-            )
-            bill.due_date = next_due.isoformat()
-        processed.append(
-            {"bill_id": bill.id, "name": bill.name, "amount": bill.amount or 0}
-        )
+            continue
+        raw_config = bill.frequency_config or "{}"
+        if raw_config not in parsed_configs:
+            parsed_configs[raw_config] = json.loads(raw_config)
+        next_due = calculate_next_due_date(
+            bill.due_date,
+            bill.frequency,
+            bill.frequency_type,
+            parsed_configs[raw_config],
+        )
+        advanced.append({"id": bill.id, "due_date": next_due.isoformat()})
+    if advanced:
+        db.session.execute(db.update(Bill), advanced)
+
+    processed = [
+        {"bill_id": bill.id, "name": bill.name, "amount": bill.amount or 0}
+        for bill in auto_bills
+    ]
 
     db.session.commit()
+    _invalidate_shared_bills_cache(*_shared_bill_recipient_ids(bill_ids))
     return jsonify(
         {
             "success": True,
@@ -5491,22 +5934,36 @@ def jwt_change_password():
         payload = verify_access_token(auth_header.split(" ")[1])
         if not payload:
             return jsonify({"success": False, "error": "Invalid or expired token"}), 401
-        user = db.session.get(User, payload["user_id"])
+        user = db.session.get(
+            User,
+            payload["user_id"],
+            options=[
+                selectinload(User.accessible_databases).load_only(
+                    Database.id, Database.name, Database.display_name
+                )
+            ],
+        )
         if not user or not user.check_password(current_password):
             return jsonify(
                 {"success": False, "error": "Current password is incorrect"}
             ), 401
 
+    # Read the response fields before the commits below expire the user
+    user_data = {
+        "id": user.id,
+        "username": user.username,
+        "role": user.role,
+        "currency": user.currency,
+    }
+    databases = _database_summaries(user.accessible_databases)
+
     user.set_password(new_password)
     db.session.commit()
 
     # Optionally auto-login after password change
-    access_token = create_access_token(user.id, user.role)
-    refresh_token = create_refresh_token(user.id, data.get("device_info"))
-    databases = [
-        {"id": d.id, "name": d.name, "display_name": d.display_name}
-        for d in user.accessible_databases
-    ]
+    access_token, refresh_token = _issue_token_pair(
+        user_data["id"], user_data["role"], data.get("device_info")
+    )
 
     response = jsonify(
         {
@@ -5517,12 +5974,7 @@ def jwt_change_password():
                 "refresh_token": refresh_token,
                 "expires_in": int(JWT_ACCESS_TOKEN_EXPIRES.total_seconds()),
                 "token_type": "Bearer",  # nosec B105
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "role": user.role,
-                    "currency": user.currency,
-                },
+                "user": user_data,
                 "databases": databases,
             },
         }
@@ -5540,7 +5992,7 @@ def jwt_reauthenticate():
     if not password:
         return jsonify({"success": False, "error": "Password is required"}), 400
 
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if not user or not user.password_hash:
         return jsonify(
             {
@@ -5558,80 +6010,189 @@ def jwt_reauthenticate():
 
 # ============ OIDC / OAuth Routes ============
 
+def _build_oauth_http_session():
+    """Create the pooled HTTP session used for all OAuth provider calls."""
+    session = http_requests.Session()
+    # urllib3 does not retry POST by default, so the single-use authorization
+    # code exchange is never replayed; idempotent GETs retry on gateway errors
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared session so discovery, JWKS, token and userinfo calls reuse pooled
+# keep-alive connections instead of a new TCP+TLS handshake per call
+_oauth_http = _build_oauth_http_session()
+
 # Cache for OIDC discovery metadata (provider -> (metadata_dict, fetched_at))
 _oidc_metadata_cache = {}
 _OIDC_CACHE_TTL = 3600  # 1 hour
 
-# Cache for JWKS keys (provider -> (jwks_dict, fetched_at))
+# Cache for parsed JWKS key sets (provider -> (KeySet, fetched_at))
 _jwks_cache = {}
 _JWKS_CACHE_TTL = 3600  # 1 hour
+_JWKS_FORCED_REFRESH_INTERVAL = 60  # Min seconds between rotation refetches
+
+# Past its TTL an entry is still served for this long while one background
+# thread refreshes it, so a provider outage or a burst of callbacks at expiry
+# never turns into a burst of discovery/JWKS requests.
+_PROVIDER_CACHE_STALE_GRACE = 3600
+
+# One fetch lock per (cache, provider) so concurrent misses wait on a single
+# request instead of each fetching; _provider_refreshing holds the keys that
+# already have a background refresh running.
+_provider_fetch_locks = {}
+_provider_fetch_locks_guard = threading.Lock()
+_provider_refreshing = set()
+
+# Used OAuth state nonces to prevent replay (nonce -> expiry_timestamp).
+# Every nonce gets the same TTL, so insertion order is expiry order and
+# expired entries are always at the front. Only nonces from validly signed
+# state tokens are stored, so the rate-limited callback bounds the size.
+_used_oauth_nonces = OrderedDict()
+_used_oauth_nonces_lock = threading.Lock()
+_USED_NONCE_TTL = 600  # Outlives the 5-minute state token
+
+
+def _provider_fetch_lock(lock_key):
+    with _provider_fetch_locks_guard:
+        lock = _provider_fetch_locks.get(lock_key)
+        if lock is None:
+            lock = _provider_fetch_locks[lock_key] = threading.Lock()
+        return lock
+
+
+def _refresh_provider_cache(cache, provider_key, fetch, lock_key):
+    try:
+        with _provider_fetch_lock(lock_key):
+            value = fetch(provider_key)
+            if value is not None:
+                cache[provider_key] = (value, time.monotonic())
+    finally:
+        with _provider_fetch_locks_guard:
+            _provider_refreshing.discard(lock_key)
 
-# Used OAuth state nonces to prevent replay (nonce -> expiry_timestamp)
-_used_oauth_nonces = {}
-_NONCE_CLEANUP_INTERVAL = 300  # Clean up expired nonces every 5 minutes
-_nonce_last_cleanup = 0
 
+def _get_cached_provider_value(cache, provider_key, ttl, fetch):
+    """Return ``fetch(provider_key)`` through a single-flight TTL cache.
 
-def _get_oidc_metadata(provider_key):
-    """Fetch and cache OIDC discovery metadata for a provider."""
-    import time
-    import requests as http_requests
+    Fresh hits are lock-free. A stale entry is returned immediately while a
+    single background thread refetches it; a missing or fully expired entry
+    is fetched once under a per-provider lock with other callers waiting.
+    """
+    lock_key = (id(cache), provider_key)
+    cached = cache.get(provider_key)
+    if cached:
+        age = time.monotonic() - cached[1]
+        if age < ttl:
+            return cached[0]
+        if age < ttl + _PROVIDER_CACHE_STALE_GRACE:
+            with _provider_fetch_locks_guard:
+                start_refresh = lock_key not in _provider_refreshing
+                _provider_refreshing.add(lock_key)
+            if start_refresh:
+                threading.Thread(
+                    target=_refresh_provider_cache,
+                    args=(cache, provider_key, fetch, lock_key),
+                    daemon=True,
+                ).start()
+            return cached[0]
+
+    with _provider_fetch_lock(lock_key):
+        cached = cache.get(provider_key)
+        if cached and (time.monotonic() - cached[1]) < ttl:
+            return cached[0]
+        value = fetch(provider_key)
+        if value is not None:
+            cache[provider_key] = (value, time.monotonic())
+        return value
 
-    cached = _oidc_metadata_cache.get(provider_key)
-    if cached and (time.time() - cached[1]) < _OIDC_CACHE_TTL:
-        return cached[0]
 
+def _fetch_oidc_metadata(provider_key):
     cfg = get_oauth_provider_config(provider_key)
     if not cfg or not cfg.get("discovery_url"):
         return None
 
     try:
-        resp = http_requests.get(cfg["discovery_url"], timeout=10)
+        resp = _oauth_http.get(cfg["discovery_url"], timeout=10)
         resp.raise_for_status()
-        metadata = resp.json()
-        _oidc_metadata_cache[provider_key] = (metadata, time.time())
-        return metadata
+        return resp.json()
     except Exception as e:
         logger.error(f"Failed to fetch OIDC metadata for {provider_key}: {e}")
         return None
 
 
-def _get_jwks(provider_key):
-    """Fetch and cache JWKS (JSON Web Key Set) for a provider."""
-    import time
-    import requests as http_requests
+def _get_oidc_metadata(provider_key):
+    """Fetch and cache OIDC discovery metadata for a provider."""
+    return _get_cached_provider_value(
+        _oidc_metadata_cache, provider_key, _OIDC_CACHE_TTL, _fetch_oidc_metadata
+    )
 
-    cached = _jwks_cache.get(provider_key)
-    if cached and (time.time() - cached[1]) < _JWKS_CACHE_TTL:
-        return cached[0]
 
+def _fetch_jwks(provider_key):
     metadata = _get_oidc_metadata(provider_key)
     if not metadata or not metadata.get("jwks_uri"):
         return None
 
     try:
-        resp = http_requests.get(metadata["jwks_uri"], timeout=10)
+        resp = _oauth_http.get(metadata["jwks_uri"], timeout=10)
         resp.raise_for_status()
-        jwks = resp.json()
-        _jwks_cache[provider_key] = (jwks, time.time())
-        return jwks
+        return JsonWebKey.import_key_set(resp.json())
     except Exception as e:
         logger.error(f"Failed to fetch JWKS for {provider_key}: {e}")
         return None
 
 
-def _cleanup_used_nonces():
-    """Remove expired nonces from the used set."""
-    import time
+def _get_jwks(provider_key):
+    """Fetch and cache the parsed JWKS (JSON Web Key Set) for a provider."""
+    return _get_cached_provider_value(
+        _jwks_cache, provider_key, _JWKS_CACHE_TTL, _fetch_jwks
+    )
+
+
+def _refresh_jwks_after_failure(provider_key, failed_key_set):
+    """Refetch a provider's JWKS after ``failed_key_set`` could not verify a token.
+
+    Providers rotate signing keys without notice, so a verification failure
+    triggers a refetch, at most once per _JWKS_FORCED_REFRESH_INTERVAL per
+    provider. Returns a different key set to retry with, or None.
+    """
+    with _provider_fetch_lock((id(_jwks_cache), provider_key)):
+        cached = _jwks_cache.get(provider_key)
+        if cached and cached[0] is not failed_key_set:
+            return cached[0]  # Another request already refreshed it
+        if cached and time.monotonic() - cached[1] < _JWKS_FORCED_REFRESH_INTERVAL:
+            return None
+        jwk_set = _fetch_jwks(provider_key)
+        if jwk_set is not None:
+            _jwks_cache[provider_key] = (jwk_set, time.monotonic())
+        return jwk_set
+
+
+def _claim_oauth_nonce(state_nonce):
+    """Record ``state_nonce`` as used; return False if it already was.
 
-    global _nonce_last_cleanup
-    now = time.time()
-    if now - _nonce_last_cleanup < _NONCE_CLEANUP_INTERVAL:
-        return
-    _nonce_last_cleanup = now
-    expired = [n for n, exp in _used_oauth_nonces.items() if exp < now]
-    for n in expired:
-        del _used_oauth_nonces[n]
+    Only expired nonces are evicted; dropping a live one would let its state
+    token be replayed.
+    """
+    now = time.monotonic()
+    with _used_oauth_nonces_lock:
+        while _used_oauth_nonces:
+            oldest, expires_at = next(iter(_used_oauth_nonces.items()))
+            if expires_at >= now:
+                break
+            del _used_oauth_nonces[oldest]
+        if state_nonce in _used_oauth_nonces:
+            return False
+        _used_oauth_nonces[state_nonce] = now + _USED_NONCE_TTL
+        return True
 
 
 def _generate_oauth_state(
@@ -5648,22 +6209,22 @@ def _generate_oauth_state(
     A separate state_nonce prevents replay of the state token itself.
     """
     state_nonce = secrets.token_hex(16)
+    now = datetime.datetime.now(datetime.timezone.utc)
     state_payload = {
         "provider": provider,
         "flow": flow,
         "state_nonce": state_nonce,
         "id_token_nonce": nonce,
         "code_verifier": code_verifier,
-        "exp": datetime.datetime.now(datetime.timezone.utc)
-        + datetime.timedelta(minutes=5),
-        "iat": datetime.datetime.now(datetime.timezone.utc),
+        "exp": now + datetime.timedelta(minutes=5),
+        "iat": now,
         "type": "oauth_state",
     }
     if link_user_id is not None:
         state_payload["link_user_id"] = link_user_id
     if redirect_uri is not None:
         state_payload["redirect_uri"] = redirect_uri
-    return jwt.encode(state_payload, JWT_SECRET_KEY, algorithm="HS256")
+    return jwt.encode(state_payload, _jwt_signing_key, algorithm=JWT_ALGORITHM)
 
 
 def _resolve_oauth_redirect_uri(requested_uri=None):
@@ -5689,12 +6250,8 @@ def _verify_oauth_state(state_token):
 
     Also checks that the state_nonce has not been used before (replay prevention).
     """
-    import time
-
-    _cleanup_used_nonces()
-
     try:
-        payload = jwt.decode(state_token, JWT_SECRET_KEY, algorithms=["HS256"])
+        payload = jwt.decode(state_token, _jwt_signing_key, algorithms=[JWT_ALGORITHM])
         if payload.get("type") != "oauth_state":
             return None
 
@@ -5702,13 +6259,10 @@ def _verify_oauth_state(state_token):
         state_nonce = payload.get("state_nonce")
         if not state_nonce:
             return None
-        if state_nonce in _used_oauth_nonces:
+        if not _claim_oauth_nonce(state_nonce):
             logger.warning(f"Replayed OAuth state nonce detected: {state_nonce[:8]}...")
             return None
 
-        # Mark nonce as used (expires after 10 minutes to allow cleanup)
-        _used_oauth_nonces[state_nonce] = time.time() + 600
-
         return payload
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
@@ -5768,6 +6322,17 @@ def _resolve_token_auth_method(provider, cfg, metadata):
     return "client_secret_post" if cfg.get("client_secret") else "none"
 
 
+_TRUE_CLAIM_STRINGS = frozenset(("true", "1", "yes"))
+
+
+def _is_true_claim(value):
+    """Read a boolean OIDC claim that providers send as a bool, 1 or a string."""
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE_CLAIM_STRINGS
+    # bool is an int subclass, so this covers True as well as 1
+    return isinstance(value, int) and value == 1
+
+
 def _resolve_oauth_user(provider, provider_user_id, email, profile_data=None):
     """Resolve or create a user from OIDC claims.
 
@@ -5778,28 +6343,43 @@ def _resolve_oauth_user(provider, provider_user_id, email, profile_data=None):
 
     Returns (user, is_new_user, error_message)
     """
-    # 1. Check for existing OAuth link
-    oauth_account = OAuthAccount.query.filter_by(
-        provider=provider, provider_user_id=provider_user_id
+
+    # 1. Check for existing OAuth link. The callback goes on to check 2FA and
+    # list the user's databases, so load both with the user.
+    linked = db.session.execute(
+        db.select(User, OAuthAccount)
+        .join(OAuthAccount, OAuthAccount.user_id == User.id)
+        .options(
+            selectinload(User.accessible_databases).load_only(
+                Database.id, Database.name, Database.display_name
+            ),
+            joinedload(User.twofa_config),
+        )
+        .where(
+            OAuthAccount.provider == provider,
+            OAuthAccount.provider_user_id == provider_user_id,
+        )
     ).first()
 
-    if oauth_account:
-        user = db.session.get(User, oauth_account.user_id)
-        if user:
-            # Update profile data
-            if profile_data:
-                oauth_account.profile_data = json.dumps(profile_data)
+    if linked:
+        user, oauth_account = linked
+        # Update profile data; skip the commit (which would expire the
+        # preloaded relationships) when nothing changed since last login
+        if profile_data:
+            profile_json = json.dumps(profile_data)
+            if (
+                oauth_account.profile_data != profile_json
+                or oauth_account.provider_email != email
+            ):
+                oauth_account.profile_data = profile_json
                 oauth_account.provider_email = email
                 db.session.commit()
-            return user, False, None
-        # Orphaned OAuth account - clean up
-        db.session.delete(oauth_account)
-        db.session.commit()
+        return user, False, None
 
     # 2. Auto-link by verified email
     if email:
         existing_user = User.query.filter(
-            db.func.lower(User.email) == email.lower()
+            User.email_normalized == normalize_email(email)
         ).first()
         if existing_user:
             # Only auto-link if email is verified (prevent takeover)
@@ -5827,9 +6407,16 @@ def _resolve_oauth_user(provider, provider_user_id, email, profile_data=None):
 
     # Generate a unique username from email or provider info
     base_username = email.split("@")[0] if email else f"{provider}_user"
+    taken = set(
+        db.session.execute(
+            db.select(User.username).where(
+                User.username.startswith(base_username, autoescape=True)
+            )
+        ).scalars()
+    )
     username = base_username
     counter = 1
-    while User.query.filter_by(username=username).first():
+    while username in taken:
         username = f"{base_username}{counter}"
         counter += 1
 
@@ -5844,9 +6431,10 @@ def _resolve_oauth_user(provider, provider_user_id, email, profile_data=None):
         ),  # OIDC emails are pre-verified
     )
     db.session.add(new_user)
-    db.session.flush()  # Get user.id
+    db.session.flush()  # Get user.id for the default database name
 
-    # Create default database for new user
+    # Create default database for new user; it, its access row and the OAuth
+    # link need no generated IDs of their own, so they go out in the commit
     db_name = f"db_{new_user.id}"
     new_db = Database(
         name=db_name,
@@ -5855,7 +6443,6 @@ def _resolve_oauth_user(provider, provider_user_id, email, profile_data=None):
         owner_id=new_user.id,
     )
     db.session.add(new_db)
-    db.session.flush()
     new_user.accessible_databases.append(new_db)
 
     # Link OAuth account
@@ -5935,8 +6522,6 @@ def oauth_authorize(provider):
     # Generate PKCE code verifier and challenge
     code_verifier = secrets.token_urlsafe(64)
     code_challenge = hashlib.sha256(code_verifier.encode()).digest()
-    import base64
-
     code_challenge_b64 = base64.urlsafe_b64encode(code_challenge).rstrip(b"=").decode()
 
     # Generate nonce for ID token validation (HIGH-2)
@@ -5959,8 +6544,6 @@ def oauth_authorize(provider):
             {"success": False, "error": "Provider missing authorization endpoint"}
         ), 502
 
-    from urllib.parse import urlencode
-
     params = {
         "response_type": "code",
         "client_id": cfg["client_id"],
@@ -6047,8 +6630,6 @@ def oauth_callback(provider):
             {"success": False, "error": "Provider missing token endpoint"}
         ), 502
 
-    import requests as http_requests
-
     token_data = {
         "grant_type": "authorization_code",
         "code": code,
@@ -6088,7 +6669,7 @@ def oauth_callback(provider):
             ), 502
 
     try:
-        token_resp = http_requests.post(
+        token_resp = _oauth_http.post(
             token_endpoint, timeout=10, **token_request_kwargs
         )
         token_resp.raise_for_status()
@@ -6107,19 +6688,22 @@ def oauth_callback(provider):
 
     # Decode and validate ID token with JWKS signature verification (CRITICAL-1)
     try:
-        from authlib.jose import JsonWebKey, jwt as authlib_jwt
-
-        # Fetch JWKS for signature verification
-        jwks_data = _get_jwks(provider)
-        if not jwks_data:
+        # Fetch the provider's parsed key set for signature verification
+        jwk_set = _get_jwks(provider)
+        if not jwk_set:
             return jsonify(
                 {"success": False, "error": "Failed to fetch provider signing keys"}
             ), 502
 
-        jwk_set = JsonWebKey.import_key_set(jwks_data)
-
         # Decode and verify signature using provider's public keys
-        claims = authlib_jwt.decode(id_token, jwk_set)
+        try:
+            claims = authlib_jwt.decode(id_token, jwk_set)
+        except (BadSignatureError, ValueError):
+            # Unknown kid or bad signature: the provider may have rotated keys
+            jwk_set = _refresh_jwks_after_failure(provider, jwk_set)
+            if not jwk_set:
+                raise
+            claims = authlib_jwt.decode(id_token, jwk_set)
         claims.validate()  # Validates exp, iat, nbf
 
         # Validate issuer
@@ -6155,12 +6739,6 @@ def oauth_callback(provider):
 
     # For generic OIDC: use configurable claim names
     if provider == "oidc":
-        from config import (
-            OAUTH_OIDC_EMAIL_CLAIM,
-            OAUTH_OIDC_USERNAME_CLAIM,
-            OAUTH_OIDC_NAME_CLAIM,
-        )
-
         # Map custom claim names to standard names used downstream
         if OAUTH_OIDC_EMAIL_CLAIM != "email" and claims.get(OAUTH_OIDC_EMAIL_CLAIM):
             claims.setdefault("email", claims[OAUTH_OIDC_EMAIL_CLAIM])
@@ -6177,9 +6755,7 @@ def oauth_callback(provider):
         access_token = token_json.get("access_token")
         if userinfo_endpoint and access_token:
             try:
-                import requests as http_requests
-
-                userinfo_resp = http_requests.get(
+                userinfo_resp = _oauth_http.get(
                     userinfo_endpoint,
                     headers={"Authorization": f"Bearer {access_token}"},
                     timeout=10,
@@ -6206,24 +6782,10 @@ def oauth_callback(provider):
     TRUSTED_EMAIL_PROVIDERS = ["microsoft", "apple"]
     skip_email_check = provider in TRUSTED_EMAIL_PROVIDERS
     if not skip_email_check and provider == "oidc":
-        from config import OAUTH_OIDC_SKIP_EMAIL_VERIFICATION
-
         skip_email_check = OAUTH_OIDC_SKIP_EMAIL_VERIFICATION
 
     if not skip_email_check and claims.get("email") is not None:
-        email_verified_claim = claims.get("email_verified")
-        is_email_verified = False
-        if isinstance(email_verified_claim, bool):
-            is_email_verified = email_verified_claim
-        elif isinstance(email_verified_claim, int):
-            is_email_verified = email_verified_claim == 1
-        elif isinstance(email_verified_claim, str):
-            is_email_verified = email_verified_claim.strip().lower() in (
-                "true",
-                "1",
-                "yes",
-            )
-        if not is_email_verified:
+        if not _is_true_claim(claims.get("email_verified")):
             return jsonify(
                 {"success": False, "error": "Provider email is not verified"}
             ), 401
@@ -6237,7 +6799,7 @@ def oauth_callback(provider):
         fallback = claims.get("preferred_username", "")
         # Only use as email if it looks like a valid email address
         # (preferred_username can be a phone number for personal accounts)
-        if fallback and "@" in fallback and "." in fallback.split("@")[-1]:
+        if fallback and _looks_like_email(fallback):
             email = fallback
 
     # Normalize email
@@ -6309,7 +6871,7 @@ def oauth_callback(provider):
     if flow != "link" and user.twofa_config and user.twofa_config.is_enabled:
         # Create 2FA challenge session
         session_token = secrets.token_urlsafe(32)
-        session_hash = hashlib.sha256(session_token.encode()).hexdigest()
+        session_hash = _hash_token(session_token)
 
         challenge = TwoFAChallenge(
             user_id=user.id,
@@ -6336,16 +6898,23 @@ def oauth_callback(provider):
             }
         ), 403
 
+    # Read the response fields before the commits below expire the user
+    user_data = {
+        "id": user.id,
+        "username": user.username,
+        "role": user.role,
+        "is_new_user": is_new_user,
+        "currency": user.currency,
+    }
+    databases = _database_summaries(user.accessible_databases)
+
     # Issue JWT tokens
     if flow != "link" and _record_login_if_due(user):
         db.session.commit()
 
-    access_token = create_access_token(user.id, user.role)
-    refresh_token = create_refresh_token(user.id, data.get("device_info"))
-    databases = [
-        {"id": d.id, "name": d.name, "display_name": d.display_name}
-        for d in user.accessible_databases
-    ]
+    access_token, refresh_token = _issue_token_pair(
+        user_data["id"], user_data["role"], data.get("device_info")
+    )
 
     response = jsonify(
         {
@@ -6355,13 +6924,7 @@ def oauth_callback(provider):
                 "refresh_token": refresh_token,
                 "expires_in": int(JWT_ACCESS_TOKEN_EXPIRES.total_seconds()),
                 "token_type": "Bearer",  # nosec B105
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "role": user.role,
-                    "is_new_user": is_new_user,
-                    "currency": user.currency,
-                },
+                "user": user_data,
                 "databases": databases,
             },
         }
@@ -6373,7 +6936,14 @@ def oauth_callback(provider):
 @jwt_required
 def oauth_list_accounts():
     """List the current user's linked OAuth provider accounts."""
-    accounts = OAuthAccount.query.filter_by(user_id=g.jwt_user_id).all()
+    accounts = db.session.execute(
+        db.select(
+            OAuthAccount.id,
+            OAuthAccount.provider,
+            OAuthAccount.provider_email,
+            OAuthAccount.created_at,
+        ).where(OAuthAccount.user_id == g.jwt_user_id)
+    ).all()
     return jsonify(
         {
             "success": True,
@@ -6394,7 +6964,7 @@ def oauth_list_accounts():
 @jwt_required
 def oauth_unlink_provider(provider):
     """Unlink an OAuth provider from the current user's account."""
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -6409,10 +6979,15 @@ def oauth_unlink_provider(provider):
 
     # Prevent unlinking if user has no password (would lock them out)
     if not user.password_hash:
-        other_accounts = OAuthAccount.query.filter(
-            OAuthAccount.user_id == g.jwt_user_id, OAuthAccount.provider != provider
-        ).count()
-        if other_accounts == 0:
+        has_other_account = db.session.execute(
+            db.select(
+                db.exists().where(
+                    OAuthAccount.user_id == g.jwt_user_id,
+                    OAuthAccount.provider != provider,
+                )
+            )
+        ).scalar()
+        if not has_other_account:
             return jsonify(
                 {
                     "success": False,
@@ -6443,6 +7018,184 @@ def _naive_utcnow():
     return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
 
 
+# Werkzeug KDF hashes written before 2FA codes were HMAC'd; still accepted
+_LEGACY_2FA_CODE_HASH_PREFIXES = ("pbkdf2:", "scrypt:")
+# Hex length of an HMAC-SHA256 code hash
+_RECOVERY_CODE_HASH_WIDTH = 64
+
+
+def _generate_otp_code():
+    """Return a 6-digit email OTP drawn uniformly from the OS CSPRNG (CRITICAL-2)."""
+    return str(secrets.randbelow(900000) + 100000)
+
+
+def _send_2fa_code_email(user, code):
+    """Email a 2FA code and wait for the provider's answer.
+
+    Sent on the request thread so a failed send is reported to the user
+    rather than answered with "code sent" for a code that never arrives.
+    """
+    from services.email import send_2fa_code_email
+
+    return send_2fa_code_email(user.email, code, user.username)
+
+
+def _hash_2fa_code(code):
+    """HMAC-SHA256 a server-issued 2FA code for storage.
+
+    OTPs and recovery codes are random, short-lived or single-use, and
+    attempt-limited, so a keyed hash protects them at rest without paying for
+    the slow password KDF on every send and verify.
+    """
+    return hmac.new(_twofa_code_pepper, str(code).encode(), hashlib.sha256).hexdigest()
+
+
+def _check_2fa_code(stored_hash, code):
+    """Constant-time check of ``code`` against a stored 2FA code hash."""
+    if stored_hash.startswith(_LEGACY_2FA_CODE_HASH_PREFIXES):
+        return check_password_hash(stored_hash, str(code))
+    return hmac.compare_digest(stored_hash, _hash_2fa_code(code))
+
+
+def _load_recovery_code_hashes(stored):
+    """Split a stored recovery_codes_hash value into its hashes.
+
+    HMAC digests are stored back to back as fixed-width hex; rows that still
+    hold Werkzeug hashes keep the older JSON array.
+    """
+    if not stored:
+        return []
+    if stored.startswith("["):
+        return json.loads(stored)
+    width = _RECOVERY_CODE_HASH_WIDTH
+    return [stored[i : i + width] for i in range(0, len(stored), width)]
+
+
+def _dump_recovery_code_hashes(code_hashes):
+    """Serialize recovery code hashes for storage; None once all are used."""
+    if not code_hashes:
+        return None
+    if any(h.startswith(_LEGACY_2FA_CODE_HASH_PREFIXES) for h in code_hashes):
+        return json.dumps(code_hashes)
+    return "".join(code_hashes)
+
+
+def _match_recovery_code(code_hashes, code):
+    """Return the index of the stored hash matching ``code``, or None.
+
+    The submitted code is HMAC'd once and every slot is compared, so the
+    response time does not depend on which slot matched.
+    """
+    target = _hash_2fa_code(code)
+    matched_idx = None
+    for idx, stored_hash in enumerate(code_hashes):
+        if stored_hash.startswith(_LEGACY_2FA_CODE_HASH_PREFIXES):
+            is_match = check_password_hash(stored_hash, code)
+        else:
+            is_match = hmac.compare_digest(stored_hash, target)
+        if is_match and matched_idx is None:
+            matched_idx = idx
+    return matched_idx
+
+
+def _record_failed_2fa_attempt(challenge):
+    """Count a failed attempt against ``challenge`` and persist it.
+
+    Incremented in SQL so concurrent guesses can't overwrite each other's
+    count, and committed right away because the request is about to fail.
+    """
+    db.session.execute(
+        db.update(TwoFAChallenge)
+        .where(TwoFAChallenge.id == challenge.id)
+        .values(attempts=TwoFAChallenge.attempts + 1)
+    )
+    db.session.commit()
+
+
+def _latest_disable_challenge(user_id):
+    """Return the user's newest disable confirmation if it is still usable.
+
+    Fetches only the columns the confirmation check reads, as a plain row,
+    rather than building a TwoFAChallenge. Returns None when there is no
+    such challenge or it is expired, used, or out of attempts.
+    """
+    challenge = db.session.execute(
+        db.select(
+            TwoFAChallenge.id,
+            TwoFAChallenge.otp_code_hash,
+            TwoFAChallenge.expires_at,
+            TwoFAChallenge.attempts,
+            TwoFAChallenge.max_attempts,
+            TwoFAChallenge.used,
+        )
+        .where(
+            TwoFAChallenge.user_id == user_id,
+            TwoFAChallenge.challenge_type == "disable_2fa_confirm",
+        )
+        .order_by(TwoFAChallenge.created_at.desc())
+        .limit(1)
+    ).first()
+    if (
+        challenge is None
+        or challenge.used
+        or challenge.attempts >= challenge.max_attempts
+        or _naive_utcnow() > challenge.expires_at
+    ):
+        return None
+    return challenge
+
+
+def _load_user_2fa(user_id, with_credentials=True):
+    """Load a user with their 2FA config (and passkeys) in one round trip.
+
+    Returns (user, config, credentials); config is None when 2FA was never
+    set up and credentials is empty when ``with_credentials`` is False.
+    """
+
+    options = [joinedload(User.twofa_config)]
+    if with_credentials:
+        options.append(joinedload(User.webauthn_credentials))
+    user = (
+        db.session.execute(
+            db.select(User).options(*options).where(User.id == user_id)
+        )
+        .unique()
+        .scalar_one_or_none()
+    )
+    if user is None:
+        return None, None, []
+    credentials = user.webauthn_credentials if with_credentials else []
+    return user, user.twofa_config, credentials
+
+
+_WEBAUTHN_TRANSPORT_VALUES = frozenset(t.value for t in AuthenticatorTransport)
+
+
+def _passkey_descriptors(user_id):
+    """Describe a user's registered passkeys for WebAuthn options.
+
+    Reads only the pre-decoded credential ID and transports columns; unknown
+    transport hints are dropped.
+    """
+    rows = db.session.execute(
+        db.select(
+            WebAuthnCredential.credential_id_raw,
+            WebAuthnCredential.transports_list,
+        ).where(WebAuthnCredential.user_id == user_id)
+    )
+    return [
+        PublicKeyCredentialDescriptor(
+            id=credential_id,
+            transports=[
+                AuthenticatorTransport(transport)
+                for transport in transports or []
+                if transport in _WEBAUTHN_TRANSPORT_VALUES
+            ],
+        )
+        for credential_id, transports in rows
+    ]
+
+
 def _verify_2fa_session(token):
     """Verify a 2FA session token. Returns (challenge, error_response).
 
@@ -6455,7 +7208,7 @@ def _verify_2fa_session(token):
             400,
         )
 
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    token_hash = _hash_token(token)
     challenge = TwoFAChallenge.query.filter_by(token_hash=token_hash).first()
 
     if not challenge:
@@ -6497,12 +7250,22 @@ def _verify_2fa_session(token):
 @jwt_required
 def twofa_status():
     """Get the current user's 2FA configuration status."""
-    user = db.session.get(User, g.jwt_user_id)
+
+    user = db.session.get(
+        User, g.jwt_user_id, options=[joinedload(User.twofa_config)]
+    )
     config = user.twofa_config
 
     passkeys = []
     if config and config.passkey_enabled:
-        creds = WebAuthnCredential.query.filter_by(user_id=g.jwt_user_id).all()
+        creds = db.session.execute(
+            db.select(
+                WebAuthnCredential.id,
+                WebAuthnCredential.device_name,
+                WebAuthnCredential.created_at,
+                WebAuthnCredential.last_used_at,
+            ).where(WebAuthnCredential.user_id == g.jwt_user_id)
+        ).all()
         passkeys = [
             {
                 "id": c.id,
@@ -6534,7 +7297,7 @@ def twofa_status():
 @limiter.limit("10 per minute")
 def twofa_setup_email():
     """Enable email OTP 2FA - sends a test code to verify email works."""
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
     if not user.email:
         return jsonify(
             {
@@ -6543,13 +7306,12 @@ def twofa_setup_email():
             }
         ), 400
 
-    # Generate a 6-digit code using cryptographic randomness (CRITICAL-2)
-    code = str(secrets.randbelow(900000) + 100000)
-    code_hash = generate_password_hash(code)
+    code = _generate_otp_code()
+    code_hash = _hash_2fa_code(code)
 
     # Store as a challenge
     session_token = secrets.token_urlsafe(32)
-    session_hash = hashlib.sha256(session_token.encode()).hexdigest()
+    session_hash = _hash_token(session_token)
 
     challenge = TwoFAChallenge(
         user_id=user.id,
@@ -6562,10 +7324,7 @@ def twofa_setup_email():
     db.session.commit()
 
     # Send the code via email
-    from services.email import send_2fa_code_email
-
-    sent = send_2fa_code_email(user.email, code, user.username)
-    if not sent:
+    if not _send_2fa_code_email(user, code):
         return jsonify(
             {
                 "success": False,
@@ -6587,6 +7346,7 @@ def twofa_setup_email():
 @api_v2_bp.route("/auth/2fa/setup/email/confirm", methods=["POST"])
 @jwt_required
 @limiter.limit("5 per minute")
+@no_expire_on_commit
 def twofa_setup_email_confirm():
     """Confirm email OTP setup with the test code."""
     data = request.get_json(force=True, silent=True) or {}
@@ -6607,11 +7367,8 @@ def twofa_setup_email_confirm():
         return jsonify({"success": False, "error": "Invalid challenge type"}), 400
 
     # Verify code
-    from werkzeug.security import check_password_hash as check_hash
-
-    if not check_hash(challenge.otp_code_hash, code):
-        challenge.attempts += 1
-        db.session.commit()
+    if not _check_2fa_code(challenge.otp_code_hash, code):
+        _record_failed_2fa_attempt(challenge)
         return jsonify({"success": False, "error": "Invalid verification code"}), 400
 
     # Mark challenge as used
@@ -6644,8 +7401,8 @@ def twofa_setup_email_confirm():
 def _generate_recovery_codes(twofa_config, count=10):
     """Generate and store recovery codes. Returns plaintext codes (show once)."""
     codes = [secrets.token_hex(4).upper() for _ in range(count)]  # 8-char hex codes
-    hashes = [generate_password_hash(c) for c in codes]
-    twofa_config.recovery_codes_hash = json.dumps(hashes)
+    hashes = [_hash_2fa_code(c) for c in codes]
+    twofa_config.recovery_codes_hash = _dump_recovery_code_hashes(hashes)
     db.session.commit()
     return codes
 
@@ -6669,27 +7426,10 @@ def twofa_passkey_registration_options():
     if not ENABLE_PASSKEYS:
         return jsonify({"success": False, "error": "Passkeys are not enabled"}), 400
 
-    from webauthn import generate_registration_options, options_to_json
-    from webauthn.helpers.structs import (
-        AuthenticatorSelectionCriteria,
-        ResidentKeyRequirement,
-        UserVerificationRequirement,
-        PublicKeyCredentialDescriptor,
-    )
-    import base64
-
-    user = db.session.get(User, g.jwt_user_id)
-
-    # Get existing credentials to exclude
-    existing_creds = WebAuthnCredential.query.filter_by(user_id=g.jwt_user_id).all()
-    exclude_creds = []
-    for c in existing_creds:
-        exclude_creds.append(
-            PublicKeyCredentialDescriptor(
-                id=base64.urlsafe_b64decode(c.credential_id + "=="),
-                transports=json.loads(c.transports) if c.transports else [],
-            )
-        )
+    user = _current_user()
+
+    # Exclude credentials the user has already registered
+    exclude_creds = _passkey_descriptors(user.id)
 
     options = generate_registration_options(
         rp_id=WEBAUTHN_RP_ID,
@@ -6705,11 +7445,11 @@ def twofa_passkey_registration_options():
     )
 
     # Store challenge in session for verification
-    options_json = json.loads(options_to_json(options))
+    options_json = options_to_json_dict(options)
 
     # Store the challenge
     session_token = secrets.token_urlsafe(32)
-    session_hash = hashlib.sha256(session_token.encode()).hexdigest()
+    session_hash = _hash_token(session_token)
     challenge_b64 = options_json["challenge"]
 
     twofa_challenge = TwoFAChallenge(
@@ -6735,18 +7475,12 @@ def twofa_passkey_registration_options():
 
 @api_v2_bp.route("/auth/2fa/setup/passkey/register", methods=["POST"])
 @jwt_required
+@no_expire_on_commit
 def twofa_passkey_register():
     """Complete passkey registration with the attestation response."""
     if not ENABLE_PASSKEYS:
         return jsonify({"success": False, "error": "Passkeys are not enabled"}), 400
 
-    from webauthn import verify_registration_response
-    from webauthn.helpers.structs import (
-        AuthenticatorAttestationResponse,
-        RegistrationCredential,
-    )
-    import base64
-
     data = request.get_json(force=True, silent=True) or {}
     registration_token = data.get("registration_token")
     credential = data.get("credential")
@@ -6767,7 +7501,7 @@ def twofa_passkey_register():
     ):
         return jsonify({"success": False, "error": "Invalid registration session"}), 403
 
-    expected_challenge = base64.urlsafe_b64decode(challenge.otp_code_hash + "==")
+    expected_challenge = _b64url_decode(challenge.otp_code_hash)
 
     try:
         if not isinstance(credential, dict):
@@ -6789,24 +7523,18 @@ def twofa_passkey_register():
             },
         }
 
-        payload_json = json.dumps(credential_payload)
-        if hasattr(RegistrationCredential, "parse_raw"):
-            registration = RegistrationCredential.parse_raw(payload_json)
-        elif hasattr(RegistrationCredential, "model_validate_json"):
-            registration = RegistrationCredential.model_validate_json(payload_json)
+        # Pydantic-based webauthn releases validate the dict directly
+        if hasattr(RegistrationCredential, "parse_obj"):
+            registration = RegistrationCredential.parse_obj(credential_payload)
+        elif hasattr(RegistrationCredential, "model_validate"):
+            registration = RegistrationCredential.model_validate(credential_payload)
         else:
             # Older webauthn versions use snake_case constructor args.
-            def _decode_b64url(value):
-                if not value:
-                    return b""
-                padded = value + "=" * ((4 - (len(value) % 4)) % 4)
-                return base64.urlsafe_b64decode(padded)
-
             attestation_response = AuthenticatorAttestationResponse(
-                client_data_json=_decode_b64url(
+                client_data_json=_b64url_decode(
                     credential_payload.get("response", {}).get("clientDataJSON")
                 ),
-                attestation_object=_decode_b64url(
+                attestation_object=_b64url_decode(
                     credential_payload.get("response", {}).get("attestationObject")
                 ),
                 transports=(credential.get("response", {}).get("transports") or [])
@@ -6816,7 +7544,7 @@ def twofa_passkey_register():
 
             registration = RegistrationCredential(
                 id=credential_payload.get("id"),
-                raw_id=_decode_b64url(credential_payload.get("rawId")),
+                raw_id=_b64url_decode(credential_payload.get("rawId")),
                 type=credential_payload.get("type"),
                 response=attestation_response,
             )
@@ -6856,15 +7584,17 @@ def twofa_passkey_register():
         .decode()
     )
 
+    transports = credential.get("response", {}).get("transports", [])
+
     webauthn_cred = WebAuthnCredential(
         user_id=g.jwt_user_id,
         credential_id=cred_id_b64,
+        credential_id_raw=verification.credential_id,
         public_key=pub_key_b64,
         sign_count=verification.sign_count,
         device_name=device_name,
-        transports=json.dumps(credential.get("response", {}).get("transports", []))
-        if isinstance(credential, dict)
-        else None,
+        transports=json.dumps(transports),
+        transports_list=transports,
     )
     db.session.add(webauthn_cred)
 
@@ -6934,7 +7664,7 @@ def twofa_delete_passkey(passkey_id):
     password = data.get("password")
     confirmation_code = data.get("confirmation_code")
 
-    user = db.session.get(User, g.jwt_user_id)
+    user, _, creds = _load_user_2fa(g.jwt_user_id)
 
     # Require confirmation before deleting a passkey
     if user.password_hash:
@@ -6955,45 +7685,42 @@ def twofa_delete_passkey(passkey_id):
                 }
             ), 400
         # Verify against most recent disable challenge (reuses disable_2fa_confirm type)
-        confirm_challenge = (
-            TwoFAChallenge.query.filter_by(
-                user_id=g.jwt_user_id,
-                challenge_type="disable_2fa_confirm",
-            )
-            .order_by(TwoFAChallenge.created_at.desc())
-            .first()
-        )
+        confirm_challenge = _latest_disable_challenge(g.jwt_user_id)
 
-        if not confirm_challenge or not confirm_challenge.is_valid:
+        if not confirm_challenge:
             return jsonify(
                 {"success": False, "error": "Invalid or expired confirmation code"}
             ), 401
-
-        from werkzeug.security import check_password_hash as check_hash
-
-        if not check_hash(confirm_challenge.otp_code_hash, confirmation_code):
-            confirm_challenge.attempts += 1
-            db.session.commit()
+        if not _check_2fa_code(confirm_challenge.otp_code_hash, confirmation_code):
+            _record_failed_2fa_attempt(confirm_challenge)
             return jsonify(
                 {"success": False, "error": "Invalid confirmation code"}
             ), 401
 
-        confirm_challenge.used = True
+        db.session.execute(
+            db.update(TwoFAChallenge)
+            .where(TwoFAChallenge.id == confirm_challenge.id)
+            .values(used=True)
+        )
 
-    cred = WebAuthnCredential.query.filter_by(
-        id=passkey_id, user_id=g.jwt_user_id
-    ).first()
+    cred = next((c for c in creds if c.id == passkey_id), None)
     if not cred:
         return jsonify({"success": False, "error": "Passkey not found"}), 404
 
     db.session.delete(cred)
+    db.session.flush()
 
-    # If no more passkeys, disable passkey 2FA
-    remaining = WebAuthnCredential.query.filter_by(user_id=g.jwt_user_id).count()
-    if remaining == 0:
-        config = TwoFAConfig.query.filter_by(user_id=g.jwt_user_id).first()
-        if config:
-            config.passkey_enabled = False
+    # Passkey 2FA stays on only while a passkey remains; decided in SQL so a
+    # passkey registered concurrently is still counted
+    db.session.execute(
+        db.update(TwoFAConfig)
+        .where(TwoFAConfig.user_id == g.jwt_user_id)
+        .values(
+            passkey_enabled=db.exists().where(
+                WebAuthnCredential.user_id == g.jwt_user_id
+            )
+        )
+    )
 
     db.session.commit()
     return jsonify({"success": True, "data": {"message": "Passkey removed"}})
@@ -7008,7 +7735,7 @@ def twofa_disable():
     password = data.get("password")
     confirmation_code = data.get("confirmation_code")
 
-    user = db.session.get(User, g.jwt_user_id)
+    user, config, _ = _load_user_2fa(g.jwt_user_id, with_credentials=False)
 
     # Require password for local auth users
     if user.password_hash:
@@ -7030,35 +7757,22 @@ def twofa_disable():
             ), 400
 
         # Verify the confirmation code against the most recent disable challenge
-        disable_challenge = (
-            TwoFAChallenge.query.filter_by(
-                user_id=g.jwt_user_id,
-                challenge_type="disable_2fa_confirm",
-            )
-            .order_by(TwoFAChallenge.created_at.desc())
-            .first()
-        )
+        disable_challenge = _latest_disable_challenge(g.jwt_user_id)
 
-        if not disable_challenge or not disable_challenge.is_valid:
+        if not disable_challenge:
             return jsonify(
                 {
                     "success": False,
                     "error": "Invalid or expired confirmation code. Request a new one.",
                 }
             ), 401
-
-        from werkzeug.security import check_password_hash as check_hash
-
-        if not check_hash(disable_challenge.otp_code_hash, confirmation_code):
-            disable_challenge.attempts += 1
-            db.session.commit()
+        if not _check_2fa_code(disable_challenge.otp_code_hash, confirmation_code):
+            _record_failed_2fa_attempt(disable_challenge)
             return jsonify(
                 {"success": False, "error": "Invalid confirmation code"}
             ), 401
+        # No need to mark it used: every challenge is deleted below
 
-        disable_challenge.used = True
-
-    config = TwoFAConfig.query.filter_by(user_id=g.jwt_user_id).first()
     if config:
         config.email_otp_enabled = False
         config.passkey_enabled = False
@@ -7078,7 +7792,7 @@ def twofa_disable():
 @limiter.limit("5 per minute")
 def twofa_disable_send_code():
     """Send email confirmation code for OIDC-only users to disable 2FA."""
-    user = db.session.get(User, g.jwt_user_id)
+    user = _current_user()
 
     if user.password_hash:
         return jsonify(
@@ -7089,11 +7803,11 @@ def twofa_disable_send_code():
         return jsonify({"success": False, "error": "No email address on account"}), 400
 
     # Generate and send code
-    code = str(secrets.randbelow(900000) + 100000)
-    code_hash = generate_password_hash(code)
+    code = _generate_otp_code()
+    code_hash = _hash_2fa_code(code)
 
     session_token = secrets.token_urlsafe(32)
-    session_hash = hashlib.sha256(session_token.encode()).hexdigest()
+    session_hash = _hash_token(session_token)
 
     challenge = TwoFAChallenge(
         user_id=user.id,
@@ -7105,10 +7819,7 @@ def twofa_disable_send_code():
     db.session.add(challenge)
     db.session.commit()
 
-    from services.email import send_2fa_code_email
-
-    sent = send_2fa_code_email(user.email, code, user.username)
-    if not sent:
+    if not _send_2fa_code_email(user, code):
         return jsonify(
             {"success": False, "error": "Failed to send confirmation code"}
         ), 502
@@ -7140,16 +7851,12 @@ def twofa_challenge():
                 {"success": False, "error": "No email address configured"}
             ), 400
 
-        # Generate 6-digit code using cryptographic randomness (CRITICAL-2)
-        code = str(secrets.randbelow(900000) + 100000)
-        challenge.otp_code_hash = generate_password_hash(code)
+        code = _generate_otp_code()
+        challenge.otp_code_hash = _hash_2fa_code(code)
         challenge.challenge_type = "email_otp"
         db.session.commit()
 
-        from services.email import send_2fa_code_email
-
-        sent = send_2fa_code_email(user.email, code, user.username)
-        if not sent:
+        if not _send_2fa_code_email(user, code):
             return jsonify(
                 {"success": False, "error": "Failed to send verification code"}
             ), 502
@@ -7174,14 +7881,6 @@ def twofa_passkey_auth_options():
     if not ENABLE_PASSKEYS:
         return jsonify({"success": False, "error": "Passkeys are not enabled"}), 400
 
-    from webauthn import generate_authentication_options, options_to_json
-    from webauthn.helpers.structs import (
-        AuthenticatorTransport,
-        PublicKeyCredentialDescriptor,
-        UserVerificationRequirement,
-    )
-    import base64
-
     data = request.get_json(force=True, silent=True) or {}
     session_token = data.get("session_token")
 
@@ -7189,35 +7888,17 @@ def twofa_passkey_auth_options():
     if err:
         return err
 
-    # Get user's passkeys
-    creds = WebAuthnCredential.query.filter_by(user_id=challenge.user_id).all()
-    if not creds:
+    allow_creds = _passkey_descriptors(challenge.user_id)
+    if not allow_creds:
         return jsonify({"success": False, "error": "No passkeys registered"}), 400
 
-    allow_creds = []
-    for c in creds:
-        raw_transports = json.loads(c.transports) if c.transports else []
-        valid_transport_values = {t.value for t in AuthenticatorTransport}
-        normalized_transports = [
-            AuthenticatorTransport(transport)
-            for transport in raw_transports
-            if transport in valid_transport_values
-        ]
-
-        allow_creds.append(
-            PublicKeyCredentialDescriptor(
-                id=base64.urlsafe_b64decode(c.credential_id + "=="),
-                transports=normalized_transports,
-            )
-        )
-
     options = generate_authentication_options(
         rp_id=WEBAUTHN_RP_ID,
         allow_credentials=allow_creds,
         user_verification=UserVerificationRequirement.PREFERRED,
     )
 
-    options_json = json.loads(options_to_json(options))
+    options_json = options_to_json_dict(options)
 
     # Store the challenge for verification
     challenge.otp_code_hash = options_json["challenge"]
@@ -7229,6 +7910,7 @@ def twofa_passkey_auth_options():
 
 @api_v2_bp.route("/auth/2fa/verify", methods=["POST"])
 @limiter.limit("5 per minute")
+@no_expire_on_commit
 def twofa_verify():
     """Verify a 2FA challenge. On success, issues JWT tokens.
 
@@ -7242,7 +7924,16 @@ def twofa_verify():
     if err:
         return err
 
-    user = db.session.get(User, challenge.user_id)
+    # The success path lists the user's databases; load them with the user
+    user = db.session.get(
+        User,
+        challenge.user_id,
+        options=[
+            selectinload(User.accessible_databases).load_only(
+                Database.id, Database.name, Database.display_name
+            )
+        ],
+    )
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -7251,19 +7942,14 @@ def twofa_verify():
     if method == "email_otp":
         code = data.get("code")
         if not code or not challenge.otp_code_hash:
-            challenge.attempts += 1
-            db.session.commit()
+            _record_failed_2fa_attempt(challenge)
             return jsonify(
                 {"success": False, "error": "Missing verification code"}
             ), 400
-
-        from werkzeug.security import check_password_hash as check_hash
-
-        if check_hash(challenge.otp_code_hash, code):
+        if _check_2fa_code(challenge.otp_code_hash, code):
             verified = True
         else:
-            challenge.attempts += 1
-            db.session.commit()
+            _record_failed_2fa_attempt(challenge)
             return jsonify(
                 {"success": False, "error": "Invalid verification code"}
             ), 400
@@ -7276,14 +7962,7 @@ def twofa_verify():
         if not ENABLE_PASSKEYS:
             return jsonify({"success": False, "error": "Passkeys are not enabled"}), 400
 
-        from webauthn import verify_authentication_response
-        from webauthn.helpers.structs import (
-            AuthenticationCredential,
-            AuthenticatorAssertionResponse,
-        )
-        import base64
-
-        expected_challenge = base64.urlsafe_b64decode(challenge.otp_code_hash + "==")
+        expected_challenge = _b64url_decode(challenge.otp_code_hash)
 
         # Find the matching credential
         cred_id_from_response = credential_data.get("id", "")
@@ -7292,43 +7971,35 @@ def twofa_verify():
         ).first()
 
         if not stored_cred:
-            challenge.attempts += 1
-            db.session.commit()
+            _record_failed_2fa_attempt(challenge)
             return jsonify({"success": False, "error": "Unrecognized credential"}), 400
 
         try:
             if not isinstance(credential_data, dict):
                 raise ValueError("invalid credential payload")
 
-            payload_json = json.dumps(credential_data)
-            if hasattr(AuthenticationCredential, "parse_raw"):
-                auth_credential = AuthenticationCredential.parse_raw(payload_json)
-            elif hasattr(AuthenticationCredential, "model_validate_json"):
-                auth_credential = AuthenticationCredential.model_validate_json(
-                    payload_json
+            # Pydantic-based webauthn releases validate the dict directly
+            if hasattr(AuthenticationCredential, "parse_obj"):
+                auth_credential = AuthenticationCredential.parse_obj(credential_data)
+            elif hasattr(AuthenticationCredential, "model_validate"):
+                auth_credential = AuthenticationCredential.model_validate(
+                    credential_data
                 )
             else:
-
-                def _decode_b64url(value):
-                    if not value:
-                        return b""
-                    padded = value + "=" * ((4 - (len(value) % 4)) % 4)
-                    return base64.urlsafe_b64decode(padded)
-
                 response_data = credential_data.get("response", {})
                 if not isinstance(response_data, dict):
                     raise ValueError("invalid credential response payload")
 
                 assertion_response = AuthenticatorAssertionResponse(
-                    client_data_json=_decode_b64url(
+                    client_data_json=_b64url_decode(
                         response_data.get("clientDataJSON")
                     ),
-                    authenticator_data=_decode_b64url(
+                    authenticator_data=_b64url_decode(
                         response_data.get("authenticatorData")
                     ),
-                    signature=_decode_b64url(response_data.get("signature")),
+                    signature=_b64url_decode(response_data.get("signature")),
                     user_handle=(
-                        _decode_b64url(response_data.get("userHandle"))
+                        _b64url_decode(response_data.get("userHandle"))
                         if response_data.get("userHandle")
                         else None
                     ),
@@ -7336,7 +8007,7 @@ def twofa_verify():
 
                 auth_credential = AuthenticationCredential(
                     id=credential_data.get("id", ""),
-                    raw_id=_decode_b64url(credential_data.get("rawId")),
+                    raw_id=_b64url_decode(credential_data.get("rawId")),
                     type=credential_data.get("type", "public-key"),
                     response=assertion_response,
                 )
@@ -7346,9 +8017,7 @@ def twofa_verify():
                 expected_challenge=expected_challenge,
                 expected_rp_id=WEBAUTHN_RP_ID,
                 expected_origin=WEBAUTHN_EXPECTED_ORIGINS,
-                credential_public_key=base64.urlsafe_b64decode(
-                    stored_cred.public_key + "=="
-                ),
+                credential_public_key=_b64url_decode(stored_cred.public_key),
                 credential_current_sign_count=stored_cred.sign_count,
             )
             stored_cred.sign_count = verification.new_sign_count
@@ -7356,8 +8025,7 @@ def twofa_verify():
             verified = True
         except Exception as e:
             logger.error(f"Passkey verification failed: {e}")
-            challenge.attempts += 1
-            db.session.commit()
+            _record_failed_2fa_attempt(challenge)
             return jsonify(
                 {"success": False, "error": "Passkey verification failed"}
             ), 400
@@ -7378,24 +8046,16 @@ def twofa_verify():
             return jsonify(
                 {"success": False, "error": "No recovery codes available"}
             ), 400
-
-        from werkzeug.security import check_password_hash as check_hash
-
-        code_hashes = json.loads(config.recovery_codes_hash)
-        matched_idx = None
-        for idx, h in enumerate(code_hashes):
-            if check_hash(h, recovery_code.upper()):
-                matched_idx = idx
-                break
+        code_hashes = _load_recovery_code_hashes(config.recovery_codes_hash)
+        matched_idx = _match_recovery_code(code_hashes, recovery_code.upper())
 
         if matched_idx is not None:
             # Consume the recovery code (single-use) - row is locked, safe from races
             code_hashes.pop(matched_idx)
-            config.recovery_codes_hash = json.dumps(code_hashes)
+            config.recovery_codes_hash = _dump_recovery_code_hashes(code_hashes)
             verified = True
         else:
-            challenge.attempts += 1
-            db.session.commit()
+            _record_failed_2fa_attempt(challenge)
             return jsonify({"success": False, "error": "Invalid recovery code"}), 400
     else:
         return jsonify(
@@ -7405,18 +8065,16 @@ def twofa_verify():
     if not verified:
         return jsonify({"success": False, "error": "2FA verification failed"}), 401
 
-    # Mark challenge as used
+    # Mark challenge as used; committed together with the refresh token so
+    # the whole verification lands in one transaction
     challenge.used = True
     _record_login_if_due(user)
-    db.session.commit()
 
     # Issue JWT tokens
-    access_token = create_access_token(user.id, user.role)
-    refresh_token = create_refresh_token(user.id, data.get("device_info"))
-    databases = [
-        {"id": d.id, "name": d.name, "display_name": d.display_name}
-        for d in user.accessible_databases
-    ]
+    access_token, refresh_token = _issue_token_pair(
+        user.id, user.role, data.get("device_info")
+    )
+    databases = _database_summaries(user.accessible_databases)
 
     response = jsonify(
         {
@@ -7459,7 +8117,6 @@ def _can_manage_user(actor_user_id, target_user, *, allow_self=False):
 def jwt_get_users():
     """Get all users (admin only)."""
     user_id = g.jwt_user_id
-    current_user = db.session.get(User, user_id)
     if is_saas():
         users = User.query.filter(
             (User.created_by_id == user_id) | (User.id == user_id)
@@ -7524,7 +8181,7 @@ def jwt_create_user():
         return jsonify({"success": False, "error": "Email already in use"}), 400
 
     current_user_id = g.jwt_user_id
-    current_user = db.session.get(User, current_user_id)
+    current_user = _current_user()
 
     # Check users limit (only enforced in SaaS mode)
     allowed, info = check_tier_limit(current_user, "users")
@@ -7547,13 +8204,12 @@ def jwt_create_user():
     new_user.set_password(password)
 
     # Grant database access
-    for db_id in database_ids:
-        d = db.session.get(Database, db_id)
-        if d:
-            # In SaaS mode, only allow assigning access to databases you own
-            if is_saas() and d.owner_id != current_user_id:
-                continue
-            new_user.accessible_databases.append(d)
+    if database_ids:
+        grant_query = Database.query.filter(Database.id.in_(database_ids))
+        # In SaaS mode, only allow assigning access to databases you own
+        if is_saas():
+            grant_query = grant_query.filter(Database.owner_id == current_user_id)
+        new_user.accessible_databases.extend(grant_query.all())
 
     db.session.add(new_user)
     db.session.commit()
@@ -7634,7 +8290,7 @@ def jwt_delete_user(target_user_id):
         db.select(User).where(User.id == target_user_id).with_for_update()
     )
     current_user_id = g.jwt_user_id
-    current_user = db.session.get(User, current_user_id)
+    current_user = _current_user()
 
     if not _can_manage_user(current_user_id, user):
         return jsonify({"success": False, "error": "Access denied"}), 403
@@ -7721,7 +8377,16 @@ def jwt_delete_user(target_user_id):
 @jwt_admin_required
 def jwt_get_user_databases(target_user_id):
     """Get databases a user has access to (admin only)."""
-    user = db.get_or_404(User, target_user_id)
+
+    user = db.first_or_404(
+        db.select(User)
+        .options(
+            selectinload(User.accessible_databases).load_only(
+                Database.id, Database.name, Database.display_name
+            )
+        )
+        .where(User.id == target_user_id)
+    )
     current_user_id = g.jwt_user_id
     # In SaaS mode, only allow viewing databases of users you created (or yourself)
     if not _can_manage_user(current_user_id, user, allow_self=True):
@@ -7742,11 +8407,27 @@ def jwt_get_user_databases(target_user_id):
 def jwt_get_invitations():
     """Get pending invitations (admin only)."""
     current_user_id = g.jwt_user_id
-    invites = (
-        UserInvite.query.filter_by(invited_by_id=current_user_id, accepted_at=None)
-        .filter(UserInvite.expires_at > datetime.datetime.now(datetime.timezone.utc))
-        .all()
-    )
+    now = datetime.datetime.now(datetime.timezone.utc)
+    # Lambda statement: the compiled SQL is reused across requests
+    # Only the serialized columns are selected, so no UserInvite instances
+    # (or their token hashes) are built for a read-only listing.
+    invites = db.session.execute(
+        lambda_stmt(
+            lambda: db.select(
+                UserInvite.id,
+                UserInvite.email,
+                UserInvite.role,
+                UserInvite.database_ids_list,
+                UserInvite.created_at,
+                UserInvite.expires_at,
+            ).where(
+                UserInvite.invited_by_id == current_user_id,
+                UserInvite.accepted_at.is_(None),
+                UserInvite.expires_at > now,
+            )
+        )
+    ).all()
+    isoformat = datetime.datetime.isoformat
     return jsonify(
         {
             "success": True,
@@ -7755,11 +8436,9 @@ def jwt_get_invitations():
                     "id": inv.id,
                     "email": inv.email,
                     "role": inv.role,
-                    "database_ids": [int(x) for x in inv.database_ids.split(",") if x]
-                    if hasattr(inv, "database_ids") and inv.database_ids
-                    else [],
-                    "created_at": inv.created_at.isoformat(),
-                    "expires_at": inv.expires_at.isoformat(),
+                    "database_ids": inv.database_ids_list or [],
+                    "created_at": isoformat(inv.created_at),
+                    "expires_at": isoformat(inv.expires_at),
                 }
                 for inv in invites
             ],
@@ -7771,31 +8450,39 @@ def jwt_get_invitations():
 @jwt_admin_required
 def jwt_create_invitation():
     """Create a new invitation (admin only)."""
-    import re
-    import secrets
-
     data = request.get_json()
-    email = data.get("email", "").strip().lower()
+    email = normalize_email(data.get("email", "")) or ""
     role = data.get("role", "user")
     database_ids = data.get("database_ids", [])
 
     if not email:
         return jsonify({"success": False, "error": "Email is required"}), 400
-    # Validate email: length check prevents ReDoS, simple check for @ and domain
-    if len(email) > 254 or "@" not in email or "." not in email.split("@")[-1]:
+    if not _looks_like_email(email):
         return jsonify({"success": False, "error": "Invalid email format"}), 400
+    if not isinstance(database_ids, list) or not all(
+        _is_positive_integer_id(database_id) for database_id in database_ids
+    ):
+        return jsonify(
+            {"success": False, "error": "database_ids must be a list of database IDs"}
+        ), 400
 
-    existing_user = User.query.filter_by(email=email).first()
+    # Both checks only need a boolean, so ask for them in one EXISTS query
+    existing_user, pending_invite = db.session.execute(
+        db.select(
+            db.exists().where(User.email_normalized == email),
+            db.exists().where(
+                UserInvite.email == email,
+                UserInvite.accepted_at.is_(None),
+                UserInvite.expires_at
+                > datetime.datetime.now(datetime.timezone.utc),
+            ),
+        )
+    ).one()
     if existing_user:
         return jsonify(
             {"success": False, "error": "A user with this email already exists"}
         ), 400
 
-    pending_invite = (
-        UserInvite.query.filter_by(email=email, accepted_at=None)
-        .filter(UserInvite.expires_at > datetime.datetime.now(datetime.timezone.utc))
-        .first()
-    )
     if pending_invite:
         return jsonify(
             {
@@ -7805,7 +8492,7 @@ def jwt_create_invitation():
         ), 400
 
     current_user_id = g.jwt_user_id
-    current_user = db.session.get(User, current_user_id)
+    current_user = _current_user()
 
     # Check users limit (only enforced in SaaS mode)
     allowed, info = check_tier_limit(current_user, "users")
@@ -7819,16 +8506,23 @@ def jwt_create_invitation():
             }
         ), 403
 
-    if is_saas():
-        for db_id in database_ids:
-            d = db.session.get(Database, db_id)
-            if d and d.owner_id != current_user_id:
-                return jsonify(
-                    {
-                        "success": False,
-                        "error": "Cannot grant access to databases you do not own",
-                    }
-                ), 403
+    if is_saas() and database_ids:
+        # One IN query for the owners; ids that do not exist are ignored
+        foreign_database = db.session.execute(
+            db.select(
+                db.exists().where(
+                    Database.id.in_(database_ids),
+                    Database.owner_id.is_distinct_from(current_user_id),
+                )
+            )
+        ).scalar()
+        if foreign_database:
+            return jsonify(
+                {
+                    "success": False,
+                    "error": "Cannot grant access to databases you do not own",
+                }
+            ), 403
 
     invite = UserInvite(
         email=email,
@@ -7844,8 +8538,7 @@ def jwt_create_invitation():
     db.session.add(invite)
     db.session.commit()
 
-    invited_by_name = current_user.username
-    email_sent = send_invite_email(email, token, invited_by_name)
+    email_sent = send_invite_email(email, token, current_user.username)
 
     return jsonify(
         {
@@ -7932,14 +8625,10 @@ def jwt_accept_invitation():
     new_user.set_password(password)
     db.session.add(new_user)
 
-    if invite.database_ids:
-        for db_id_str in invite.database_ids.split(","):
-            try:
-                database = db.session.get(Database, int(db_id_str))
-            except ValueError:
-                continue
-            if database:
-                new_user.accessible_databases.append(database)
+    if invite.database_ids_list:
+        new_user.accessible_databases.extend(
+            Database.query.filter(Database.id.in_(invite.database_ids_list)).all()
+        )
 
     invite.accepted_at = datetime.datetime.now(datetime.timezone.utc)
     db.session.commit()
@@ -7981,7 +8670,7 @@ def jwt_resend_invitation(invite_id):
     if invite.is_accepted:
         return jsonify({"success": False, "error": "Invitation already accepted"}), 400
 
-    current_user = db.session.get(User, current_user_id)
+    current_user = _current_user()
     email_sent = send_invite_email(invite.email, invite.token, current_user.username)
 
     return jsonify(
@@ -8000,13 +8689,17 @@ def jwt_resend_invitation(invite_id):
 @jwt_admin_required
 def jwt_get_databases():
     """Get all databases with access info (admin only)."""
-    current_user_id = g.jwt_user_id
-    current_user = db.session.get(User, current_user_id)
-
+    # Fetch every database's members in one IN query instead of one per row;
+    # built as a lambda statement so the compiled SQL is reused across requests
+    stmt = lambda_stmt(
+        lambda: db.select(Database).options(
+            selectinload(Database.users).load_only(User.id, User.username, User.role)
+        )
+    )
     if is_saas():
-        databases = Database.query.filter_by(owner_id=current_user_id).all()
-    else:
-        databases = Database.query.all()
+        owner_id = g.jwt_user_id
+        stmt += lambda s: s.where(Database.owner_id == owner_id)
+    databases = db.session.scalars(stmt).all()
 
     result = []
     for d in databases:
@@ -8048,7 +8741,7 @@ def jwt_create_database():
         ), 400
 
     current_user_id = g.jwt_user_id
-    current_user = db.session.get(User, current_user_id)
+    current_user = _current_user()
 
     # Check bill_groups limit (only enforced in SaaS mode)
     allowed, info = check_tier_limit(current_user, "bill_groups")
@@ -8150,9 +8843,11 @@ def jwt_delete_database(database_id):
         ShareAuditLog.query.filter(ShareAuditLog.bill_id.in_(bill_ids)).delete(
             synchronize_session=False
         )
+    recipient_ids = _shared_bill_recipient_ids(bill_ids)
 
     db.session.delete(database)
     db.session.commit()
+    _invalidate_shared_bills_cache(*recipient_ids)
     return jsonify({"success": True, "data": {"message": "Database deleted"}})
 
 
@@ -8194,9 +8889,14 @@ def jwt_database_access(database_id):
             {"success": False, "error": "Cannot grant access to users outside your account"}
         ), 403
 
-    if target_user not in database.users:
-        database.users.append(target_user)
-        db.session.commit()
+    # Write the association row directly instead of loading database.users;
+    # the composite primary key makes repeat grants a no-op.
+    db.session.execute(
+        pg_insert(user_database_access)
+        .values(user_id=target_user.id, database_id=database.id)
+        .on_conflict_do_nothing()
+    )
+    db.session.commit()
     return jsonify({"success": True, "data": {"message": "Access granted"}})
 
 
@@ -8214,9 +8914,13 @@ def jwt_remove_database_access(database_id, target_user_id):
 
     target_user = db.get_or_404(User, target_user_id)
 
-    if target_user in database.users:
-        database.users.remove(target_user)
-        db.session.commit()
+    db.session.execute(
+        user_database_access.delete().where(
+            user_database_access.c.user_id == target_user.id,
+            user_database_access.c.database_id == database.id,
+        )
+    )
+    db.session.commit()
     return jsonify({"success": True, "data": {"message": "Access revoked"}})
 
 
@@ -8289,7 +8993,7 @@ def jwt_get_upcoming_alerts():
 
     bills = (
         Bill.query.filter(
-            Bill.database_id.in_(accessible_db_ids),
+            in_database_ids(Bill.database_id, accessible_db_ids),
             Bill.archived == False,
             Bill.due_date <= end_date.isoformat(),
         )
@@ -8401,6 +9105,8 @@ def send_test_notification():
     title = data.get("title", "Test Notification")
     body = data.get("body", "This is a test notification from BillManager")
 
+    # Delivered synchronously: this endpoint exists to report whether FCM
+    # accepted the sends, so it cannot use the background pool
     sent_count = send_push_to_user(
         g.jwt_user_id, title, body, {"action": "test"}, notification_type="test"
     )
@@ -8485,21 +9191,10 @@ def cleanup_expired_shares():
         ), 500
 
 
-@api_v2_bp.route("/openapi.yaml", methods=["GET"])
-def get_openapi_spec():
-    """Serve the OpenAPI specification."""
-    spec_path = os.path.join(os.path.dirname(__file__), "openapi.yaml")
-    if os.path.exists(spec_path):
-        with open(spec_path, "r") as f:
-            return f.read(), 200, {"Content-Type": "text/yaml"}
-    return jsonify({"success": False, "error": "OpenAPI spec not found"}), 404
+_OPENAPI_DIR = os.path.dirname(os.path.abspath(__file__))
 
-
-@api_v2_bp.route("/docs", methods=["GET"])
-def api_docs():
-    """Serve Swagger UI for API documentation."""
-    return (
-        """<!DOCTYPE html>
+# Static page; built once at import and returned as-is on every hit
+_SWAGGER_UI_HTML = b"""<!DOCTYPE html>
 <html>
 <head>
     <title>BillManager API - Documentation</title>
@@ -8517,10 +9212,30 @@ def api_docs():
         });
     </script>
 </body>
-</html>""",
-        200,
-        {"Content-Type": "text/html"},
-    )
+</html>"""
+
+
+@api_v2_bp.route("/openapi.yaml", methods=["GET"])
+def get_openapi_spec():
+    """Serve the OpenAPI specification.
+
+    send_from_directory adds ETag/Last-Modified for conditional requests and
+    lets the WSGI server hand the file to the kernel instead of reading it.
+    """
+    from werkzeug.exceptions import NotFound
+
+    try:
+        return send_from_directory(
+            _OPENAPI_DIR, "openapi.yaml", mimetype="text/yaml", max_age=3600
+        )
+    except NotFound:
+        return jsonify({"success": False, "error": "OpenAPI spec not found"}), 404
+
+
+@api_v2_bp.route("/docs", methods=["GET"])
+def api_docs():
+    """Serve Swagger UI for API documentation."""
+    return _SWAGGER_UI_HTML, 200, {"Content-Type": "text/html"}
 
 
 # --- Push Notification Helpers ---
@@ -8529,7 +9244,11 @@ def api_docs():
 def notify_payment_recorded(
     user_id: int, bill_id: int, bill_name: str, amount: float, payment_date: str
 ):
-    """Send push notification when a payment is recorded (async-safe)."""
+    """Queue a push notification when a payment is recorded.
+
+    Only the device lookup runs on the request thread; delivery happens on
+    the push worker pool so FCM latency never reaches the response.
+    """
     try:
         from services.push_notifications import (
             send_payment_confirmation,
@@ -8537,7 +9256,9 @@ def notify_payment_recorded(
         )
 
         if is_push_enabled():
-            send_payment_confirmation(user_id, bill_id, bill_name, amount, payment_date)
+            send_payment_confirmation(
+                user_id, bill_id, bill_name, amount, payment_date, background=True
+            )
     except Exception as e:
         logger.warning(f"Failed to send payment notification: {e}")
 
@@ -8549,27 +9270,42 @@ def notify_payment_recorded(
 @jwt_required
 def jwt_get_devices():
     """Get all registered devices for the current user."""
-    devices = (
-        UserDevice.query.filter_by(user_id=g.jwt_user_id)
-        .order_by(desc(UserDevice.last_active_at))
-        .all()
-    )
+    # Read-only projection: select the serialized columns rather than
+    # building UserDevice instances, and never load the push token itself.
+    # Built as a lambda statement so the compiled SQL is reused across requests.
+    user_id = g.jwt_user_id
+    rows = db.session.execute(
+        lambda_stmt(
+            lambda: db.select(
+                UserDevice.id,
+                UserDevice.device_id,
+                UserDevice.device_name,
+                UserDevice.platform,
+                UserDevice.app_version,
+                UserDevice.os_version,
+                UserDevice.last_active_at,
+                UserDevice.created_at,
+                UserDevice.push_token.is_not(None).label("has_push_token"),
+            )
+            .where(UserDevice.user_id == user_id)
+            .order_by(desc(UserDevice.last_active_at))
+        )
+    ).all()
 
+    isoformat = datetime.datetime.isoformat
     result = [
         {
-            "id": d.id,
-            "device_id": d.device_id,
-            "device_name": d.device_name,
-            "platform": d.platform,
-            "app_version": d.app_version,
-            "os_version": d.os_version,
-            "last_active_at": d.last_active_at.isoformat()
-            if d.last_active_at
-            else None,
-            "created_at": d.created_at.isoformat() if d.created_at else None,
-            "has_push_token": d.push_token is not None,
+            "id": r.id,
+            "device_id": r.device_id,
+            "device_name": r.device_name,
+            "platform": r.platform,
+            "app_version": r.app_version,
+            "os_version": r.os_version,
+            "last_active_at": isoformat(r.last_active_at) if r.last_active_at else None,
+            "created_at": isoformat(r.created_at) if r.created_at else None,
+            "has_push_token": r.has_push_token,
         }
-        for d in devices
+        for r in rows
     ]
 
     return jsonify({"success": True, "data": result})
@@ -8599,27 +9335,26 @@ def jwt_register_device():
             }
         ), 400
 
-    # Check if device already exists for this user
-    existing_device = UserDevice.query.filter_by(
-        user_id=g.jwt_user_id, device_id=device_id
-    ).first()
-    is_new = existing_device is None
-
-    if existing_device:
-        # Update existing device
-        device = existing_device
-        device.device_name = data.get("device_name", device.device_name)
-        device.platform = platform
-        device.push_token = data.get("push_token", device.push_token)
-        device.push_provider = data.get("push_provider", device.push_provider)
-        device.app_version = data.get("app_version", device.app_version)
-        device.os_version = data.get("os_version", device.os_version)
-        device.last_active_at = datetime.datetime.now(datetime.timezone.utc)
-        if data.get("notification_settings"):
-            device.notification_settings = json.dumps(data["notification_settings"])
-    else:
-        # Create new device
-        device = UserDevice(
+    now = datetime.datetime.now(datetime.timezone.utc)
+    # Re-registration only overwrites the fields the client sent
+    updates = {"platform": platform, "last_active_at": now}
+    for field in (
+        "device_name",
+        "push_token",
+        "push_provider",
+        "app_version",
+        "os_version",
+    ):
+        if field in data:
+            updates[field] = data[field]
+    if data.get("notification_settings"):
+        updates["notification_settings"] = json.dumps(data["notification_settings"])
+
+    # One atomic upsert on uq_user_device; xmax is 0 only for a freshly
+    # inserted row, which tells a new registration from an update.
+    device_pk, is_new = db.session.execute(
+        pg_insert(UserDevice)
+        .values(
             user_id=g.jwt_user_id,
             device_id=device_id,
             device_name=data.get("device_name"),
@@ -8629,17 +9364,19 @@ def jwt_register_device():
             app_version=data.get("app_version"),
             os_version=data.get("os_version"),
             notification_settings=json.dumps(data.get("notification_settings", {})),
+            last_active_at=now,
         )
-        db.session.add(device)
-
+        .on_conflict_do_update(constraint="uq_user_device", set_=updates)
+        .returning(UserDevice.id, literal_column("(xmax = 0)"))
+    ).one()
     db.session.commit()
 
     return jsonify(
         {
             "success": True,
             "data": {
-                "id": device.id,
-                "device_id": device.device_id,
+                "id": device_pk,
+                "device_id": device_id,
                 "message": "Device registered successfully",
             },
         }
@@ -8751,6 +9488,10 @@ def jwt_sync_push():
     rejected_bills = []
     accepted_payments = []
     rejected_payments = []
+    # New rows are inserted by the single flush before the response,
+    # paired with the accepted entry that reports their id.
+    created_bills = []
+    created_payments = []
     bill_changes = data.get("bills", [])
     payment_changes = data.get("payments", [])
     bill_deletions = data.get("deleted_bills", [])
@@ -8760,6 +9501,25 @@ def jwt_sync_push():
         payment_changes, payment_deletions
     )
 
+    # Resolve every referenced bill up front instead of one query per entry
+    locked_bills = _lock_sync_bills(
+        _sync_entity_ids(bill_changes, bill_deletions) - duplicate_bill_ids,
+        target_db.id,
+    )
+    locked_payments = _lock_sync_payments(
+        _sync_entity_ids(payment_changes, payment_deletions) - duplicate_payment_ids
+    )
+    new_payment_bill_ids = _sync_entity_ids(payment_changes, key="bill_id")
+    if new_payment_bill_ids:
+        new_payment_bill_ids = set(
+            db.session.scalars(
+                db.select(Bill.id).where(
+                    Bill.id.in_(new_payment_bill_ids),
+                    Bill.database_id == target_db.id,
+                )
+            )
+        )
+
     # Process bill changes
     for bill_data in bill_changes:
         if not isinstance(bill_data, dict):
@@ -8786,8 +9546,8 @@ def jwt_sync_push():
                 continue
 
             # Update existing bill
-            bill = _get_bill_for_mutation(bill_id, required=False)
-            if not bill or bill.database_id != target_db.id:
+            bill = locked_bills.get(bill_id)
+            if not bill:
                 rejected_bills.append({"id": bill_id, "reason": "not_found"})
                 continue
 
@@ -8899,17 +9659,13 @@ def jwt_sync_push():
                 reminder_days=reminder_days,
                 archived=False,
             )
-            db.session.add(new_bill)
-            db.session.flush()  # Get the ID
-            accepted_bills.append(
-                {
-                    "id": new_bill.id,
-                    "action": "created",
-                    "client_ref": bill_data.get(
-                        "client_ref"
-                    ),  # For client to map temp ID
-                }
-            )
+            accepted = {
+                "id": None,
+                "action": "created",
+                "client_ref": bill_data.get("client_ref"),  # For client to map temp ID
+            }
+            accepted_bills.append(accepted)
+            created_bills.append((new_bill, accepted))
 
     # Process payment changes
     for payment_data in payment_changes:
@@ -8941,14 +9697,13 @@ def jwt_sync_push():
                 continue
 
             # Update existing payment
-            payment = _get_payment_for_mutation(payment_id, required=False)
-            if not payment:
+            if payment_id not in locked_payments:
                 rejected_payments.append({"id": payment_id, "reason": "not_found"})
                 continue
+            payment, payment_database_id = locked_payments[payment_id]
 
             # Verify payment belongs to a bill in this database
-            bill = db.session.get(Bill, payment.bill_id)
-            if not bill or bill.database_id != target_db.id:
+            if payment_database_id != target_db.id:
                 rejected_payments.append({"id": payment_id, "reason": "access_denied"})
                 continue
 
@@ -9009,8 +9764,7 @@ def jwt_sync_push():
                 continue
 
             # Verify bill exists and belongs to this database
-            bill = db.session.get(Bill, bill_id)
-            if not bill or bill.database_id != target_db.id:
+            if bill_id not in new_payment_bill_ids:
                 rejected_payments.append(
                     {"id": None, "reason": "invalid_bill_id", "data": payment_data}
                 )
@@ -9022,15 +9776,13 @@ def jwt_sync_push():
                 payment_date=payment_data["payment_date"],
                 notes=payment_data.get("notes"),
             )
-            db.session.add(new_payment)
-            db.session.flush()
-            accepted_payments.append(
-                {
-                    "id": new_payment.id,
-                    "action": "created",
-                    "client_ref": payment_data.get("client_ref"),
-                }
-            )
+            accepted = {
+                "id": None,
+                "action": "created",
+                "client_ref": payment_data.get("client_ref"),
+            }
+            accepted_payments.append(accepted)
+            created_payments.append((new_payment, accepted))
 
     # Process deletions (archive bills, delete payments)
     for bill_ref in bill_deletions:
@@ -9056,8 +9808,8 @@ def jwt_sync_push():
             rejected_bills.append({"id": bill_id, "reason": timestamp_error})
             continue
 
-        bill = _get_bill_for_mutation(bill_id, required=False)
-        if bill and bill.database_id == target_db.id:
+        bill = locked_bills.get(bill_id)
+        if bill:
             if _sync_timestamp_conflicts(base_updated_at, bill.last_updated):
                 rejected_bills.append(
                     {
@@ -9094,10 +9846,9 @@ def jwt_sync_push():
             rejected_payments.append({"id": payment_id, "reason": timestamp_error})
             continue
 
-        payment = _get_payment_for_mutation(payment_id, required=False)
+        payment, payment_database_id = locked_payments.get(payment_id, (None, None))
         if payment:
-            bill = db.session.get(Bill, payment.bill_id)
-            if bill and bill.database_id == target_db.id:
+            if payment_database_id == target_db.id:
                 if _sync_timestamp_conflicts(base_updated_at, payment.updated_at):
                     rejected_payments.append(
                         {
@@ -9111,6 +9862,16 @@ def jwt_sync_push():
                 db.session.delete(payment)
                 accepted_payments.append({"id": payment_id, "action": "deleted"})
 
+    # Every update, archive, delete and insert goes out in one flush inside
+    # the transaction the row locks opened; new bills and payments are each
+    # written as a single INSERT ... RETURNING. Created payments only
+    # reference existing bills, so nothing needs an id earlier.
+    db.session.add_all([new_bill for new_bill, _ in created_bills])
+    db.session.add_all([new_payment for new_payment, _ in created_payments])
+    db.session.flush()
+    for created, accepted in created_bills + created_payments:
+        accepted["id"] = created.id
+
     server_time = _isoformat_utc(datetime.datetime.now(datetime.timezone.utc))
     response_payload = {
         "success": True,
@@ -9122,9 +9883,15 @@ def jwt_sync_push():
             "server_time": server_time,
         },
     }
+    touched_bill_ids = (
+        set(locked_bills)
+        | set(new_payment_bill_ids)
+        | {payment.bill_id for payment, _ in locked_payments.values()}
+    )
     replay = _commit_with_client_mutation(mutation, response_payload)
     if replay:
         return replay
+    _invalidate_shared_bills_cache(*_shared_bill_recipient_ids(touched_bill_ids))
     return jsonify(response_payload)
 
 
@@ -9170,17 +9937,14 @@ def jwt_sync():
         bill_query = bill_query.filter_by(archived=False)
     bills = bill_query.all()
 
-    # Get bill IDs for payment query
-    all_bill_ids = [b.id for b in Bill.query.filter_by(database_id=target_db.id).all()]
-
-    # Get payments modified after since timestamp
-    payments = (
-        Payment.query.filter(
-            Payment.bill_id.in_(all_bill_ids), Payment.updated_at > since
-        ).all()
-        if all_bill_ids
-        else []
-    )
+    # Get payments modified after since timestamp; the database's bill IDs
+    # stay in SQL as a subquery instead of being loaded as Bill objects
+    payments = Payment.query.filter(
+        Payment.bill_id.in_(
+            db.select(Bill.id).where(Bill.database_id == target_db.id)
+        ),
+        Payment.updated_at > since,
+    ).all()
 
     # Format response
     bills_data = [
@@ -9403,7 +10167,7 @@ def get_telemetry_notice():
 
     Returns notice status and telemetry configuration.
     """
-    user = User.query.get(g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -9462,7 +10226,7 @@ def get_telemetry_notice():
 @jwt_required
 def accept_telemetry():
     """Accept telemetry (dismiss notice without opting out)."""
-    user = User.query.get(g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -9491,7 +10255,7 @@ def accept_telemetry():
 @jwt_required
 def opt_out_telemetry():
     """Opt out of telemetry."""
-    user = User.query.get(g.jwt_user_id)
+    user = _current_user()
     if not user:
         return jsonify({"success": False, "error": "User not found"}), 404
 
@@ -9541,8 +10305,6 @@ def oauth_callback_form_post_bridge():
         if value:
             params[key] = value
 
-    from urllib.parse import urlencode
-
     query = urlencode(params)
     target = "/auth/callback"
     if query:
@@ -9566,6 +10328,7 @@ def serve_static(path):
 def create_app():
     app = Flask(__name__, static_folder=None)
     app.url_map.strict_slashes = False
+    install_json_provider(app)
 
     # Get DATABASE_URL and convert to psycopg3 dialect if needed
     db_url = os.environ.get(
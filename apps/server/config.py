@@ -6,6 +6,7 @@ Supports two modes:
 - saas: For the hosted app.billmanager.app service
 """
 
+import functools
 import os
 import logging
 import re
@@ -95,11 +96,15 @@ def get_stripe_price_id(tier: str, interval: str) -> str | None:
     return STRIPE_PRICES[tier].get(interval)
 
 
+# DEPLOYMENT_MODE is read once at import, so the answers below are fixed for
+# the life of the process; admin routes ask several times per request.
+@functools.cache
 def is_saas():
     """Check if running in SaaS mode."""
     return DEPLOYMENT_MODE == "saas"
 
 
+@functools.cache
 def is_self_hosted():
     """Check if running in self-hosted mode."""
     return DEPLOYMENT_MODE == "self-hosted"
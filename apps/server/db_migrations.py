@@ -1025,6 +1025,301 @@ def migrate_20260724_01_add_user_currency(db):
     logger.info("Backfilled users.currency with %s", legacy_currency)
 
 
+def migrate_20261016_01_add_covering_lookup_indexes(db):
+    """Add covering indexes for bill payment history and share access checks.
+
+    1. payments(bill_id, payment_date DESC) INCLUDE (id, amount, share_id) -
+       replaces idx_payments_bill_date so monthly totals are index-only.
+       Notes are not included; long free text could exceed the index row limit.
+    2. bill_shares(bill_id, shared_with_user_id, status) - for the accepted
+       share fallback in bill access checks.
+    """
+    logger.info("Running migration: 20261016_01_add_covering_lookup_indexes")
+
+    result = db.session.execute(text("""
+        SELECT indexname FROM pg_indexes
+        WHERE tablename IN ('payments', 'bill_shares')
+    """))
+    existing_indexes = {row[0] for row in result.fetchall()}
+
+    if 'idx_payments_bill_date_covering' not in existing_indexes:
+        db.session.execute(text('''
+            CREATE INDEX idx_payments_bill_date_covering
+            ON payments(bill_id, payment_date DESC)
+            INCLUDE (id, amount, share_id)
+        '''))
+        logger.info("Created index idx_payments_bill_date_covering")
+
+    if 'idx_payments_bill_date' in existing_indexes:
+        db.session.execute(text('DROP INDEX idx_payments_bill_date'))
+        logger.info("Dropped superseded index idx_payments_bill_date")
+
+    if 'idx_bill_shares_bill_recipient_status' not in existing_indexes:
+        db.session.execute(text('''
+            CREATE INDEX idx_bill_shares_bill_recipient_status
+            ON bill_shares(bill_id, shared_with_user_id, status)
+        '''))
+        logger.info("Created index idx_bill_shares_bill_recipient_status")
+
+    db.session.commit()
+
+
+def migrate_20261016_02_add_pending_share_index(db):
+    """Add a partial index for pending share invitations.
+
+    bill_shares(shared_with_user_id, expires_at) WHERE status = 'pending' -
+    covers the recipient's pending-invite listing, including the expiry
+    filter, while staying small since accepted shares are excluded.
+    invite_token lookups already use the column's unique index.
+    """
+    logger.info("Running migration: 20261016_02_add_pending_share_index")
+
+    result = db.session.execute(text("""
+        SELECT indexname FROM pg_indexes
+        WHERE tablename = 'bill_shares'
+    """))
+    existing_indexes = {row[0] for row in result.fetchall()}
+
+    if 'idx_bill_shares_recipient_pending' not in existing_indexes:
+        db.session.execute(text('''
+            CREATE INDEX idx_bill_shares_recipient_pending
+            ON bill_shares(shared_with_user_id, expires_at)
+            WHERE status = 'pending'
+        '''))
+        logger.info("Created index idx_bill_shares_recipient_pending")
+
+    db.session.commit()
+
+
+def migrate_20261016_04_add_autopay_due_index(db):
+    """Add a partial index for the auto-payment sweep.
+
+    bills(database_id, due_date) WHERE auto_pay AND NOT archived - process-
+    auto-payments looks for due auto-pay bills in the user's databases. The
+    OAuth (provider, provider_user_id) lookup and 2FA challenge token_hash
+    lookup are already served by their unique constraints.
+    """
+    logger.info("Running migration: 20261016_04_add_autopay_due_index")
+
+    result = db.session.execute(text("""
+        SELECT indexname FROM pg_indexes
+        WHERE tablename = 'bills'
+    """))
+    existing_indexes = {row[0] for row in result.fetchall()}
+
+    if 'idx_bills_autopay_due' not in existing_indexes:
+        db.session.execute(text('''
+            CREATE INDEX idx_bills_autopay_due
+            ON bills(database_id, due_date)
+            WHERE auto_pay AND NOT archived
+        '''))
+        logger.info("Created index idx_bills_autopay_due")
+
+    db.session.commit()
+
+
+def migrate_20261016_05_add_normalized_email(db):
+    """Store a normalized email for case-insensitive lookups.
+
+    users.email_normalized holds lower(trim(email)) and is maintained by the
+    model on write, so lookups compare against a plain btree index instead
+    of evaluating lower() per row.
+    """
+    logger.info("Running migration: 20261016_05_add_normalized_email")
+
+    columns = {column["name"] for column in inspect(db.engine).get_columns("users")}
+    if "email_normalized" not in columns:
+        db.session.execute(text(
+            "ALTER TABLE users ADD COLUMN email_normalized VARCHAR(255)"
+        ))
+
+    db.session.execute(text("""
+        UPDATE users SET email_normalized = lower(trim(email))
+        WHERE email IS NOT NULL AND email_normalized IS NULL
+    """))
+
+    result = db.session.execute(text("""
+        SELECT indexname FROM pg_indexes
+        WHERE tablename = 'users'
+    """))
+    existing_indexes = {row[0] for row in result.fetchall()}
+
+    if 'idx_users_email_normalized' not in existing_indexes:
+        db.session.execute(text('''
+            CREATE INDEX idx_users_email_normalized ON users(email_normalized)
+        '''))
+        logger.info("Created index idx_users_email_normalized")
+
+    db.session.commit()
+
+
+def migrate_20261016_06_cover_autopay_due_index(db):
+    """Make the auto-pay partial index covering.
+
+    Rebuilds idx_bills_autopay_due with INCLUDE (id, name, amount, frequency,
+    frequency_type) so the auto-payment sweep reads its fixed-width columns
+    from the index. frequency_config is unbounded Text and is read from the
+    heap, since a large value would exceed the btree tuple limit.
+    """
+    logger.info("Running migration: 20261016_06_cover_autopay_due_index")
+
+    result = db.session.execute(text("""
+        SELECT indexdef FROM pg_indexes
+        WHERE tablename = 'bills' AND indexname = 'idx_bills_autopay_due'
+    """))
+    indexdef = result.scalar()
+
+    if indexdef is None or 'INCLUDE' not in indexdef:
+        db.session.execute(text('DROP INDEX IF EXISTS idx_bills_autopay_due'))
+        db.session.execute(text('''
+            CREATE INDEX idx_bills_autopay_due
+            ON bills(database_id, due_date)
+            INCLUDE (id, name, amount, frequency, frequency_type)
+            WHERE auto_pay AND NOT archived
+        '''))
+        logger.info("Created covering index idx_bills_autopay_due")
+
+    db.session.commit()
+
+
+def migrate_20261016_07_add_decoded_passkey_columns(db):
+    """Store passkey credential IDs and transports in decoded form.
+
+    WebAuthn option endpoints list every passkey a user has; keeping the raw
+    credential ID bytes and the transports as JSON avoids a base64 decode and
+    a json.loads per passkey on each ceremony. Existing rows are backfilled
+    from credential_id and transports.
+    """
+    logger.info("Running migration: 20261016_07_add_decoded_passkey_columns")
+
+    columns = {
+        column["name"]
+        for column in inspect(db.engine).get_columns("webauthn_credentials")
+    }
+    if "credential_id_raw" not in columns:
+        db.session.execute(text(
+            "ALTER TABLE webauthn_credentials ADD COLUMN credential_id_raw BYTEA"
+        ))
+    if "transports_list" not in columns:
+        db.session.execute(text(
+            "ALTER TABLE webauthn_credentials ADD COLUMN transports_list JSON"
+        ))
+
+    # credential_id is unpadded base64url; restore the alphabet and padding
+    db.session.execute(text("""
+        UPDATE webauthn_credentials
+        SET credential_id_raw = decode(
+            translate(credential_id, '-_', '+/')
+            || repeat('=', (4 - length(credential_id) % 4) % 4),
+            'base64'
+        )
+        WHERE credential_id_raw IS NULL
+    """))
+    db.session.execute(text("""
+        UPDATE webauthn_credentials
+        SET transports_list = CAST(transports AS JSON)
+        WHERE transports IS NOT NULL AND transports_list IS NULL
+    """))
+
+    db.session.commit()
+
+
+def migrate_20261016_08_add_twofa_challenge_lookup_index(db):
+    """Index 2FA challenges for newest-by-type lookups.
+
+    Disable and passkey-removal confirmations fetch a user's most recent
+    challenge of one type; idx_twofa_challenges_lookup on (user_id,
+    challenge_type, created_at DESC) answers that with a single index seek.
+    It also serves plain user_id lookups, so idx_twofa_challenges_user_id is
+    dropped.
+    """
+    logger.info("Running migration: 20261016_08_add_twofa_challenge_lookup_index")
+
+    result = db.session.execute(text("""
+        SELECT indexname FROM pg_indexes
+        WHERE tablename = 'twofa_challenges'
+    """))
+    existing_indexes = {row[0] for row in result.fetchall()}
+
+    if 'idx_twofa_challenges_lookup' not in existing_indexes:
+        db.session.execute(text('''
+            CREATE INDEX idx_twofa_challenges_lookup
+            ON twofa_challenges(user_id, challenge_type, created_at DESC)
+        '''))
+        logger.info("Created index idx_twofa_challenges_lookup")
+    if 'idx_twofa_challenges_user_id' in existing_indexes:
+        db.session.execute(text('DROP INDEX idx_twofa_challenges_user_id'))
+        logger.info("Dropped index idx_twofa_challenges_user_id")
+
+    db.session.commit()
+
+
+def migrate_20261016_09_add_invite_database_ids_list(db):
+    """Store invitation database IDs as a Postgres integer array.
+
+    The invitation list and accept endpoints split the comma-separated
+    database_ids string and int() every piece per row; an INTEGER[] column
+    comes back as a list of ints. Existing rows are backfilled, skipping any
+    piece that is not a number, as the accept endpoint already did.
+    """
+    logger.info("Running migration: 20261016_09_add_invite_database_ids_list")
+
+    columns = {
+        column["name"] for column in inspect(db.engine).get_columns("user_invites")
+    }
+    if "database_ids_list" not in columns:
+        db.session.execute(text(
+            "ALTER TABLE user_invites ADD COLUMN database_ids_list INTEGER[]"
+        ))
+
+    db.session.execute(text("""
+        UPDATE user_invites
+        SET database_ids_list = ARRAY(
+            SELECT CAST(piece AS INTEGER)
+            FROM unnest(string_to_array(database_ids, ',')) AS piece
+            WHERE piece ~ '^[0-9]{1,9}$'
+        )
+        WHERE database_ids_list IS NULL
+    """))
+
+    db.session.commit()
+
+
+def migrate_20261016_10_add_pending_invite_indexes(db):
+    """Add partial indexes for pending invitations.
+
+    user_invites(invited_by_id, expires_at) WHERE accepted_at IS NULL -
+    covers an admin's pending-invitation list including the expiry filter.
+    user_invites(email, expires_at) WHERE accepted_at IS NULL - covers the
+    duplicate pending-invite check when creating an invitation. Accepted
+    invitations are excluded, so both stay small.
+    """
+    logger.info("Running migration: 20261016_10_add_pending_invite_indexes")
+
+    result = db.session.execute(text("""
+        SELECT indexname FROM pg_indexes
+        WHERE tablename = 'user_invites'
+    """))
+    existing_indexes = {row[0] for row in result.fetchall()}
+
+    if 'idx_user_invites_inviter_pending' not in existing_indexes:
+        db.session.execute(text('''
+            CREATE INDEX idx_user_invites_inviter_pending
+            ON user_invites(invited_by_id, expires_at)
+            WHERE accepted_at IS NULL
+        '''))
+        logger.info("Created index idx_user_invites_inviter_pending")
+    if 'idx_user_invites_email_pending' not in existing_indexes:
+        db.session.execute(text('''
+            CREATE INDEX idx_user_invites_email_pending
+            ON user_invites(email, expires_at)
+            WHERE accepted_at IS NULL
+        '''))
+        logger.info("Created index idx_user_invites_email_pending")
+
+    db.session.commit()
+
+
 # List of all migrations in order
 # Format: (version, description, function)
 MIGRATIONS = [
@@ -1058,6 +1353,15 @@ MIGRATIONS = [
     ('20260715_04', 'Add coarse user last-login tracking', migrate_20260715_04_add_user_last_login_at),
     ('20260716_01', 'Normalize destructive foreign-key cascades', migrate_20260716_01_normalize_delete_cascades),
     ('20260724_01', 'Add persisted per-user currency preference', migrate_20260724_01_add_user_currency),
+    ('20261016_01', 'Add covering indexes for payment history and share lookups', migrate_20261016_01_add_covering_lookup_indexes),
+    ('20261016_02', 'Add partial index for pending share invitations', migrate_20261016_02_add_pending_share_index),
+    ('20261016_04', 'Add partial index for due auto-pay bills', migrate_20261016_04_add_autopay_due_index),
+    ('20261016_05', 'Add normalized email column for case-insensitive lookups', migrate_20261016_05_add_normalized_email),
+    ('20261016_06', 'Make the auto-pay due index covering', migrate_20261016_06_cover_autopay_due_index),
+    ('20261016_07', 'Store decoded passkey credential IDs and transports', migrate_20261016_07_add_decoded_passkey_columns),
+    ('20261016_08', 'Add lookup index for 2FA challenges', migrate_20261016_08_add_twofa_challenge_lookup_index),
+    ('20261016_09', 'Store invitation database IDs as an integer array', migrate_20261016_09_add_invite_database_ids_list),
+    ('20261016_10', 'Add partial indexes for pending invitations', migrate_20261016_10_add_pending_invite_indexes),
 ]
 
 
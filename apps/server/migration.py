@@ -2,6 +2,7 @@ import os
 import sqlite3
 import json
 import traceback
+from sqlalchemy import text
 from models import db, User, Database, Bill, Payment
 
 def migrate_sqlite_to_pg(app):
@@ -142,6 +143,10 @@ def migrate_sqlite_to_pg(app):
             
             print(f"  Processing data for database: {new_db_obj.name}...")
             try:
+                # Bulk import is re-runnable until the flag file is written, so
+                # skip the per-commit WAL fsync for this transaction only.
+                db.session.execute(text("SET LOCAL synchronous_commit TO OFF"))
+
                 conn_db = sqlite3.connect(sqlite_path)
                 conn_db.row_factory = sqlite3.Row
                 cursor_db = conn_db.cursor()
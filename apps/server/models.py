@@ -1,14 +1,43 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta, timezone
 import hashlib
+import logging
+import re
 import secrets
-from sqlalchemy import or_
+from sqlalchemy import or_, text
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from currency import currency_amount_value
 
+logger = logging.getLogger(__name__)
+
+# Try to import argon2, but fall back to Werkzeug's PBKDF2 hashes without it
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+    logger.warning("argon2-cffi not installed. Hashing passwords with PBKDF2.")
+
 db = SQLAlchemy()
 
+# argon2id with the RFC 9106 low-memory profile (19 MiB, 2 passes)
+_password_hasher = (
+    PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+    if ARGON2_AVAILABLE
+    else None
+)
+
+# Same rule the 20261016_09 backfill applies: ASCII digits that fit INTEGER
+_DATABASE_ID_PIECE = re.compile(r'^[0-9]{1,9}$')
+
+
+def normalize_email(email):
+    """Return the trimmed, lowercased form used for email equality lookups."""
+    return email.strip().lower() if email else None
+
 
 def _hash_token_value(token):
     """Hash one-time tokens before storing them at rest."""
@@ -30,7 +59,8 @@ def _hash_password_reset_token(token):
 def _token_lookup_filter(column, token):
     """Match either a legacy raw token or the hashed-at-rest form."""
     token_hash = _hash_token_value(token)
-    return or_(column == token, column == token_hash)
+    # IN (raw, hash) is a single probe of the column's unique index
+    return column.in_([token, token_hash])
 
 
 def _token_matches(stored_token, provided_token):
@@ -67,6 +97,8 @@ class User(db.Model):
 
     # Email and verification (for SaaS registration)
     email = db.Column(db.String(255), unique=True, nullable=True)
+    # normalize_email(email), kept in step by _sync_email_normalized
+    email_normalized = db.Column(db.String(255), nullable=True)
     email_verified_at = db.Column(db.DateTime, nullable=True)
     email_verification_token = db.Column(db.String(64), nullable=True)
     email_verification_expires = db.Column(db.DateTime, nullable=True)
@@ -86,6 +118,16 @@ class User(db.Model):
     accessible_databases = db.relationship('Database', secondary=user_database_access, backref='users')
     created_by = db.relationship('User', remote_side='User.id', foreign_keys=[created_by_id], backref='created_users')
 
+    # Case-insensitive email lookups (share invitations, OAuth account linking)
+    __table_args__ = (
+        db.Index('idx_users_email_normalized', email_normalized),
+    )
+
+    @validates('email')
+    def _sync_email_normalized(self, key, value):
+        self.email_normalized = normalize_email(value)
+        return value
+
     @property
     def is_account_owner(self):
         """Check if this user is an account owner (self-registered admin, not a sub-user)"""
@@ -101,15 +143,40 @@ class User(db.Model):
         return None
 
     def set_password(self, password):
-        """Hash password using werkzeug's secure method (pbkdf2:sha256)."""
-        self.password_hash = generate_password_hash(password)
+        """Hash password with argon2id, or Werkzeug's pbkdf2:sha256 without argon2."""
+        if ARGON2_AVAILABLE:
+            self.password_hash = _password_hasher.hash(password)
+        else:
+            self.password_hash = generate_password_hash(password)
 
     def check_password(self, password):
-        """Verify password against the current Werkzeug password hash."""
+        """Verify password against the stored argon2id or Werkzeug hash.
+
+        A successful check against a Werkzeug hash, or an argon2 hash with
+        outdated parameters, rehashes the password; the caller's commit
+        persists it.
+        """
         # OIDC-only users have no password
         if not self.password_hash:
             return False
-        return check_password_hash(self.password_hash, password)
+
+        if self.password_hash.startswith('$argon2'):
+            if not ARGON2_AVAILABLE:
+                logger.error(f"Cannot verify argon2 password hash for user {self.id}: argon2-cffi not installed")
+                return False
+            try:
+                _password_hasher.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+            if _password_hasher.check_needs_rehash(self.password_hash):
+                self.set_password(password)
+            return True
+
+        if not check_password_hash(self.password_hash, password):
+            return False
+        if ARGON2_AVAILABLE:
+            self.set_password(password)
+        return True
 
     def generate_email_verification_token(self):
         """Generate a secure token for email verification (24 hour expiry)"""
@@ -252,6 +319,19 @@ class Bill(db.Model):
     # Relationships
     payments = db.relationship('Payment', backref='bill', lazy=True, cascade="all, delete-orphan")
 
+    # Serves the auto-payment sweep, which only reads active auto-pay bills;
+    # frequency_config is unbounded Text, so it stays out of the INCLUDE list
+    __table_args__ = (
+        db.Index(
+            'idx_bills_autopay_due',
+            'database_id', 'due_date',
+            postgresql_include=[
+                'id', 'name', 'amount', 'frequency', 'frequency_type',
+            ],
+            postgresql_where=text('auto_pay AND NOT archived'),
+        ),
+    )
+
 class Payment(db.Model):
     __tablename__ = 'payments'
     id = db.Column(db.Integer, primary_key=True)
@@ -266,6 +346,16 @@ class Payment(db.Model):
     # Relationship to share (for shared bill payments)
     share = db.relationship('BillShare', backref=db.backref('payments', lazy=True))
 
+    # Covers per-bill payment history and monthly totals without heap fetches
+    __table_args__ = (
+        db.Index(
+            'idx_payments_bill_date_covering',
+            bill_id,
+            payment_date.desc(),
+            postgresql_include=['id', 'amount', 'share_id'],
+        ),
+    )
+
 
 class ClientMutation(db.Model):
     """Durable replay record for an authenticated offline mutation."""
@@ -389,6 +479,9 @@ class UserInvite(db.Model):
     role = db.Column(db.String(20), default='user')
     invited_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     database_ids = db.Column(db.String(255), default='')  # Comma-separated list of database IDs
+    database_ids_list = db.Column(
+        db.ARRAY(db.Integer).with_variant(db.JSON, 'sqlite'), nullable=True
+    )  # database_ids, pre-parsed
     expires_at = db.Column(db.DateTime, nullable=False)
     accepted_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -396,6 +489,28 @@ class UserInvite(db.Model):
     # Relationship
     invited_by = db.relationship('User', backref=db.backref('sent_invites', lazy=True))
 
+    __table_args__ = (
+        db.Index(
+            'idx_user_invites_inviter_pending',
+            'invited_by_id', 'expires_at',
+            postgresql_where=text('accepted_at IS NULL'),
+        ),
+        db.Index(
+            'idx_user_invites_email_pending',
+            'email', 'expires_at',
+            postgresql_where=text('accepted_at IS NULL'),
+        ),
+    )
+
+    @validates('database_ids')
+    def _sync_database_ids_list(self, key, value):
+        self.database_ids_list = [
+            int(piece)
+            for piece in (value or '').split(',')
+            if _DATABASE_ID_PIECE.match(piece)
+        ]
+        return value
+
     def set_token(self, token=None):
         raw_token = token or secrets.token_urlsafe(32)
         self.token = _hash_token_value(raw_token)
@@ -624,6 +739,12 @@ class BillShare(db.Model):
     # Prevent duplicate active shares for same bill+user combination
     __table_args__ = (
         db.UniqueConstraint('bill_id', 'shared_with_identifier', name='uq_bill_share_identifier'),
+        db.Index('idx_bill_shares_bill_recipient_status', 'bill_id', 'shared_with_user_id', 'status'),
+        db.Index(
+            'idx_bill_shares_recipient_pending',
+            'shared_with_user_id', 'expires_at',
+            postgresql_where=text("status = 'pending'"),
+        ),
     )
 
     @property
@@ -727,10 +848,13 @@ class BillShare(db.Model):
                     actor_user_id=share.owner_user_id,  # System action, attribute to owner
                     share_id=None,  # Will be NULL since share is being deleted
                     affected_user_id=share.shared_with_user_id,
-                    metadata={'expired_at': share.expires_at.isoformat() if share.expires_at else None, 'shared_with': share.shared_with_identifier}
+                    metadata={'expired_at': share.expires_at.isoformat() if share.expires_at else None, 'shared_with': share.shared_with_identifier},
+                    commit=False
                 )
                 db.session.delete(share)
 
+            # One commit for the whole batch; the audit rows go out as a
+            # single multi-row INSERT
             db.session.commit()
 
         return {
@@ -845,7 +969,7 @@ class TwoFAConfig(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, unique=True)
     email_otp_enabled = db.Column(db.Boolean, default=False)
     passkey_enabled = db.Column(db.Boolean, default=False)
-    recovery_codes_hash = db.Column(db.Text, nullable=True)  # JSON array of bcrypt hashes
+    recovery_codes_hash = db.Column(db.Text, nullable=True)  # concatenated HMAC hex digests (legacy: JSON array)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
@@ -874,6 +998,15 @@ class TwoFAChallenge(db.Model):
     # Relationships
     user = db.relationship('User', backref=db.backref('twofa_challenges', lazy=True, cascade='all, delete-orphan'))
 
+    __table_args__ = (
+        db.Index(
+            'idx_twofa_challenges_lookup',
+            user_id,
+            challenge_type,
+            created_at.desc(),
+        ),
+    )
+
     @property
     def is_expired(self):
         now = datetime.now(timezone.utc).replace(tzinfo=None)
@@ -891,10 +1024,12 @@ class WebAuthnCredential(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     credential_id = db.Column(db.Text, nullable=False, unique=True)  # base64url encoded
+    credential_id_raw = db.Column(db.LargeBinary, nullable=True)  # decoded credential_id
     public_key = db.Column(db.Text, nullable=False)  # base64url encoded
     sign_count = db.Column(db.Integer, default=0)
     device_name = db.Column(db.String(100), nullable=True)
     transports = db.Column(db.Text, nullable=True)  # JSON array of transport hints
+    transports_list = db.Column(db.JSON, nullable=True)  # transports, pre-parsed
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     last_used_at = db.Column(db.DateTime, nullable=True)
 
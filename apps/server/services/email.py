@@ -1,9 +1,12 @@
 """
 Provider-neutral outbound email service for transactional emails.
 """
+import contextvars
 import logging
 import os
 import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.message import EmailMessage
 
 from services.email_config import get_email_config
@@ -25,6 +28,42 @@ RESEND_API_KEY = EMAIL_CONFIG.resend_api_key
 FROM_EMAIL = EMAIL_CONFIG.from_email
 APP_URL = EMAIL_CONFIG.app_url
 
+# Background sends: a small pool keeps provider round-trips off request threads
+BACKGROUND_SEND_ATTEMPTS = 3
+BACKGROUND_SEND_BACKOFF_SECONDS = 2.0
+_background_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="email")
+# Set while a background send runs, so provider errors worth retrying reach
+# the retry loop instead of being folded into a False result
+_raise_transient_errors = contextvars.ContextVar(
+    "raise_transient_email_errors", default=False
+)
+
+
+class TransientEmailError(Exception):
+    """A send failed in a way that may succeed later (transport error, 5xx)."""
+
+
+def _is_transient_send_error(error) -> bool:
+    """Return True for transport failures and server-side (5xx) replies."""
+    if isinstance(error, TransientEmailError):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        # SMTP 4xx replies are temporary; 5xx replies are permanent
+        return 400 <= error.smtp_code < 500
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    try:
+        return int(status) >= 500
+    except (TypeError, ValueError):
+        pass
+    return isinstance(error, OSError)
+
+
+def _send_failed(error) -> bool:
+    """Result for a provider exception: retried in the background, else False."""
+    if _raise_transient_errors.get() and _is_transient_send_error(error):
+        raise TransientEmailError(str(error)) from error
+    return False
+
 
 def init_resend():
     """Initialize Resend with API key"""
@@ -49,6 +88,40 @@ def send_email(to: str, subject: str, html: str) -> bool:
     return False
 
 
+def send_in_background(send_func, *args):
+    """
+    Run an email helper (e.g. send_bill_share_email) on a worker thread.
+
+    Transport errors and 5xx replies are retried with exponential backoff; a
+    False result (provider not configured, request rejected) is final.
+    Returns a Future that resolves to the helper's final result.
+    """
+    return _background_executor.submit(_send_with_retries, send_func, *args)
+
+
+def _send_with_retries(send_func, *args) -> bool:
+    """Call send_func until it succeeds, fails permanently, or runs out of attempts."""
+    name = getattr(send_func, "__name__", "email")
+    token = _raise_transient_errors.set(True)
+    try:
+        for attempt in range(1, BACKGROUND_SEND_ATTEMPTS + 1):
+            try:
+                return bool(send_func(*args))
+            except Exception as e:
+                if not _is_transient_send_error(e):
+                    logger.error(f"Background {name} failed: {e}")
+                    return False
+                logger.warning(f"Background {name} attempt {attempt} failed: {e}")
+
+            if attempt < BACKGROUND_SEND_ATTEMPTS:
+                time.sleep(BACKGROUND_SEND_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    finally:
+        _raise_transient_errors.reset(token)
+
+    logger.error(f"Background {name} failed after {BACKGROUND_SEND_ATTEMPTS} attempts")
+    return False
+
+
 def _send_resend_email(to: str, subject: str, html: str) -> bool:
     """Send an email using Resend."""
     if not RESEND_AVAILABLE:
@@ -75,7 +148,7 @@ def _send_resend_email(to: str, subject: str, html: str) -> bool:
         return True
     except Exception as e:
         logger.error(f"Failed to send email via Resend: {subject} to {to}, error={e}")
-        return False
+        return _send_failed(e)
 
 
 def _send_smtp_email(to: str, subject: str, html: str) -> bool:
@@ -108,7 +181,7 @@ def _send_smtp_email(to: str, subject: str, html: str) -> bool:
         return True
     except Exception as e:
         logger.error(f"Failed to send email via SMTP: {subject} to {to}, error={e}")
-        return False
+        return _send_failed(e)
 
 
 def get_email_template(content: str, title: str = "BillManager") -> str:
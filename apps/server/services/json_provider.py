@@ -0,0 +1,72 @@
+"""
+orjson-backed JSON provider for Flask.
+
+Serializes API responses in C instead of walking every dict in the stdlib
+encoder, while keeping Flask's output contract: sorted keys, HTTP-date
+formatting for datetimes, ``str()`` for Decimals, and pretty output in debug.
+
+Usage:
+    from services.json_provider import install_json_provider
+
+    install_json_provider(app)
+"""
+
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+# Try to import orjson, but fall back to Flask's stdlib provider without it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson not installed. Using stdlib JSON serialization.")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson."""
+
+    # Datetimes and dataclasses are routed through Flask's default hook so
+    # responses stay byte-compatible with the stdlib provider.
+    option = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_SORT_KEYS
+        if ORJSON_AVAILABLE
+        else 0
+    )
+
+    def dumps_bytes(self, obj, option=0):
+        """Serialize ``obj`` straight to UTF-8 bytes."""
+        return orjson.dumps(obj, default=self.default, option=self.option | option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # The stdlib parser also accepts NaN/Infinity literals and
+            # arbitrarily large integers; keep those reaching validation.
+            return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            self.dumps_bytes(obj, option), mimetype=self.mimetype
+        )
+
+
+def install_json_provider(app):
+    """Use orjson for ``jsonify`` and request parsing when it is installed."""
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+    return app.json
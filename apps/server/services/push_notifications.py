@@ -18,12 +18,16 @@ Usage:
 
     # Send bill reminder
     send_bill_reminder(user_id, bill_name, due_date, amount)
+
+    # Look up devices now, deliver from a worker thread
+    send_push_to_user(user_id, "Title", "Body", background=True)
 """
 
 import os
 import json
 import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
 
@@ -35,6 +39,9 @@ logger = logging.getLogger(__name__)
 FCM_SERVER_KEY = os.environ.get('FCM_SERVER_KEY')
 FCM_API_URL = 'https://fcm.googleapis.com/fcm/send'
 
+# Background sends: a small pool keeps FCM round-trips off request threads
+_background_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="push")
+
 # Notification types
 class NotificationType:
     BILL_REMINDER = 'bill_reminder'
@@ -134,7 +141,8 @@ def send_push_to_user(
     title: str,
     body: str,
     data: Optional[Dict[str, Any]] = None,
-    notification_type: str = None
+    notification_type: str = None,
+    background: bool = False
 ) -> int:
     """
     Send push notification to all devices registered for a user.
@@ -145,9 +153,12 @@ def send_push_to_user(
         body: Notification body
         data: Optional data payload
         notification_type: Type for client handling
+        background: Deliver from the worker pool instead of waiting on FCM.
+            Devices are still looked up on the calling thread, which needs
+            an app context.
 
     Returns:
-        Number of devices successfully notified
+        Number of devices successfully notified, or queued when background
     """
     # Import here to avoid circular imports
     from models import UserDevice
@@ -168,7 +179,19 @@ def send_push_to_user(
             # User has disabled this notification type
             continue
 
-        if send_push_notification(
+        if background:
+            # Each worker gets its own copy; send_push_notification adds
+            # the notification type to the data dict it is given
+            _background_executor.submit(
+                send_push_notification,
+                device.push_token,
+                title,
+                body,
+                dict(data or {}),
+                notification_type
+            )
+            success_count += 1
+        elif send_push_notification(
             device.push_token,
             title,
             body,
@@ -239,7 +262,8 @@ def send_payment_confirmation(
     bill_id: int,
     bill_name: str,
     amount: float,
-    payment_date: str
+    payment_date: str,
+    background: bool = False
 ) -> int:
     """
     Send a payment confirmation notification.
@@ -250,6 +274,7 @@ def send_payment_confirmation(
         bill_name: Name of the bill
         amount: Payment amount
         payment_date: Date of payment
+        background: Deliver from the worker pool (see send_push_to_user)
 
     Returns:
         Number of devices notified
@@ -268,7 +293,8 @@ def send_payment_confirmation(
         title,
         body,
         data,
-        NotificationType.PAYMENT_CONFIRMED
+        NotificationType.PAYMENT_CONFIRMED,
+        background=background
     )
 
 
@@ -3,6 +3,7 @@ Background task scheduler for BillManager.
 
 Handles periodic tasks like:
 - Telemetry collection and sending
+- Pruning expired or used 2FA challenges
 - Future: Auto-payment processing, reminders, etc.
 """
 
@@ -68,6 +69,16 @@ class TaskScheduler:
             name='Send telemetry on startup'
         )
 
+        # Prune expired 2FA challenges so per-user lookups stay small
+        self.scheduler.add_job(
+            func=self._prune_twofa_challenges,
+            trigger='interval',
+            minutes=5,
+            id='twofa_challenge_prune',
+            name='Prune expired 2FA challenges',
+            replace_existing=True
+        )
+
         self.scheduler.start()
         self.started = True
         logger.info("Background scheduler started")
@@ -108,6 +119,16 @@ class TaskScheduler:
             except Exception as e:
                 logger.error(f"Failed to send scheduled telemetry: {e}", exc_info=True)
 
+    def _prune_twofa_challenges(self):
+        """Delete expired 2FA challenges (runs in background thread)."""
+        with self.app.app_context():
+            try:
+                deleted = prune_twofa_challenges()
+                if deleted:
+                    logger.debug(f"Pruned {deleted} 2FA challenges")
+            except Exception as e:
+                logger.error(f"Failed to prune 2FA challenges: {e}", exc_info=True)
+
     @contextmanager
     def _telemetry_job_lock(self):
         """Coordinate scheduler workers using the existing PostgreSQL database."""
@@ -134,5 +155,24 @@ class TaskScheduler:
                     )
 
 
+def prune_twofa_challenges(now=None):
+    """Delete 2FA challenges that have expired.
+
+    Used challenges are kept until they expire: the newest disable
+    confirmation must stay in place so an older, still-valid code cannot
+    take its place. Idempotent, so concurrent workers can run it without coordination.
+    Returns the number of rows deleted.
+    """
+    from models import db, TwoFAChallenge
+
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    result = db.session.execute(
+        db.delete(TwoFAChallenge).where(TwoFAChallenge.expires_at < now)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
 # Global instance
 scheduler = TaskScheduler()
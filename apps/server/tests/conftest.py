@@ -27,7 +27,7 @@ os.environ['FLASK_ENV'] = 'testing'
 os.environ['RATE_LIMIT_ENABLED'] = 'false'
 
 import config
-from app import create_app, create_access_token, JWT_SECRET_KEY
+from app import create_app, create_access_token, JWT_SECRET_KEY, _hash_2fa_code
 from models import (
     db, User, Database, Bill, Payment,
     OAuthAccount, TwoFAConfig, TwoFAChallenge, WebAuthnCredential,
@@ -223,9 +223,10 @@ def twofa_enabled_user(app, db_session, admin_user):
     config = TwoFAConfig(
         user_id=admin_user.id,
         email_otp_enabled=True,
+        # One code in the legacy Werkzeug format, one HMAC'd as issued today
         recovery_codes_hash=json.dumps([
             generate_password_hash('AAAA1111'),
-            generate_password_hash('BBBB2222'),
+            _hash_2fa_code('BBBB2222'),
         ]),
     )
     db_session.add(config)
@@ -263,7 +264,7 @@ def twofa_challenge_with_otp(app, db_session, admin_user, twofa_enabled_user):
         user_id=admin_user.id,
         token_hash=session_hash,
         challenge_type='email_otp',
-        otp_code_hash=generate_password_hash(otp_code),
+        otp_code_hash=_hash_2fa_code(otp_code),
         expires_at=datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) + datetime.timedelta(hours=1),
     )
     db_session.add(challenge)
@@ -10,6 +10,8 @@ Tests:
 
 import json
 
+import pytest
+
 
 class TestJWTAuth:
     """Test JWT authentication (API v2)."""
@@ -71,6 +73,53 @@ class TestJWTAuth:
         assert "refresh_token" in data.get("data", {})
         assert data["data"]["refresh_token"] != refresh_token
 
+    def test_current_user_reuses_authenticated_row(
+        self, app, db_session, admin_user
+    ):
+        from flask import g
+
+        from app import _current_user
+
+        with app.test_request_context():
+            g.jwt_user_id = admin_user.id
+            assert _current_user().id == admin_user.id
+
+            sentinel = object()
+            g.jwt_user = sentinel
+            assert _current_user() is sentinel
+
+    def test_issue_token_pair_shares_one_timestamp(
+        self, app, db_session, admin_user
+    ):
+        import datetime
+
+        import jwt
+
+        from app import (
+            JWT_ALGORITHM,
+            JWT_REFRESH_TOKEN_EXPIRES,
+            _hash_token,
+            _issue_token_pair,
+            _jwt_signing_key,
+        )
+        from models import RefreshToken
+
+        access_token, refresh_token = _issue_token_pair(
+            admin_user.id, admin_user.role, "pytest"
+        )
+
+        claims = jwt.decode(access_token, _jwt_signing_key, algorithms=[JWT_ALGORITHM])
+        stored = RefreshToken.query.filter_by(
+            token_hash=_hash_token(refresh_token)
+        ).one()
+        issued_at = (
+            stored.expires_at.replace(tzinfo=datetime.timezone.utc)
+            - JWT_REFRESH_TOKEN_EXPIRES
+        )
+        assert claims["user_id"] == admin_user.id
+        assert stored.device_info == "pytest"
+        assert int(issued_at.timestamp()) == claims["iat"]
+
 
 class TestUserPreferences:
     """Test persisted authenticated-user preferences."""
@@ -213,3 +262,415 @@ class TestLogout:
             "/api/v2/auth/refresh", json={"refresh_token": refresh_token}
         )
         assert refresh_response.status_code in [401, 400]
+
+
+class TestTwoFactorVerify:
+    """Test completing a 2FA login challenge."""
+
+    def test_email_otp_verify(self, client, db_session, twofa_challenge_with_otp):
+        challenge, session_token, otp_code = twofa_challenge_with_otp
+
+        response = client.post(
+            "/api/v2/auth/2fa/verify",
+            json={
+                "session_token": session_token,
+                "method": "email_otp",
+                "code": "000000",
+            },
+        )
+        assert response.status_code == 400
+        db_session.refresh(challenge)
+        assert challenge.attempts == 1
+
+        response = client.post(
+            "/api/v2/auth/2fa/verify",
+            json={
+                "session_token": session_token,
+                "method": "email_otp",
+                "code": otp_code,
+            },
+        )
+        assert response.status_code == 200
+        assert response.get_json()["data"]["access_token"]
+        db_session.refresh(challenge)
+        assert challenge.used is True
+
+    def test_recovery_codes_single_use(
+        self, client, db_session, twofa_challenge, twofa_enabled_user
+    ):
+        from models import TwoFAChallenge
+
+        challenge, session_token = twofa_challenge
+        # Legacy Werkzeug hash and current HMAC hash are both accepted
+        for code in ("aaaa1111", "BBBB2222"):
+            response = client.post(
+                "/api/v2/auth/2fa/verify",
+                json={
+                    "session_token": session_token,
+                    "method": "recovery",
+                    "recovery_code": code,
+                },
+            )
+            assert response.status_code == 200
+            db_session.query(TwoFAChallenge).filter_by(id=challenge.id).update(
+                {"used": False}
+            )
+            db_session.commit()
+
+        response = client.post(
+            "/api/v2/auth/2fa/verify",
+            json={
+                "session_token": session_token,
+                "method": "recovery",
+                "recovery_code": "BBBB2222",
+            },
+        )
+        assert response.status_code == 400
+        db_session.refresh(twofa_enabled_user)
+        assert twofa_enabled_user.recovery_codes_hash is None
+
+    def test_challenge_sends_code_email(
+        self, client, db_session, twofa_challenge, monkeypatch
+    ):
+        import services.email as email_service
+        from app import _hash_2fa_code
+
+        challenge, session_token = twofa_challenge
+        sent = []
+        monkeypatch.setattr(
+            email_service,
+            "send_2fa_code_email",
+            lambda *args: sent.append(args) or True,
+        )
+
+        response = client.post(
+            "/api/v2/auth/2fa/challenge",
+            json={"session_token": session_token, "method": "email_otp"},
+        )
+        assert response.status_code == 200
+        email, code, username = sent[0]
+        assert (email, username) == ("admin@test.com", "testadmin")
+        db_session.refresh(challenge)
+        assert challenge.otp_code_hash == _hash_2fa_code(code)
+
+    def test_challenge_reports_failed_code_email(
+        self, client, twofa_challenge, monkeypatch
+    ):
+        import services.email as email_service
+
+        _, session_token = twofa_challenge
+        monkeypatch.setattr(email_service, "send_2fa_code_email", lambda *args: False)
+
+        response = client.post(
+            "/api/v2/auth/2fa/challenge",
+            json={"session_token": session_token, "method": "email_otp"},
+        )
+        assert response.status_code == 502
+        assert response.get_json()["error"] == "Failed to send verification code"
+
+    def test_regenerated_recovery_codes_are_stored_as_fixed_width_digests(
+        self,
+        client,
+        db_session,
+        admin_auth_headers,
+        twofa_challenge,
+        twofa_enabled_user,
+    ):
+        _, session_token = twofa_challenge
+
+        response = client.get(
+            "/api/v2/auth/2fa/recovery-codes", headers=admin_auth_headers
+        )
+        assert response.status_code == 200
+        codes = response.get_json()["data"]["recovery_codes"]
+        db_session.refresh(twofa_enabled_user)
+        assert len(twofa_enabled_user.recovery_codes_hash) == 64 * len(codes)
+
+        response = client.post(
+            "/api/v2/auth/2fa/verify",
+            json={
+                "session_token": session_token,
+                "method": "recovery",
+                "recovery_code": codes[3],
+            },
+        )
+        assert response.status_code == 200
+        db_session.refresh(twofa_enabled_user)
+        assert len(twofa_enabled_user.recovery_codes_hash) == 64 * (len(codes) - 1)
+
+    def test_prune_twofa_challenges_deletes_only_expired(
+        self, app, db_session, admin_user
+    ):
+        import datetime
+
+        from models import TwoFAChallenge
+        from services.scheduler import prune_twofa_challenges
+
+        now = datetime.datetime(2026, 10, 16, 12, 0)
+        later = now + datetime.timedelta(minutes=5)
+        db_session.add_all(
+            [
+                TwoFAChallenge(
+                    user_id=admin_user.id,
+                    token_hash="active",
+                    challenge_type="pending",
+                    expires_at=later,
+                ),
+                TwoFAChallenge(
+                    user_id=admin_user.id,
+                    token_hash="used",
+                    challenge_type="pending",
+                    expires_at=later,
+                    used=True,
+                ),
+                TwoFAChallenge(
+                    user_id=admin_user.id,
+                    token_hash="expired",
+                    challenge_type="pending",
+                    expires_at=now - datetime.timedelta(seconds=1),
+                ),
+            ]
+        )
+        db_session.commit()
+
+        assert prune_twofa_challenges(now=now) == 1
+        assert sorted(c.token_hash for c in TwoFAChallenge.query.all()) == [
+            "active",
+            "used",
+        ]
+
+    def test_no_expire_on_commit_restores_session_setting(self, app):
+        """The decorator only relaxes expiry for the wrapped handler."""
+        from app import no_expire_on_commit
+        from models import db
+
+        seen = []
+
+        @no_expire_on_commit
+        def handler():
+            seen.append(db.session().expire_on_commit)
+            raise RuntimeError("boom")
+
+        with app.app_context():
+            with pytest.raises(RuntimeError):
+                handler()
+            assert seen == [False]
+            assert db.session().expire_on_commit is True
+
+
+class TestTwoFactorManagement:
+    """Test passkey management and disabling 2FA."""
+
+    def _add_passkeys(self, db_session, user, config, count):
+        from models import WebAuthnCredential
+
+        config.passkey_enabled = True
+        creds = [
+            WebAuthnCredential(
+                user_id=user.id,
+                credential_id=f"cred-{i}",
+                credential_id_raw=f"cred-{i}".encode(),
+                public_key="key",
+                device_name=f"Key {i}",
+                transports_list=["usb", "not-a-transport"],
+            )
+            for i in range(count)
+        ]
+        db_session.add_all(creds)
+        db_session.commit()
+        return [c.id for c in creds]
+
+    def test_delete_passkey_disables_passkey_2fa_when_last_removed(
+        self, client, db_session, admin_user, admin_auth_headers, twofa_enabled_user
+    ):
+        first_id, second_id = self._add_passkeys(
+            db_session, admin_user, twofa_enabled_user, 2
+        )
+        body = {"password": "testpassword123"}
+
+        response = client.delete(
+            f"/api/v2/auth/2fa/setup/passkey/{first_id}",
+            headers=admin_auth_headers,
+            json=body,
+        )
+        assert response.status_code == 200
+        db_session.refresh(twofa_enabled_user)
+        assert twofa_enabled_user.passkey_enabled is True
+
+        response = client.delete(
+            f"/api/v2/auth/2fa/setup/passkey/{first_id}",
+            headers=admin_auth_headers,
+            json=body,
+        )
+        assert response.status_code == 404
+
+        response = client.delete(
+            f"/api/v2/auth/2fa/setup/passkey/{second_id}",
+            headers=admin_auth_headers,
+            json=body,
+        )
+        assert response.status_code == 200
+        db_session.refresh(twofa_enabled_user)
+        assert twofa_enabled_user.passkey_enabled is False
+
+    def test_disable_clears_config_and_passkeys(
+        self, client, db_session, admin_user, admin_auth_headers, twofa_enabled_user
+    ):
+        from models import WebAuthnCredential
+
+        self._add_passkeys(db_session, admin_user, twofa_enabled_user, 1)
+
+        response = client.post(
+            "/api/v2/auth/2fa/disable",
+            headers=admin_auth_headers,
+            json={"password": "testpassword123"},
+        )
+        assert response.status_code == 200
+        db_session.refresh(twofa_enabled_user)
+        assert twofa_enabled_user.email_otp_enabled is False
+        assert twofa_enabled_user.passkey_enabled is False
+        assert twofa_enabled_user.recovery_codes_hash is None
+        assert WebAuthnCredential.query.filter_by(user_id=admin_user.id).count() == 0
+
+    def test_passkey_auth_options_use_stored_credential_ids(
+        self, client, db_session, admin_user, twofa_enabled_user, twofa_challenge,
+        monkeypatch,
+    ):
+        import app as app_module
+
+        monkeypatch.setattr(app_module, "ENABLE_PASSKEYS", True)
+        self._add_passkeys(db_session, admin_user, twofa_enabled_user, 2)
+        _, session_token = twofa_challenge
+
+        response = client.post(
+            "/api/v2/auth/2fa/verify/passkey/options",
+            json={"session_token": session_token},
+        )
+        assert response.status_code == 200
+        allowed = response.get_json()["data"]["options"]["allowCredentials"]
+        # base64url of b"cred-0" / b"cred-1"; unknown transports are dropped
+        assert sorted(c["id"] for c in allowed) == ["Y3JlZC0w", "Y3JlZC0x"]
+        assert all(c["transports"] == ["usb"] for c in allowed)
+
+    def test_oidc_user_disable_requires_latest_confirmation_code(
+        self, client, db_session, oauth_user, oauth_user_headers
+    ):
+        import datetime
+
+        from app import _hash_2fa_code
+        from models import TwoFAChallenge, TwoFAConfig
+
+        config = TwoFAConfig(user_id=oauth_user.id, email_otp_enabled=True)
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        older = TwoFAChallenge(
+            user_id=oauth_user.id,
+            token_hash="older-disable",
+            challenge_type="disable_2fa_confirm",
+            otp_code_hash=_hash_2fa_code("111111"),
+            expires_at=now + datetime.timedelta(minutes=10),
+            created_at=now - datetime.timedelta(minutes=1),
+        )
+        latest = TwoFAChallenge(
+            user_id=oauth_user.id,
+            token_hash="latest-disable",
+            challenge_type="disable_2fa_confirm",
+            otp_code_hash=_hash_2fa_code("222222"),
+            expires_at=now + datetime.timedelta(minutes=10),
+            created_at=now,
+        )
+        db_session.add_all([config, older, latest])
+        db_session.commit()
+
+        response = client.post(
+            "/api/v2/auth/2fa/disable",
+            headers=oauth_user_headers,
+            json={"confirmation_code": "111111"},
+        )
+        assert response.status_code == 401
+        db_session.refresh(latest)
+        assert latest.attempts == 1
+
+        response = client.post(
+            "/api/v2/auth/2fa/disable",
+            headers=oauth_user_headers,
+            json={"confirmation_code": "222222"},
+        )
+        assert response.status_code == 200
+        db_session.refresh(config)
+        assert config.email_otp_enabled is False
+        assert TwoFAChallenge.query.filter_by(user_id=oauth_user.id).count() == 0
+
+    def test_pruning_keeps_older_disable_code_rejected_after_newer_is_used(
+        self, client, db_session, oauth_user, oauth_user_headers
+    ):
+        import datetime
+
+        from app import _hash_2fa_code
+        from models import TwoFAChallenge, TwoFAConfig
+        from services.scheduler import prune_twofa_challenges
+
+        config = TwoFAConfig(user_id=oauth_user.id, email_otp_enabled=True)
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        code_a = TwoFAChallenge(
+            user_id=oauth_user.id,
+            token_hash="disable-a",
+            challenge_type="disable_2fa_confirm",
+            otp_code_hash=_hash_2fa_code("111111"),
+            expires_at=now + datetime.timedelta(minutes=10),
+            created_at=now - datetime.timedelta(minutes=1),
+        )
+        code_b = TwoFAChallenge(
+            user_id=oauth_user.id,
+            token_hash="disable-b",
+            challenge_type="disable_2fa_confirm",
+            otp_code_hash=_hash_2fa_code("222222"),
+            expires_at=now + datetime.timedelta(minutes=10),
+            created_at=now,
+            used=True,
+        )
+        db_session.add_all([config, code_a, code_b])
+        db_session.commit()
+
+        assert prune_twofa_challenges() == 0
+
+        response = client.post(
+            "/api/v2/auth/2fa/disable",
+            headers=oauth_user_headers,
+            json={"confirmation_code": "111111"},
+        )
+        assert response.status_code == 401
+        db_session.refresh(config)
+        assert config.email_otp_enabled is True
+
+    def test_passkey_registration_options_exclude_existing_passkeys(
+        self, client, db_session, admin_user, admin_auth_headers, twofa_enabled_user,
+        monkeypatch,
+    ):
+        import app as app_module
+
+        monkeypatch.setattr(app_module, "ENABLE_PASSKEYS", True)
+        self._add_passkeys(db_session, admin_user, twofa_enabled_user, 1)
+
+        response = client.post(
+            "/api/v2/auth/2fa/setup/passkey/options", headers=admin_auth_headers
+        )
+        assert response.status_code == 200
+        excluded = response.get_json()["data"]["options"]["excludeCredentials"]
+        assert excluded == [
+            {"id": "Y3JlZC0w", "type": "public-key", "transports": ["usb"]}
+        ]
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("", b""),
+            ("AQ", b"\x01"),
+            ("AQI", b"\x01\x02"),
+            ("AQID", b"\x01\x02\x03"),
+            ("_-8", b"\xff\xef"),
+        ],
+    )
+    def test_b64url_decode_pads_from_length(self, value, expected):
+        from app import _b64url_decode
+
+        assert _b64url_decode(value) == expected
@@ -8,6 +8,7 @@ Tests:
 """
 import json
 import datetime
+import secrets
 from decimal import Decimal
 
 import pytest
@@ -151,6 +152,15 @@ class TestBillsCRUD:
                                headers=auth_headers_with_db)
         assert response.status_code == 200
 
+    def test_auto_pay_bill_accepts_large_frequency_config(self, db_session, test_bill):
+        """Test the auto-pay index does not cap frequency_config size."""
+        test_bill.auto_pay = True
+        test_bill.frequency_config = json.dumps({'note': secrets.token_urlsafe(6000)})
+        db_session.commit()
+
+        db_session.expire_all()
+        assert len(db_session.get(Bill, test_bill.id).frequency_config) > 8000
+
     def test_get_nonexistent_bill(self, client, auth_headers_with_db):
         """Test getting a bill that doesn't exist."""
         response = client.get('/api/v2/bills/99999',
@@ -638,6 +648,31 @@ class TestBillSettlements:
         assert recipient_data['summary']['settled_count'] == 1
         assert recipient_data['settled'][0]['direction'] == 'i_owe'
 
+    def test_mark_share_paid_toggle_removes_share_payment(
+        self,
+        client,
+        user_auth_headers,
+        db_session,
+        test_bill,
+        admin_user,
+        regular_user,
+    ):
+        recipient_db = self._create_recipient_database(db_session, regular_user)
+        share = self._create_accepted_share(db_session, test_bill, admin_user, regular_user)
+        recipient_headers = {**user_auth_headers, 'X-Database': recipient_db.name}
+        toggle_url = f'/api/v2/shares/{share.id}/mark-paid'
+
+        paid = client.post(toggle_url, headers=recipient_headers)
+        assert paid.status_code == 200
+        payment_id = paid.get_json()['data']['payment_id']
+        assert db_session.get(Payment, payment_id).share_id == share.id
+
+        unpaid = client.post(toggle_url, headers=recipient_headers)
+        assert unpaid.status_code == 200
+        assert unpaid.get_json()['data']['message'] == 'Marked as unpaid'
+        assert unpaid.get_json()['data']['recipient_paid_date'] is None
+        assert Payment.query.filter_by(share_id=share.id).count() == 0
+
     def test_zero_minor_unit_settlements_quantize_derived_portions(
         self,
         client,
@@ -714,6 +749,180 @@ class TestBillSettlements:
         quantum = Decimal(1).scaleb(-config.CURRENCY_MINOR_UNITS[currency])
         assert payment_decimal == payment_decimal.quantize(quantum)
 
+    def test_shared_bills_list_latest_payment_per_bill(
+        self,
+        client,
+        user_auth_headers,
+        db_session,
+        test_database,
+        test_bill,
+        admin_user,
+        regular_user,
+    ):
+        other_bill = Bill(
+            database_id=test_database.id,
+            name='Other Shared Bill',
+            amount=40.00,
+            frequency='monthly',
+            due_date='2025-01-20',
+            type='expense',
+        )
+        db_session.add(other_bill)
+        db_session.commit()
+        self._create_accepted_share(db_session, test_bill, admin_user, regular_user)
+        self._create_accepted_share(db_session, other_bill, admin_user, regular_user)
+        db_session.add_all([
+            Payment(bill_id=test_bill.id, amount=100, payment_date='2025-01-15'),
+            Payment(bill_id=test_bill.id, amount=90, payment_date='2025-02-15'),
+            Payment(bill_id=test_bill.id, amount=80, payment_date='2024-12-15'),
+        ])
+        db_session.commit()
+
+        response = client.get('/api/v2/shared-bills', headers=user_auth_headers)
+
+        assert response.status_code == 200
+        rows = {row['bill']['id']: row for row in response.get_json()['data']}
+        assert rows[test_bill.id]['owner'] == admin_user.username
+        assert rows[test_bill.id]['last_payment']['amount'] == 90
+        assert rows[test_bill.id]['last_payment']['date'] == '2025-02-15'
+        assert rows[other_bill.id]['last_payment'] is None
+
+    def test_shared_bills_cache_drops_entry_when_recipient_leaves(
+        self, client, user_auth_headers, db_session, test_bill, admin_user, regular_user
+    ):
+        recipient_db = self._create_recipient_database(db_session, regular_user)
+        share = self._create_accepted_share(db_session, test_bill, admin_user, regular_user)
+        recipient_headers = {**user_auth_headers, 'X-Database': recipient_db.name}
+
+        before = client.get('/api/v2/shared-bills', headers=user_auth_headers)
+        assert [row['share_id'] for row in before.get_json()['data']] == [share.id]
+
+        left = client.post(f'/api/v2/shares/{share.id}/leave', headers=recipient_headers)
+        assert left.status_code == 200
+
+        after = client.get('/api/v2/shared-bills', headers=user_auth_headers)
+        assert after.get_json()['data'] == []
+
+    def test_shared_bills_cache_reflects_owner_bill_and_payment_changes(
+        self, client, auth_headers_with_db, user_auth_headers, db_session,
+        test_bill, admin_user, regular_user
+    ):
+        self._create_accepted_share(db_session, test_bill, admin_user, regular_user)
+
+        before = client.get('/api/v2/shared-bills', headers=user_auth_headers)
+        assert before.get_json()['data'][0]['bill']['name'] == 'Test Bill'
+        assert before.get_json()['data'][0]['last_payment'] is None
+
+        renamed = client.put(
+            f'/api/v2/bills/{test_bill.id}',
+            headers=auth_headers_with_db,
+            json={'name': 'Renamed Bill'},
+        )
+        assert renamed.status_code == 200
+        after_rename = client.get('/api/v2/shared-bills', headers=user_auth_headers)
+        assert after_rename.get_json()['data'][0]['bill']['name'] == 'Renamed Bill'
+
+        paid = client.post(
+            f'/api/v2/bills/{test_bill.id}/pay',
+            headers=auth_headers_with_db,
+            json={'amount': 100.00, 'payment_date': '2025-01-15'},
+        )
+        assert paid.status_code in (200, 201)
+        after_pay = client.get('/api/v2/shared-bills', headers=user_auth_headers)
+        assert after_pay.get_json()['data'][0]['last_payment']['amount'] == 100.00
+
+        deleted = client.delete(
+            f'/api/v2/bills/{test_bill.id}/permanent', headers=auth_headers_with_db
+        )
+        assert deleted.status_code == 200
+        after_delete = client.get('/api/v2/shared-bills', headers=user_auth_headers)
+        assert after_delete.get_json()['data'] == []
+
+    def test_shared_bills_cache_kept_when_unshared_bill_changes(
+        self, client, auth_headers_with_db, user_auth_headers, db_session,
+        test_bill, admin_user, regular_user
+    ):
+        from app import _shared_bills_cache
+
+        self._create_accepted_share(db_session, test_bill, admin_user, regular_user)
+        other_bill = Bill(
+            database_id=test_bill.database_id,
+            name='Unshared Bill',
+            amount=50.00,
+            frequency='monthly',
+            due_date='2025-01-20',
+            type='expense',
+        )
+        db_session.add(other_bill)
+        db_session.commit()
+
+        client.get('/api/v2/shared-bills', headers=user_auth_headers)
+        cached = _shared_bills_cache[regular_user.id]
+
+        renamed = client.put(
+            f'/api/v2/bills/{other_bill.id}',
+            headers=auth_headers_with_db,
+            json={'name': 'Renamed Unshared Bill'},
+        )
+        assert renamed.status_code == 200
+        assert _shared_bills_cache.get(regular_user.id) is cached
+
+    def test_pending_shares_list_bill_and_owner(
+        self,
+        client,
+        user_auth_headers,
+        db_session,
+        test_bill,
+        admin_user,
+        regular_user,
+    ):
+        share = self._create_accepted_share(db_session, test_bill, admin_user, regular_user)
+        share.status = 'pending'
+        share.accepted_at = None
+        db_session.commit()
+
+        response = client.get('/api/v2/shared-bills/pending', headers=user_auth_headers)
+
+        assert response.status_code == 200
+        rows = response.get_json()['data']
+        assert [row['share_id'] for row in rows] == [share.id]
+        assert rows[0]['bill_name'] == test_bill.name
+        assert rows[0]['owner'] == admin_user.username
+
+    def test_share_create_resolves_recipient_and_rejects_duplicates(
+        self, client, auth_headers_with_db, test_bill, admin_user, regular_user
+    ):
+        share_url = f'/api/v2/bills/{test_bill.id}/share'
+
+        missing = client.post(
+            share_url, headers=auth_headers_with_db, json={'identifier': 'nobody'}
+        )
+        assert missing.status_code == 404
+
+        own = client.post(
+            share_url,
+            headers=auth_headers_with_db,
+            json={'identifier': admin_user.username},
+        )
+        assert own.status_code == 400
+
+        created = client.post(
+            share_url,
+            headers=auth_headers_with_db,
+            json={'identifier': regular_user.username.upper()},
+        )
+        assert created.status_code == 201
+        share = db.session.get(BillShare, created.get_json()['data']['id'])
+        assert share.shared_with_user_id == regular_user.id
+
+        duplicate = client.post(
+            share_url,
+            headers=auth_headers_with_db,
+            json={'identifier': regular_user.username},
+        )
+        assert duplicate.status_code == 400
+        assert duplicate.get_json()['error'] == 'Bill already shared with this user'
+
 
 class TestCashFlowForecast:
     """Test cash-flow forecast projections."""
@@ -1348,6 +1557,31 @@ class TestPermanentDeleteWithShareHistory:
         assert ShareAuditLog.query.filter_by(bill_id=test_bill.id).count() == 0
 
 
+    def test_cleanup_expired_shares_logs_and_deletes_each_share(
+        self, db_session, test_bill, admin_user
+    ):
+        expired_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1)
+        for identifier in ('a@example.com', 'b@example.com'):
+            db_session.add(BillShare(
+                bill_id=test_bill.id,
+                owner_user_id=admin_user.id,
+                shared_with_identifier=identifier,
+                identifier_type='email',
+                status='pending',
+                expires_at=expired_at,
+            ))
+        db_session.commit()
+
+        stats = BillShare.cleanup_expired_shares()
+
+        assert stats['deleted_count'] == 2
+        assert BillShare.query.filter_by(bill_id=test_bill.id).count() == 0
+        logs = ShareAuditLog.query.filter_by(action='expired_cleanup').all()
+        assert sorted(json.loads(log.extra_data)['shared_with'] for log in logs) == [
+            'a@example.com',
+            'b@example.com',
+        ]
+
 class TestOneTimeBills:
     """Regression coverage for frequency='once' bills.
 
@@ -3,6 +3,7 @@ Tests for provider-neutral outbound email.
 """
 
 import importlib
+import smtplib
 from types import SimpleNamespace
 
 from services.email_config import get_email_config
@@ -256,6 +257,83 @@ def test_transactional_helpers_keep_existing_send_contract(monkeypatch):
     )
 
 
+def test_background_send_retries_transport_errors_until_helper_succeeds(monkeypatch):
+    email_service = _reload_email_service(monkeypatch, EMAIL_PROVIDER="none")
+    monkeypatch.setattr(email_service, "BACKGROUND_SEND_BACKOFF_SECONDS", 0)
+    results = iter([ConnectionError("smtp down"), TimeoutError("slow"), True])
+    calls = []
+
+    def flaky_send(email, token):
+        calls.append((email, token))
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    future = email_service.send_in_background(flaky_send, "share@example.com", "t")
+
+    assert future.result(timeout=5) is True
+    assert calls == [("share@example.com", "t")] * 3
+
+
+def test_background_send_does_not_retry_permanent_failures(monkeypatch):
+    email_service = _reload_email_service(monkeypatch, EMAIL_PROVIDER="none")
+    # A retry would stall the test on the backoff
+    monkeypatch.setattr(email_service, "BACKGROUND_SEND_BACKOFF_SECONDS", 60)
+    calls = []
+
+    # The disabled provider answers False: a misconfiguration, not an outage
+    def send(to, subject, html):
+        calls.append(to)
+        return email_service.send_email(to, subject, html)
+
+    future = email_service.send_in_background(send, "user@example.com", "S", "<p></p>")
+
+    assert future.result(timeout=5) is False
+    assert calls == ["user@example.com"]
+
+
+def test_background_smtp_send_retries_temporary_replies_only(monkeypatch):
+    email_service = _reload_email_service(
+        monkeypatch,
+        EMAIL_PROVIDER="smtp",
+        SMTP_HOST="smtp.example.com",
+        FROM_EMAIL="billing@example.com",
+    )
+    monkeypatch.setattr(email_service, "BACKGROUND_SEND_BACKOFF_SECONDS", 0)
+    replies = []
+
+    class ReplyingSMTP(FakeSMTP):
+        def send_message(self, message):
+            reply = replies.pop(0)
+            if reply is not None:
+                raise reply
+            super().send_message(message)
+
+    monkeypatch.setattr(email_service.smtplib, "SMTP", ReplyingSMTP)
+
+    FakeSMTP.instances = []
+    replies[:] = [smtplib.SMTPDataError(451, b"try again"), None]
+    retried = email_service.send_in_background(
+        email_service.send_email, "user@example.com", "S", "<p></p>"
+    )
+    assert retried.result(timeout=5) is True
+    assert len(FakeSMTP.instances) == 2
+
+    FakeSMTP.instances = []
+    replies[:] = [smtplib.SMTPAuthenticationError(535, b"bad credentials")]
+    rejected = email_service.send_in_background(
+        email_service.send_email, "user@example.com", "S", "<p></p>"
+    )
+    assert rejected.result(timeout=5) is False
+    assert len(FakeSMTP.instances) == 1
+
+    # Synchronous sends still report transport errors as a False result
+    FakeSMTP.instances = []
+    replies[:] = [smtplib.SMTPDataError(451, b"try again")]
+    assert email_service.send_email("user@example.com", "S", "<p></p>") is False
+
+
 def test_forgot_password_does_not_enumerate_when_send_fails(
     client, db_session, monkeypatch
 ):
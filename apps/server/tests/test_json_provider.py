@@ -0,0 +1,57 @@
+"""orjson provider compatibility contracts."""
+
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+pytest.importorskip("orjson")
+
+from services.json_provider import OrjsonProvider, install_json_provider
+
+
+@pytest.fixture
+def json_app():
+    application = Flask(__name__)
+    install_json_provider(application)
+    return application
+
+
+def test_install_uses_orjson_provider(json_app):
+    assert isinstance(json_app.json, OrjsonProvider)
+
+
+def test_response_matches_stdlib_provider_output(json_app):
+    payload = {
+        "b": 1,
+        "a": [1.5, None, True],
+        "amount": Decimal("12.34"),
+        "when": datetime.datetime(2026, 7, 24, 12, 30),
+        3: "int key",
+    }
+
+    with json_app.app_context():
+        response = jsonify(payload)
+
+    assert response.mimetype == "application/json"
+    assert response.data.endswith(b"\n")
+    assert json.loads(response.data) == {
+        "3": "int key",
+        "a": [1.5, None, True],
+        "amount": "12.34",
+        "b": 1,
+        "when": "Fri, 24 Jul 2026 12:30:00 GMT",
+    }
+
+
+def test_loads_accepts_literals_rejected_by_orjson(json_app):
+    assert json_app.json.loads('{"value": 1}') == {"value": 1}
+    parsed = json_app.json.loads('{"split_value": NaN}')
+    assert parsed["split_value"] != parsed["split_value"]
+
+
+def test_application_responses_use_orjson(app):
+    # Login, 2FA verify and the admin lists all respond through app.json
+    assert isinstance(app.json, OrjsonProvider)
@@ -9,7 +9,9 @@ from collections import Counter
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pytest
 import yaml
+from sqlalchemy import event
 
 import config
 import app as server_app
@@ -22,6 +24,7 @@ from models import (
     Payment,
     ShareAuditLog,
     User,
+    UserDevice,
     UserInvite,
 )
 from config import parse_webauthn_android_origins
@@ -988,6 +991,26 @@ def test_stale_share_update_returns_share_snapshot(
     assert conflict["server"]["split_type"] == "equal"
 
 
+def test_sync_returns_payments_changed_since_timestamp(
+    client, auth_headers_with_db, test_bill, db_session
+):
+    payment = Payment(bill_id=test_bill.id, amount=42, payment_date="2026-08-01")
+    db_session.add(payment)
+    db_session.commit()
+
+    response = client.get(
+        "/api/v2/sync",
+        headers=auth_headers_with_db,
+        query_string={"since": "2000-01-01T00:00:00Z"},
+    )
+
+    assert response.status_code == 200
+    payments = response.get_json()["data"]["payments"]
+    assert [(p["id"], p["bill_id"], p["amount"]) for p in payments] == [
+        (payment.id, test_bill.id, 42)
+    ]
+
+
 def test_sync_push_replays_complete_batch(client, auth_headers_with_db, app):
     payload = {
         "client_mutation_id": str(uuid.uuid4()),
@@ -1009,10 +1032,268 @@ def test_sync_push_replays_complete_batch(client, auth_headers_with_db, app):
     assert second.status_code == 200
     assert second.headers["Idempotency-Replayed"] == "true"
     assert second.get_json() == first.get_json()
+    # The stored body is replayed verbatim rather than re-encoded
+    assert second.get_data() == first.get_data()
+    assert second.mimetype == "application/json"
     with app.app_context():
         assert Bill.query.filter_by(name="Offline-created bill").count() == 1
 
 
+def _sync_base(timestamp):
+    return timestamp.replace(tzinfo=datetime.timezone.utc).isoformat().replace(
+        "+00:00", "Z"
+    )
+
+
+def _capture_statements(engine):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", capture)
+
+
+def test_sync_push_locks_referenced_bills_in_one_query(
+    client, auth_headers_with_db, db_session, admin_user, test_database
+):
+    other_database = Database(
+        name="other_sync_db", display_name="Other", owner_id=admin_user.id
+    )
+    db_session.add(other_database)
+    db_session.flush()
+    bill_fields = {"amount": 10, "frequency": "monthly", "due_date": "2026-08-01"}
+    bills = [
+        Bill(database_id=test_database.id, name=f"Sync bill {i}", **bill_fields)
+        for i in range(3)
+    ]
+    foreign_bill = Bill(
+        database_id=other_database.id, name="Foreign bill", **bill_fields
+    )
+    db_session.add_all([*bills, foreign_bill])
+    db_session.commit()
+
+    payload = {
+        "bills": [
+            {
+                "id": bill.id,
+                "name": f"Renamed {bill.id}",
+                "base_updated_at": _sync_base(bill.last_updated),
+            }
+            for bill in (bills[0], bills[1], foreign_bill)
+        ],
+        "deleted_bills": [
+            {"id": bills[2].id, "base_updated_at": _sync_base(bills[2].last_updated)}
+        ],
+        "payments": [
+            {"bill_id": bill_id, "amount": 10, "payment_date": "2026-08-01"}
+            for bill_id in (bills[0].id, foreign_bill.id)
+        ],
+    }
+
+    statements, stop_capture = _capture_statements(server_app.db.engine)
+    try:
+        response = client.post(
+            "/api/v2/sync/push", headers=auth_headers_with_db, json=payload
+        )
+    finally:
+        stop_capture()
+
+    data = response.get_json()["data"]
+    assert [(b["id"], b["action"]) for b in data["accepted_bills"]] == [
+        (bills[0].id, "updated"),
+        (bills[1].id, "updated"),
+        (bills[2].id, "archived"),
+    ]
+    assert data["rejected_bills"] == [{"id": foreign_bill.id, "reason": "not_found"}]
+    assert [p["action"] for p in data["accepted_payments"]] == ["created"]
+    assert [p["reason"] for p in data["rejected_payments"]] == ["invalid_bill_id"]
+    bill_selects = [
+        s for s in statements
+        if s.lstrip().upper().startswith("SELECT") and "FROM BILLS" in s.upper()
+    ]
+    assert len(bill_selects) == 2
+    assert sum("FOR UPDATE" in s.upper() for s in bill_selects) == 1
+
+
+def test_sync_push_locks_referenced_payments_with_their_bills_in_one_query(
+    client, auth_headers_with_db, db_session, admin_user, test_bill
+):
+    other_database = Database(
+        name="other_sync_db", display_name="Other", owner_id=admin_user.id
+    )
+    db_session.add(other_database)
+    db_session.flush()
+    foreign_bill = Bill(
+        database_id=other_database.id,
+        name="Foreign bill",
+        amount=10,
+        frequency="monthly",
+        due_date="2026-08-01",
+    )
+    db_session.add(foreign_bill)
+    db_session.flush()
+    payment_fields = {"amount": 10, "payment_date": "2026-08-01"}
+    kept, removed = (Payment(bill_id=test_bill.id, **payment_fields) for _ in range(2))
+    foreign = Payment(bill_id=foreign_bill.id, **payment_fields)
+    db_session.add_all([kept, removed, foreign])
+    db_session.commit()
+
+    payload = {
+        "payments": [
+            {
+                "id": payment.id,
+                "amount": 25,
+                "base_updated_at": _sync_base(payment.updated_at),
+            }
+            for payment in (kept, foreign)
+        ],
+        "deleted_payments": [
+            {"id": removed.id, "base_updated_at": _sync_base(removed.updated_at)}
+        ],
+    }
+
+    statements, stop_capture = _capture_statements(server_app.db.engine)
+    try:
+        response = client.post(
+            "/api/v2/sync/push", headers=auth_headers_with_db, json=payload
+        )
+    finally:
+        stop_capture()
+
+    data = response.get_json()["data"]
+    assert data["accepted_payments"] == [
+        {"id": kept.id, "action": "updated"},
+        {"id": removed.id, "action": "deleted"},
+    ]
+    assert data["rejected_payments"] == [{"id": foreign.id, "reason": "access_denied"}]
+    lookups = [
+        s for s in statements
+        if s.lstrip().upper().startswith("SELECT")
+        and ("FROM PAYMENTS" in s.upper() or "FROM BILLS" in s.upper())
+    ]
+    assert len(lookups) == 1
+    assert "FOR UPDATE OF PAYMENTS" in lookups[0].upper()
+
+
+def test_sync_push_inserts_new_bills_and_payments_in_one_statement_each(
+    client, auth_headers_with_db, test_bill, app
+):
+    payload = {
+        "bills": [
+            _bill_payload(name=f"Offline bill {i}", client_ref=f"bill-{i}")
+            for i in range(3)
+        ],
+        "payments": [
+            {
+                "bill_id": test_bill.id,
+                "amount": 10 + i,
+                "payment_date": "2026-08-01",
+                "client_ref": f"payment-{i}",
+            }
+            for i in range(2)
+        ],
+    }
+
+    statements, stop_capture = _capture_statements(server_app.db.engine)
+    try:
+        response = client.post(
+            "/api/v2/sync/push", headers=auth_headers_with_db, json=payload
+        )
+    finally:
+        stop_capture()
+
+    data = response.get_json()["data"]
+    with app.app_context():
+        for entry in data["accepted_bills"]:
+            index = entry["client_ref"].split("-")[1]
+            assert server_app.db.session.get(Bill, entry["id"]).name == f"Offline bill {index}"
+        for entry in data["accepted_payments"]:
+            index = int(entry["client_ref"].split("-")[1])
+            assert server_app.db.session.get(Payment, entry["id"]).amount == 10 + index
+    assert [e["client_ref"] for e in data["accepted_bills"]] == ["bill-0", "bill-1", "bill-2"]
+    inserts = Counter(
+        s.split()[2].lower() for s in statements if s.lstrip().upper().startswith("INSERT")
+    )
+    assert inserts["bills"] == 1
+    assert inserts["payments"] == 1
+
+
+def test_sync_push_writes_every_change_in_one_flush_and_commit(
+    client, auth_headers_with_db, db_session, test_bill
+):
+    payment = Payment(bill_id=test_bill.id, amount=10, payment_date="2026-08-01")
+    db_session.add(payment)
+    db_session.commit()
+    payload = {
+        "bills": [
+            _bill_payload(name="Offline bill", client_ref="bill-0"),
+            {
+                "id": test_bill.id,
+                "name": "Renamed offline",
+                "base_updated_at": _sync_base(test_bill.last_updated),
+            },
+        ],
+        "payments": [
+            {"bill_id": test_bill.id, "amount": 5, "payment_date": "2026-08-02"}
+        ],
+        "deleted_payments": [
+            {"id": payment.id, "base_updated_at": _sync_base(payment.updated_at)}
+        ],
+    }
+
+    flushes = []
+    commits = []
+
+    def record_flush(session, flush_context):
+        flushes.append(session)
+
+    def record_commit(conn):
+        commits.append(conn)
+
+    event.listen(server_app.db.session, "after_flush", record_flush)
+    event.listen(server_app.db.engine, "commit", record_commit)
+    try:
+        response = client.post(
+            "/api/v2/sync/push", headers=auth_headers_with_db, json=payload
+        )
+    finally:
+        event.remove(server_app.db.session, "after_flush", record_flush)
+        event.remove(server_app.db.engine, "commit", record_commit)
+
+    data = response.get_json()["data"]
+    assert [entry["action"] for entry in data["accepted_bills"]] == [
+        "created",
+        "updated",
+    ]
+    assert [entry["action"] for entry in data["accepted_payments"]] == [
+        "created",
+        "deleted",
+    ]
+    assert len(flushes) == 1
+    assert len(commits) == 1
+
+
+def test_sync_push_row_locks_refuse_lazy_loads(app, db_session, test_bill):
+    from sqlalchemy.exc import InvalidRequestError
+
+    payment = Payment(bill_id=test_bill.id, amount=10, payment_date="2026-08-01")
+    db_session.add(payment)
+    db_session.commit()
+    bill_id, database_id, payment_id = test_bill.id, test_bill.database_id, payment.id
+    db_session.expunge_all()
+
+    bill = server_app._lock_sync_bills({bill_id}, database_id)[bill_id]
+    locked_payment, _ = server_app._lock_sync_payments({payment_id})[payment_id]
+
+    with pytest.raises(InvalidRequestError):
+        bill.payments
+    with pytest.raises(InvalidRequestError):
+        locked_payment.bill
+    db_session.rollback()
+
+
 def test_sync_push_rejects_fractional_zero_minor_unit_bill_and_payment_mutations(
     client,
     auth_headers_with_db,
@@ -2034,3 +2315,107 @@ def test_v2_team_invitation_endpoints_preserve_public_flow(
         created = User.query.filter_by(username="mobileinvitee").one()
         assert created.email == "mobile-invite@example.com"
         assert test_database.id in {database.id for database in created.accessible_databases}
+
+
+def test_device_list_reports_push_token_presence_newest_first(
+    client, db_session, admin_user, admin_auth_headers
+):
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    db_session.add_all(
+        [
+            UserDevice(
+                user_id=admin_user.id,
+                device_id="old-phone",
+                platform="ios",
+                last_active_at=now - datetime.timedelta(days=2),
+            ),
+            UserDevice(
+                user_id=admin_user.id,
+                device_id="new-phone",
+                platform="android",
+                push_token="fcm-secret-token",
+                push_provider="fcm",
+                last_active_at=now,
+            ),
+        ]
+    )
+    db_session.commit()
+
+    response = client.get("/api/v2/devices", headers=admin_auth_headers)
+
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert [d["device_id"] for d in data] == ["new-phone", "old-phone"]
+    assert [d["has_push_token"] for d in data] == [True, False]
+    assert data[0]["last_active_at"] == now.isoformat()
+    assert "fcm-secret-token" not in response.get_data(as_text=True)
+
+
+def test_openapi_spec_and_docs_are_served_with_conditional_caching(client):
+    spec = client.get("/api/v2/openapi.yaml")
+
+    assert spec.status_code == 200
+    assert spec.mimetype == "text/yaml"
+    assert spec.get_data() == (SERVER_ROOT / "openapi.yaml").read_bytes()
+    assert spec.cache_control.max_age == 3600
+
+    revalidated = client.get(
+        "/api/v2/openapi.yaml", headers={"If-None-Match": spec.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+    docs = client.get("/api/v2/docs")
+    assert docs.status_code == 200
+    assert docs.mimetype == "text/html"
+    assert b'url: "/api/v2/openapi.yaml"' in docs.get_data()
+
+
+def test_device_registration_upserts_and_keeps_unsent_fields(
+    client, db_session, admin_user, admin_auth_headers
+):
+    first = client.post(
+        "/api/v2/devices",
+        json={
+            "device_id": "phone-1",
+            "platform": "ios",
+            "device_name": "Phone",
+            "push_token": "token-1",
+            "notification_settings": {"bill_reminder": False},
+        },
+        headers=admin_auth_headers,
+    )
+    assert first.status_code == 201
+
+    second = client.post(
+        "/api/v2/devices",
+        json={"device_id": "phone-1", "platform": "ios", "app_version": "2.0"},
+        headers=admin_auth_headers,
+    )
+    assert second.status_code == 200
+    assert second.get_json()["data"]["id"] == first.get_json()["data"]["id"]
+
+    db_session.expire_all()
+    device = UserDevice.query.filter_by(user_id=admin_user.id).one()
+    assert (device.device_name, device.push_token, device.app_version) == (
+        "Phone",
+        "token-1",
+        "2.0",
+    )
+    assert device.notification_settings == '{"bill_reminder": false}'
+    assert device.created_at is not None
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2026-07-24T12:30:00Z",
+        "2026-07-24t12:30:00z",
+        "2026-07-24T14:30:00+02:00",
+        "2026-07-24T12:30:00.000000Z",
+    ],
+)
+def test_sync_timestamp_suffixes_parse_to_naive_utc(value):
+    assert server_app._parse_sync_timestamp(value) == (
+        datetime.datetime(2026, 7, 24, 12, 30),
+        None,
+    )
@@ -181,8 +181,8 @@ def _mock_oauth_dependencies(
         patch("app._get_oidc_metadata", return_value=metadata),
         patch("app._verify_oauth_state", return_value=state_payload),
         patch("app._get_jwks", return_value={"keys": [{"kid": "1"}]}),
-        patch("requests.post", return_value=token_resp) as post_mock,
-        patch("requests.get", return_value=userinfo_resp) as get_mock,
+        patch("app._oauth_http.post", return_value=token_resp) as post_mock,
+        patch("app._oauth_http.get", return_value=userinfo_resp) as get_mock,
         patch("authlib.jose.JsonWebKey.import_key_set", return_value=MagicMock()),
         patch("authlib.jose.jwt.decode", return_value=FakeClaims(claims)),
     ):
@@ -547,6 +547,25 @@ class TestUserinfoFetch:
 class TestEmailVerified:
     """Bug 3: Trusted providers skip email_verified; OIDC has env var toggle."""
 
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (True, True),
+            (1, True),
+            ("true", True),
+            (" Yes ", True),
+            ("1", True),
+            (False, False),
+            (0, False),
+            (1.0, False),
+            ("false", False),
+            (None, False),
+            (["true"], False),
+        ],
+    )
+    def test_email_verified_claim_values(self, value, expected):
+        assert app_module._is_true_claim(value) is expected
+
     def test_microsoft_trusted_no_email_verified(
         self, client, db_session, admin_user, monkeypatch
     ):
@@ -598,7 +617,7 @@ class TestEmailVerified:
         client_id = _set_provider_config(monkeypatch, provider)
         sub = "oidc-user-1"
         _link_account(db_session, admin_user, provider, sub)
-        monkeypatch.setattr(config, "OAUTH_OIDC_SKIP_EMAIL_VERIFICATION", True)
+        monkeypatch.setattr(app_module, "OAUTH_OIDC_SKIP_EMAIL_VERIFICATION", True)
 
         claims = {
             "iss": f"https://issuer.example/{provider}",
@@ -618,7 +637,7 @@ class TestEmailVerified:
         """OIDC with SKIP_EMAIL_VERIFICATION=false should reject unverified emails."""
         provider = "oidc"
         client_id = _set_provider_config(monkeypatch, provider)
-        monkeypatch.setattr(config, "OAUTH_OIDC_SKIP_EMAIL_VERIFICATION", False)
+        monkeypatch.setattr(app_module, "OAUTH_OIDC_SKIP_EMAIL_VERIFICATION", False)
 
         claims = {
             "iss": f"https://issuer.example/{provider}",
@@ -698,3 +717,236 @@ class TestEmailFallback:
         assert response.get_json()["success"] is True
         assert account is not None
         assert account.provider_email is None
+
+
+class TestProviderCache:
+    """Discovery and JWKS fetches are cached with a single in-flight fetch."""
+
+    def test_concurrent_misses_fetch_once(self):
+        import threading
+        import time
+
+        cache = {}
+        calls = []
+
+        def fetch(provider_key):
+            calls.append(provider_key)
+            time.sleep(0.05)
+            return {"issuer": provider_key}
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    app_module._get_cached_provider_value(cache, "google", 60, fetch)
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert calls == ["google"]
+        assert results == [{"issuer": "google"}] * 8
+
+    def test_stale_entry_served_while_refreshing(self):
+        import threading
+        import time
+
+        cache = {"google": ({"issuer": "old"}, time.monotonic() - 120)}
+        refreshed = threading.Event()
+
+        def fetch(provider_key):
+            refreshed.set()
+            return {"issuer": "new"}
+
+        value = app_module._get_cached_provider_value(cache, "google", 60, fetch)
+
+        assert value == {"issuer": "old"}
+        assert refreshed.wait(timeout=2)
+        deadline = time.monotonic() + 2
+        while cache["google"][0] != {"issuer": "new"} and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache["google"][0] == {"issuer": "new"}
+
+    def test_jwks_cached_as_parsed_key_set(self):
+        app_module._jwks_cache.pop("google", None)
+        jwks_resp = MagicMock()
+        jwks_resp.raise_for_status.return_value = None
+        jwks_resp.json.return_value = {"keys": [{"kid": "1"}]}
+        key_set = MagicMock()
+
+        with (
+            patch("app._get_oidc_metadata", return_value={"jwks_uri": "https://x/jwks"}),
+            patch("app._oauth_http.get", return_value=jwks_resp) as get_mock,
+            patch("authlib.jose.JsonWebKey.import_key_set", return_value=key_set) as import_mock,
+        ):
+            try:
+                assert app_module._get_jwks("google") is key_set
+                assert app_module._get_jwks("google") is key_set
+            finally:
+                app_module._jwks_cache.pop("google", None)
+
+        assert get_mock.call_count == 1
+        assert import_mock.call_count == 1
+
+
+    def test_jwks_refetched_once_after_verification_failure(self, monkeypatch):
+        import time
+
+        old_keys, new_keys = MagicMock(), MagicMock()
+        monkeypatch.setitem(
+            app_module._jwks_cache, "google", (old_keys, time.monotonic() - 120)
+        )
+        fetch = MagicMock(return_value=new_keys)
+        monkeypatch.setattr(app_module, "_fetch_jwks", fetch)
+
+        assert app_module._refresh_jwks_after_failure("google", old_keys) is new_keys
+        # Another request failing with the old set picks up the refreshed one
+        assert app_module._refresh_jwks_after_failure("google", old_keys) is new_keys
+        # A fresh set that still fails is not refetched again right away
+        assert app_module._refresh_jwks_after_failure("google", new_keys) is None
+        assert fetch.call_count == 1
+
+
+class TestOauthStateReplay:
+    """OAuth state nonces are single-use and the used set stays bounded."""
+
+    def test_state_token_rejected_on_replay(self):
+        state = app_module._generate_oauth_state("google", "verifier", "nonce")
+
+        assert app_module._verify_oauth_state(state)["provider"] == "google"
+        assert app_module._verify_oauth_state(state) is None
+
+    def test_used_nonces_expire_without_evicting_live_ones(self, monkeypatch):
+        from collections import OrderedDict
+
+        clock = [1000.0]
+        monkeypatch.setattr(app_module, "_used_oauth_nonces", OrderedDict())
+        monkeypatch.setattr(app_module.time, "monotonic", lambda: clock[0])
+
+        for nonce in ("a", "b", "c"):
+            assert app_module._claim_oauth_nonce(nonce) is True
+
+        # Live nonces stay claimed however many are stored
+        assert app_module._claim_oauth_nonce("a") is False
+        assert list(app_module._used_oauth_nonces) == ["a", "b", "c"]
+
+        clock[0] += app_module._USED_NONCE_TTL + 1
+        assert app_module._claim_oauth_nonce("d") is True
+        assert list(app_module._used_oauth_nonces) == ["d"]
+
+
+class TestLinkedAccountLogin:
+    """Existing links resolve the user, databases and 2FA config together."""
+
+    def test_linked_login_returns_user_and_databases(
+        self, client, db_session, admin_user, monkeypatch
+    ):
+        provider = "google"
+        client_id = _set_provider_config(monkeypatch, provider)
+        sub = "google-user-1"
+        database = models_module.Database(name="linked_db", display_name="Linked")
+        db_session.add(database)
+        admin_user.accessible_databases.append(database)
+        db_session.commit()
+        _link_account(db_session, admin_user, provider, sub)
+
+        claims = {
+            "iss": f"https://issuer.example/{provider}",
+            "aud": client_id,
+            "nonce": "nonce-123",
+            "sub": sub,
+            "email": "admin@test.com",
+            "email_verified": True,
+        }
+
+        with _mock_oauth_dependencies(provider, client_id, claims):
+            response = _call_callback(client, provider)
+
+        assert response.status_code == 200
+        data = response.get_json()["data"]
+        assert data["user"]["id"] == admin_user.id
+        assert data["user"]["is_new_user"] is False
+        assert data["databases"] == [
+            {"id": database.id, "name": "linked_db", "display_name": "Linked"}
+        ]
+
+
+class TestOauthUnlinkedLogin:
+    """First logins either link by verified email or auto-register."""
+
+    def test_username_suffix_skips_taken_names(self, app, db_session, monkeypatch):
+        monkeypatch.setattr(app_module, "OAUTH_AUTO_REGISTER", True)
+        for username in ("new_user", "new_user1", "newXuser2"):
+            db_session.add(User(username=username, role="admin"))
+        db_session.commit()
+
+        user, is_new_user, error = app_module._resolve_oauth_user(
+            "google", "google-new-1", "new_user@example.com"
+        )
+
+        assert error is None
+        assert is_new_user is True
+        assert user.username == "new_user2"
+        assert [d.name for d in user.accessible_databases] == [f"db_{user.id}"]
+        assert user.accessible_databases[0].owner_id == user.id
+        assert _oauth_account("google", "google-new-1").user_id == user.id
+
+    def test_verified_email_links_case_insensitively(self, app, db_session, admin_user):
+        import datetime
+
+        admin_user.email_verified_at = datetime.datetime.now(datetime.timezone.utc)
+        db_session.commit()
+
+        user, is_new_user, error = app_module._resolve_oauth_user(
+            "google", "google-existing-1", "Admin@Test.COM"
+        )
+
+        assert error is None
+        assert is_new_user is False
+        assert user.id == admin_user.id
+
+
+class TestLinkedAccountManagement:
+    """Listing and unlinking the current user's OAuth accounts."""
+
+    @staticmethod
+    def _headers(user):
+        token = app_module.create_access_token(user.id, user.role)
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_list_accounts(self, client, db_session, admin_user):
+        account = _link_account(db_session, admin_user, "google", "google-list-1")
+
+        response = client.get(
+            "/api/v2/auth/oauth/accounts", headers=self._headers(admin_user)
+        )
+
+        assert response.status_code == 200
+        assert response.get_json()["data"] == [
+            {
+                "id": account.id,
+                "provider": "google",
+                "provider_email": "admin@test.com",
+                "created_at": account.created_at.isoformat(),
+            }
+        ]
+
+    def test_unlink_only_login_method_rejected_without_password(
+        self, client, db_session, admin_user
+    ):
+        admin_user.password_hash = None
+        db_session.commit()
+        _link_account(db_session, admin_user, "google", "google-unlink-1")
+        _link_account(db_session, admin_user, "microsoft", "ms-unlink-1")
+        headers = self._headers(admin_user)
+
+        response = client.delete("/api/v2/auth/oauth/google", headers=headers)
+        assert response.status_code == 200
+
+        response = client.delete("/api/v2/auth/oauth/microsoft", headers=headers)
+        assert response.status_code == 400
+        assert _oauth_account("microsoft", "ms-unlink-1") is not None
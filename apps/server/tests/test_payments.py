@@ -6,6 +6,7 @@ Tests:
 - Payment listing and filtering
 - Payment updates and deletion
 """
+import datetime
 import json
 import pytest
 
@@ -252,3 +253,198 @@ class TestPaymentAuthorization:
         # Should either fail or return empty based on implementation
         # The key is it shouldn't crash
         assert response.status_code in [200, 400, 403]
+
+
+class TestPaymentStats:
+    """Test payment statistics endpoints."""
+
+    @pytest.fixture
+    def stats_payments(self, db_session, test_database, test_bill, admin_user, regular_user):
+        from models import Bill, BillShare
+
+        paycheck = Bill(
+            database_id=test_database.id,
+            name='Paycheck',
+            amount=500.00,
+            frequency='monthly',
+            due_date='2025-01-01',
+            type='deposit',
+            account='Checking'
+        )
+        db_session.add(paycheck)
+        db_session.commit()
+        share = BillShare(
+            bill_id=test_bill.id,
+            owner_user_id=admin_user.id,
+            shared_with_user_id=regular_user.id,
+            shared_with_identifier=regular_user.username,
+            identifier_type='username',
+            status='accepted',
+            split_type='equal',
+        )
+        db_session.add(share)
+        db_session.commit()
+        db_session.add_all([
+            Payment(bill_id=test_bill.id, amount=100, payment_date='2025-01-15'),
+            Payment(bill_id=test_bill.id, amount=110, payment_date='2025-02-15'),
+            Payment(bill_id=paycheck.id, amount=500, payment_date='2025-01-01'),
+            Payment(bill_id=paycheck.id, amount=450, payment_date='2024-12-01'),
+            Payment(
+                bill_id=test_bill.id,
+                amount=50,
+                payment_date='2025-01-20',
+                share_id=share.id,
+            ),
+        ])
+        db_session.commit()
+
+    def test_monthly_stats_split_expenses_and_deposits(
+        self, client, auth_headers_with_db, user_auth_headers, stats_payments
+    ):
+        response = client.get('/api/v2/stats/monthly', headers=auth_headers_with_db)
+        assert response.status_code == 200
+        assert response.get_json()['data'] == {
+            '2024-12': {'expenses': 0, 'deposits': 450},
+            '2025-01': {'expenses': 100, 'deposits': 550},
+            '2025-02': {'expenses': 110, 'deposits': 0},
+        }
+
+        sharee_headers = {**user_auth_headers, 'X-Database': '_all_'}
+        response = client.get('/api/v2/stats/monthly', headers=sharee_headers)
+        assert response.status_code == 200
+        assert response.get_json()['data'] == {
+            '2025-01': {'expenses': 50, 'deposits': 0},
+        }
+
+    def test_yearly_and_account_stats_split_by_bill_type(
+        self, client, auth_headers_with_db, stats_payments
+    ):
+        response = client.get('/api/v2/stats/yearly', headers=auth_headers_with_db)
+        assert response.status_code == 200
+        assert response.get_json()['data'] == {
+            '2024': {'expenses': 0, 'deposits': 450},
+            '2025': {'expenses': 260, 'deposits': 500},
+        }
+
+        response = client.get('/api/v2/stats/by-account', headers=auth_headers_with_db)
+        assert response.status_code == 200
+        assert response.get_json()['data'] == [
+            {'account': 'Checking', 'expenses': 260, 'deposits': 950, 'total': -690},
+        ]
+
+    def test_account_stats_ordered_by_expenses(
+        self, client, auth_headers_with_db, db_session, test_database, stats_payments
+    ):
+        from models import Bill
+
+        card = Bill(
+            database_id=test_database.id,
+            name='Card',
+            amount=900.00,
+            frequency='monthly',
+            due_date='2025-01-01',
+            account='Credit Card'
+        )
+        db_session.add(card)
+        db_session.commit()
+        db_session.add(Payment(bill_id=card.id, amount=900, payment_date='2025-01-05'))
+        db_session.commit()
+
+        response = client.get('/api/v2/stats/by-account', headers=auth_headers_with_db)
+
+        assert response.status_code == 200
+        assert [row['account'] for row in response.get_json()['data']] == [
+            'Credit Card',
+            'Checking',
+        ]
+
+    def test_monthly_comparison_pivots_current_and_last_year(
+        self, client, auth_headers_with_db, db_session, test_bill
+    ):
+        this_year = datetime.date.today().year
+        db_session.add_all([
+            Payment(bill_id=test_bill.id, amount=100, payment_date=f'{this_year}-01-15'),
+            Payment(bill_id=test_bill.id, amount=80, payment_date=f'{this_year - 1}-01-15'),
+            Payment(bill_id=test_bill.id, amount=70, payment_date=f'{this_year - 1}-03-15'),
+            Payment(bill_id=test_bill.id, amount=60, payment_date=f'{this_year - 2}-03-15'),
+        ])
+        db_session.commit()
+
+        response = client.get('/api/v2/stats/monthly-comparison', headers=auth_headers_with_db)
+
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['current_year'] == this_year
+        assert data['months'] == [
+            {
+                'month': '01',
+                'current_year_expenses': 100,
+                'current_year_deposits': 0,
+                'last_year_expenses': 80,
+                'last_year_deposits': 0,
+            },
+            {
+                'month': '03',
+                'current_year_expenses': 0,
+                'current_year_deposits': 0,
+                'last_year_expenses': 70,
+                'last_year_deposits': 0,
+            },
+        ]
+
+
+class TestAutoPayments:
+    """Test processing of auto-pay bills."""
+
+    def test_process_auto_payments_pays_and_advances_due_bills(
+        self, client, auth_headers_with_db, db_session, test_database
+    ):
+        from models import Bill
+
+        monthly = Bill(
+            database_id=test_database.id,
+            name='Rent',
+            amount=1200.00,
+            frequency='monthly',
+            due_date='2025-01-31',
+            auto_pay=True,
+        )
+        once = Bill(
+            database_id=test_database.id,
+            name='Deposit',
+            frequency='once',
+            due_date='2025-01-10',
+            auto_pay=True,
+        )
+        future = Bill(
+            database_id=test_database.id,
+            name='Later',
+            amount=10.00,
+            frequency='monthly',
+            due_date='2999-01-01',
+            auto_pay=True,
+        )
+        db_session.add_all([monthly, once, future])
+        db_session.commit()
+
+        response = client.post('/api/v2/process-auto-payments', headers=auth_headers_with_db)
+
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['processed_count'] == 2
+        assert sorted(data['bills'], key=lambda b: b['bill_id']) == [
+            {'bill_id': monthly.id, 'name': 'Rent', 'amount': 1200.00},
+            {'bill_id': once.id, 'name': 'Deposit', 'amount': 0},
+        ]
+
+        db_session.expire_all()
+        today = datetime.date.today().isoformat()
+        payments = Payment.query.order_by(Payment.bill_id).all()
+        assert [(p.bill_id, p.amount, p.payment_date) for p in payments] == [
+            (monthly.id, 1200.00, today),
+            (once.id, 0, today),
+        ]
+        assert monthly.due_date == '2025-02-28'
+        assert monthly.archived is False
+        assert once.archived is True
+        assert future.due_date == '2999-01-01'
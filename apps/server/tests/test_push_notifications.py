@@ -1,7 +1,10 @@
-"""Push notification currency formatting contracts."""
+"""Push notification currency formatting and delivery contracts."""
+
+import json
 
 import pytest
 
+from models import UserDevice
 from services import push_notifications
 
 
@@ -37,3 +40,84 @@ def test_bill_reminder_uses_user_currency_and_minor_units(
     assert sent == 1
     assert delivered_bodies == [f"Utilities is due tomorrow ({expected_amount})"]
     assert "$" not in delivered_bodies[0]
+
+
+class _RecordingExecutor:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        self.calls.append((fn, args))
+
+
+def _register_test_devices(db_session, user_id):
+    db_session.add_all(
+        [
+            UserDevice(
+                user_id=user_id,
+                device_id="phone",
+                platform="ios",
+                push_token="token-phone",
+            ),
+            UserDevice(
+                user_id=user_id,
+                device_id="tablet",
+                platform="android",
+                push_token="token-tablet",
+                notification_settings=json.dumps({"test": False}),
+            ),
+            UserDevice(
+                user_id=user_id,
+                device_id="laptop",
+                platform="android",
+                push_token="token-laptop",
+            ),
+        ]
+    )
+    db_session.commit()
+
+
+def test_test_notification_reports_devices_actually_notified(
+    monkeypatch, client, db_session, admin_user, admin_auth_headers
+):
+    executor = _RecordingExecutor()
+    delivered_tokens = []
+
+    def fake_send(push_token, title, body, data, notification_type):
+        delivered_tokens.append(push_token)
+        return push_token == "token-phone"
+
+    monkeypatch.setattr(push_notifications, "FCM_SERVER_KEY", "test-key")
+    monkeypatch.setattr(push_notifications, "_background_executor", executor)
+    monkeypatch.setattr(push_notifications, "send_push_notification", fake_send)
+    _register_test_devices(db_session, admin_user.id)
+
+    response = client.post(
+        "/api/v2/notifications/test",
+        json={"title": "Hello"},
+        headers=admin_auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["data"]["devices_notified"] == 1
+    assert sorted(delivered_tokens) == ["token-laptop", "token-phone"]
+    assert executor.calls == []
+
+
+def test_background_delivery_gives_each_worker_its_own_data(
+    monkeypatch, app, db_session, admin_user
+):
+    executor = _RecordingExecutor()
+    monkeypatch.setattr(push_notifications, "_background_executor", executor)
+    _register_test_devices(db_session, admin_user.id)
+    data = {"action": "test"}
+
+    queued = push_notifications.send_push_to_user(
+        admin_user.id, "Hello", "Body", data, "test", background=True
+    )
+
+    assert queued == 2
+    payloads = [args[3] for _, args in executor.calls]
+    assert payloads == [{"action": "test"}, {"action": "test"}]
+    assert payloads[0] is not payloads[1]
+    assert all(payload is not data for payload in payloads)
@@ -1,6 +1,9 @@
 import datetime
 import json
 
+import pytest
+from werkzeug.security import generate_password_hash
+
 from models import BillShare, User, UserInvite
 from services import telemetry_receiver
 
@@ -107,6 +110,33 @@ class TestOneTimeTokenStorage:
             assert share.verify_invite_token(raw_share_token) is True
 
 
+class TestPasswordHashing:
+    def test_werkzeug_hash_still_verifies(self):
+        user = User(username="legacy", password_hash=generate_password_hash("Password123"))
+
+        assert user.check_password("Password123")
+        assert not user.check_password("wrong-password")
+
+    def test_new_passwords_use_argon2id(self):
+        pytest.importorskip("argon2")
+        user = User(username="fresh")
+        user.set_password("Password123")
+
+        assert user.password_hash.startswith("$argon2id$")
+        assert user.check_password("Password123")
+        assert not user.check_password("wrong-password")
+
+    def test_werkzeug_hash_is_upgraded_after_successful_check(self):
+        pytest.importorskip("argon2")
+        legacy_hash = generate_password_hash("Password123")
+        user = User(username="legacy", password_hash=legacy_hash)
+
+        assert not user.check_password("wrong-password")
+        assert user.password_hash == legacy_hash
+        assert user.check_password("Password123")
+        assert user.password_hash.startswith("$argon2id$")
+
+
 class TestTelemetryRateLimitProxyHandling:
     def test_rate_limit_ignores_spoofed_forwarded_for_without_trusted_proxy(self, app, monkeypatch):
         monkeypatch.setattr(telemetry_receiver, "TELEMETRY_TRUSTED_PROXY_IPS", set())
@@ -64,6 +64,37 @@ class TestV2DatabaseDescription:
         match = next(d for d in data if d['id'] == test_database.id)
         assert match['description'] == test_database.description
 
+    def test_list_databases_loads_members_in_one_query(
+        self, client, db_session, admin_auth_headers, admin_user, regular_user, test_database
+    ):
+        owner_id = admin_user.id if config.is_saas() else None
+        for index in range(3):
+            extra = Database(name=f'extra{index}', display_name=f'Extra {index}', owner_id=owner_id)
+            extra.users.extend([admin_user, regular_user])
+            db_session.add(extra)
+        db_session.commit()
+
+        statements = []
+
+        def capture_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', capture_statement)
+        try:
+            response = client.get('/api/v2/databases', headers=admin_auth_headers)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture_statement)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert len(data) == 4
+        extra = next(d for d in data if d['name'] == 'extra0')
+        assert sorted(u['username'] for u in extra['users']) == ['testadmin', 'testuser']
+        member_queries = [
+            s for s in statements if 'USER_DATABASE_ACCESS' in s.upper()
+        ]
+        assert len(member_queries) == 1
+
 
 class TestV2DatabaseAccessGet:
     def test_get_access_lists_users_with_access(self, client, admin_auth_headers, test_database, admin_user):
@@ -75,6 +106,26 @@ class TestV2DatabaseAccessGet:
         assert any(u['id'] == admin_user.id for u in data)
 
 
+class TestV2UserDatabasesGet:
+    def test_lists_databases_for_user(self, client, admin_auth_headers, admin_user, test_database):
+        response = client.get(
+            f'/api/v2/users/{admin_user.id}/databases', headers=admin_auth_headers
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert data == [
+            {
+                'id': test_database.id,
+                'name': test_database.name,
+                'display_name': test_database.display_name,
+            }
+        ]
+
+    def test_unknown_user_returns_404(self, client, admin_auth_headers):
+        response = client.get('/api/v2/users/999999/databases', headers=admin_auth_headers)
+        assert response.status_code == 404
+
+
 class TestV2AccessGrantRevokeIdempotency:
     def test_repeat_grant_is_idempotent(self, client, admin_auth_headers, test_database, regular_user):
         first = client.post(
@@ -106,6 +157,27 @@ class TestV2AccessGrantRevokeIdempotency:
         assert second.status_code == 200
         assert json.loads(second.data)['success'] is True
 
+    def test_grant_and_revoke_update_membership(
+        self, client, db_session, admin_auth_headers, test_database, regular_user
+    ):
+        def member_ids():
+            db_session.expire_all()
+            return {u.id for u in db.session.get(Database, test_database.id).users}
+
+        assert regular_user.id not in member_ids()
+        client.post(
+            f'/api/v2/databases/{test_database.id}/access',
+            json={'user_id': regular_user.id},
+            headers=admin_auth_headers,
+        )
+        assert regular_user.id in member_ids()
+
+        client.delete(
+            f'/api/v2/databases/{test_database.id}/access/{regular_user.id}',
+            headers=admin_auth_headers,
+        )
+        assert regular_user.id not in member_ids()
+
 
 class TestV2SaaSCrossAccountGrantDenial:
     pytestmark = SAAS_ONLY
@@ -153,6 +225,293 @@ class TestV2SaaSCrossAccountGrantDenial:
         assert response.status_code == 200
 
 
+class TestV2CreateUserAccountLimits:
+    @SAAS_ONLY
+    def test_user_limit_counts_distinct_members_of_owned_databases(
+        self, app, db_session, admin_user, regular_user, test_database
+    ):
+        from app import check_tier_limit
+
+        second = Database(name='second', display_name='Second', owner_id=admin_user.id)
+        db_session.add(second)
+        second.users.extend([admin_user, regular_user])
+        test_database.users.append(regular_user)
+        db_session.commit()
+
+        assert check_tier_limit(admin_user, 'users')[1]['used'] == 2
+        # A user who owns no databases still counts themselves
+        assert check_tier_limit(regular_user, 'users')[1]['used'] == 1
+
+    @SAAS_ONLY
+    def test_tier_check_reuses_subscription_loaded_with_jwt_user(
+        self, client, db_session, admin_user, admin_auth_headers, test_database
+    ):
+        db_session.add(Subscription(user_id=admin_user.id, tier='plus', status='active'))
+        db_session.commit()
+        # Start from an empty identity map, like a fresh request session
+        db_session.expunge_all()
+
+        statements = []
+
+        def capture_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(' '.join(statement.split()).upper())
+
+        event.listen(db.engine, 'before_cursor_execute', capture_statement)
+        try:
+            response = client.post(
+                '/api/v2/users',
+                json={'username': 'tiercheck', 'password': 'TierCheck123'},
+                headers=admin_auth_headers,
+            )
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture_statement)
+
+        assert response.status_code == 201
+        # The subscription arrives joined to the authenticated user's row
+        assert not [s for s in statements if 'FROM SUBSCRIPTIONS' in s]
+        assert len([s for s in statements if 'JOIN SUBSCRIPTIONS' in s]) == 1
+
+    @SAAS_ONLY
+    def test_create_user_only_grants_owned_databases(
+        self, client, db_session, admin_user, admin_auth_headers, test_database
+    ):
+        db_session.add(Subscription(user_id=admin_user.id, tier='plus', status='active'))
+        outsider = User(username='outsider', role='admin', password_change_required=False)
+        db_session.add(outsider)
+        db_session.flush()
+        foreign = Database(name='foreign', display_name='Foreign', owner_id=outsider.id)
+        db_session.add(foreign)
+        db_session.commit()
+
+        response = client.post(
+            '/api/v2/users',
+            json={
+                'username': 'newmember',
+                'password': 'NewMember123',
+                'database_ids': [test_database.id, foreign.id, test_database.id],
+            },
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 201
+        created = db.session.get(User, response.get_json()['data']['id'])
+        assert [d.id for d in created.accessible_databases] == [test_database.id]
+
+
+class TestV2InvitationCreate:
+    @pytest.fixture(autouse=True)
+    def sent_emails(self, monkeypatch, db_session, admin_user):
+        sent = []
+        monkeypatch.setattr(
+            'app.send_invite_email', lambda *args: sent.append(args) or True
+        )
+        if config.is_saas():
+            db_session.add(Subscription(user_id=admin_user.id, tier='plus', status='active'))
+            db_session.commit()
+        return sent
+
+    def test_create_and_resend_send_invite_email(
+        self, client, admin_auth_headers, sent_emails
+    ):
+        created = client.post(
+            '/api/v2/invitations',
+            json={'email': 'Invitee@Test.com'},
+            headers=admin_auth_headers,
+        )
+        assert created.status_code == 201
+        assert created.get_json()['data']['message'] == 'Invitation sent'
+        email, _, invited_by = sent_emails[0]
+        assert (email, invited_by) == ('invitee@test.com', 'testadmin')
+
+        invite_id = created.get_json()['data']['id']
+        resent = client.post(
+            f'/api/v2/invitations/{invite_id}/resend', headers=admin_auth_headers
+        )
+        assert resent.status_code == 200
+        assert resent.get_json()['data']['message'] == 'Invitation resent'
+        assert (sent_emails[1][0], sent_emails[1][2]) == (email, invited_by)
+
+    def test_create_and_resend_report_failed_invite_email(
+        self, client, admin_auth_headers, monkeypatch
+    ):
+        monkeypatch.setattr('app.send_invite_email', lambda *args: False)
+
+        created = client.post(
+            '/api/v2/invitations',
+            json={'email': 'invitee@test.com'},
+            headers=admin_auth_headers,
+        )
+        assert created.status_code == 201
+        assert (
+            created.get_json()['data']['message']
+            == 'Invitation created but email failed to send'
+        )
+
+        invite_id = created.get_json()['data']['id']
+        resent = client.post(
+            f'/api/v2/invitations/{invite_id}/resend', headers=admin_auth_headers
+        )
+        assert resent.get_json()['data']['message'] == 'Failed to resend invitation'
+
+    @pytest.mark.parametrize(
+        'email', ['no-at-sign.com', '@example.com', 'user@localhost', 'a@b.' + 'c' * 260]
+    )
+    def test_rejects_malformed_email(self, client, admin_auth_headers, email):
+        response = client.post(
+            '/api/v2/invitations', json={'email': email}, headers=admin_auth_headers
+        )
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Invalid email format'
+
+    @pytest.mark.parametrize('database_ids', ['1,2', ['²'], [1, '2'], [0], [True]])
+    def test_rejects_malformed_database_ids(self, client, admin_auth_headers, database_ids):
+        response = client.post(
+            '/api/v2/invitations',
+            json={'email': 'ids@test.com', 'database_ids': database_ids},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 400
+        assert 'database_ids' in response.get_json()['error']
+
+    def test_database_ids_list_skips_non_ascii_and_oversized_pieces(self):
+        invite = UserInvite(database_ids='1,²,12345678901,,7')
+        assert invite.database_ids_list == [1, 7]
+
+    def test_rejects_email_of_existing_user(self, client, admin_auth_headers, regular_user):
+        response = client.post(
+            '/api/v2/invitations',
+            json={'email': 'USER@test.com'},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 400
+        assert 'already exists' in response.get_json()['error']
+
+    def test_rejects_email_of_existing_user_stored_in_mixed_case(
+        self, client, db_session, admin_auth_headers
+    ):
+        db_session.add(User(username='mixed', role='user', email='Mixed.Case@Test.com'))
+        db_session.commit()
+
+        response = client.post(
+            '/api/v2/invitations',
+            json={'email': ' mixed.case@test.com '},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 400
+        assert 'already exists' in response.get_json()['error']
+
+    def test_rejects_second_pending_invite_but_not_expired_one(
+        self, client, db_session, admin_user, admin_auth_headers
+    ):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expired = UserInvite(
+            email='expired@test.com',
+            role='user',
+            invited_by_id=admin_user.id,
+            expires_at=now - datetime.timedelta(days=1),
+        )
+        expired.set_token()
+        db_session.add(expired)
+        db_session.commit()
+
+        first = client.post(
+            '/api/v2/invitations',
+            json={'email': 'expired@test.com'},
+            headers=admin_auth_headers,
+        )
+        assert first.status_code == 201
+
+        second = client.post(
+            '/api/v2/invitations',
+            json={'email': 'expired@test.com'},
+            headers=admin_auth_headers,
+        )
+        assert second.status_code == 400
+        assert 'already been sent' in second.get_json()['error']
+
+    @SAAS_ONLY
+    def test_rejects_databases_owned_by_another_account(
+        self, client, db_session, admin_auth_headers, test_database
+    ):
+        outsider = User(username='outsider', role='admin', password_change_required=False)
+        db_session.add(outsider)
+        db_session.flush()
+        foreign = Database(name='foreign', display_name='Foreign', owner_id=outsider.id)
+        db_session.add(foreign)
+        db_session.commit()
+
+        denied = client.post(
+            '/api/v2/invitations',
+            json={'email': 'denied@test.com', 'database_ids': [test_database.id, foreign.id]},
+            headers=admin_auth_headers,
+        )
+        assert denied.status_code == 403
+
+        # Unknown ids are ignored, as before
+        allowed = client.post(
+            '/api/v2/invitations',
+            json={'email': 'allowed@test.com', 'database_ids': [test_database.id, 999999]},
+            headers=admin_auth_headers,
+        )
+        assert allowed.status_code == 201
+
+
+class TestV2InvitationList:
+    def test_lists_only_own_pending_invites_per_caller(
+        self, client, db_session, admin_user, admin_auth_headers
+    ):
+        other_admin = User(username='otheradmin', role='admin', password_change_required=False)
+        db_session.add(other_admin)
+        db_session.flush()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        invites = {
+            'pending@test.com': (admin_user.id, now + datetime.timedelta(days=1), None),
+            'expired@test.com': (admin_user.id, now - datetime.timedelta(days=1), None),
+            'accepted@test.com': (admin_user.id, now + datetime.timedelta(days=1), now),
+            'other@test.com': (other_admin.id, now + datetime.timedelta(days=1), None),
+        }
+        for email, (inviter_id, expires_at, accepted_at) in invites.items():
+            invite = UserInvite(
+                email=email,
+                role='user',
+                invited_by_id=inviter_id,
+                expires_at=expires_at,
+                accepted_at=accepted_at,
+            )
+            invite.set_token()
+            db_session.add(invite)
+        db_session.commit()
+
+        # The cached statement must bind each caller's id, not the first one
+        for headers, expected in (
+            (admin_auth_headers, ['pending@test.com']),
+            (_headers_for(other_admin), ['other@test.com']),
+        ):
+            response = client.get('/api/v2/invitations', headers=headers)
+            assert response.status_code == 200
+            assert [i['email'] for i in response.get_json()['data']] == expected
+
+    def test_lists_database_ids_as_integers(
+        self, client, db_session, admin_user, admin_auth_headers, test_database
+    ):
+        invite = UserInvite(
+            email='scoped@test.com',
+            role='user',
+            invited_by_id=admin_user.id,
+            expires_at=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1),
+            database_ids=f'{test_database.id},,bogus,42',
+        )
+        invite.set_token()
+        db_session.add(invite)
+        db_session.commit()
+
+        response = client.get('/api/v2/invitations', headers=admin_auth_headers)
+        listed = response.get_json()['data'][0]
+        assert listed['database_ids'] == [test_database.id, 42]
+        db_session.refresh(invite)
+        assert listed['created_at'] == invite.created_at.isoformat()
+        assert listed['expires_at'] == invite.expires_at.isoformat()
+
+
 class TestV2UserRoleChangeGuards:
     def test_admin_cannot_demote_self(self, client, admin_auth_headers, admin_user):
         response = client.put(
@@ -8,6 +8,12 @@ from typing import Tuple, Optional
 import config
 
 
+# RFC 5322 simplified email regex, compiled once at import
+_EMAIL_PATTERN = re.compile(
+    r'^[a-zA-Z0-9.!#$%&\'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$'
+)
+
+
 def validate_email(email: str) -> Tuple[bool, Optional[str]]:
     """
     Validate email format using RFC 5322 simplified regex.
@@ -20,10 +26,7 @@ def validate_email(email: str) -> Tuple[bool, Optional[str]]:
 
     email = email.strip().lower()
 
-    # RFC 5322 simplified email regex
-    pattern = r'^[a-zA-Z0-9.!#$%&\'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$'
-
-    if not re.match(pattern, email):
+    if not _EMAIL_PATTERN.match(email):
         return False, "Invalid email format"
 
     if len(email) > 254:  # RFC 5321